@@ -0,0 +1,13 @@
+"""Reproducible performance benchmarks for the ETL pipelines.
+
+Run them from the repository root, e.g. ``python -m benchmarks.bench_ingest``.
+"""
+
+import os
+import sys
+
+# Make `src/` importable the same way the pipeline scripts do
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for _path in (_ROOT, os.path.join(_ROOT, "src")):
+    if _path not in sys.path:
+        sys.path.append(_path)
@@ -0,0 +1,159 @@
+"""Multiempleo audit: grouping on the concatenated name vs. the persona_id hash.
+
+python -m benchmarks.bench_audit --size 1GB --year 2024 --repeat 3
+
+Ingests a synthetic CPLT dataset (Planta, Contrata, Honorarios) spread over a
+single year, so that a month has a realistic size, and runs the multiempleo
+scan for its busiest month over all three files, each strategy in a fresh
+process, reporting time and peak RSS. Both must find the same people.
+"""
+
+import argparse
+import os
+import time
+
+from benchmarks.common import (
+    append_results,
+    environment_info,
+    parse_size,
+    print_table,
+    run_isolated,
+)
+from benchmarks.synthetic_cplt import generate_dataset
+
+STRATEGIES = ("string", "hash")
+
+
+def string_scan(paths, year, month):
+    """The previous query: group by the upper-cased 'NOMBRES PATERNO MATERNO'."""
+    import duckdb
+
+    from audits.audit_utils import generate_unified_sql
+
+    # Schema detection and DuckDB start-up stay out of the timing
+    base_sql, params = generate_unified_sql(paths, year, month)
+    query = f"""
+    WITH limpios AS (
+        SELECT
+            upper(trim(COALESCE(Nombres,'')) || ' ' || trim(COALESCE(Paterno,'')) || ' ' || trim(COALESCE(Materno,''))) as nombre_completo,
+            organismo, sueldo, Origen
+        FROM ({base_sql})
+    )
+    SELECT
+        nombre_completo,
+        COUNT(DISTINCT organismo) as num_empleos,
+        SUM(sueldo) as sueldo_total,
+        LIST(DISTINCT organismo) as lista_organismos,
+        LIST(DISTINCT Origen) as tipos_contrato
+    FROM limpios
+    GROUP BY 1
+    HAVING num_empleos > 1
+    ORDER BY sueldo_total DESC
+    LIMIT 100
+    """
+    start = time.perf_counter()
+    df = duckdb.execute(query, params).df()
+    return sorted(df["sueldo_total"].tolist()), time.perf_counter() - start
+
+
+def hash_scan(paths, year, month):
+    from audits.audit_utils import find_multiempleo, generate_unified_sql
+
+    generate_unified_sql(paths, year, month)
+    start = time.perf_counter()
+    df = find_multiempleo(paths, year, month)
+    return sorted(df["sueldo_total"].tolist()), time.perf_counter() - start
+
+
+def ingest(files, parquet_dir):
+    from etl.ingest import process_csv_to_parquet
+
+    return [
+        (kind, process_csv_to_parquet(info["path"], parquet_dir=parquet_dir))
+        for kind, info in files.items()
+    ]
+
+
+def busiest_month(paths):
+    import duckdb
+
+    from core.config import MONTHS_MAP
+
+    union = " UNION ALL ".join(
+        f"SELECT periodo FROM read_parquet('{path}')" for _, path in paths
+    )
+    periodo, rows = duckdb.query(
+        f"SELECT periodo, COUNT(*) FROM ({union}) GROUP BY 1 ORDER BY 2 DESC LIMIT 1"
+    ).fetchone()
+    names = {number: name for name, number in MONTHS_MAP.items()}
+    return periodo // 100, names[periodo % 100], rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multiempleo audit")
+    parser.add_argument("--size", default="200MB", help="Total CSV size, e.g. 1GB")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--repeat", type=int, default=1, help="Keep the best of N runs")
+    parser.add_argument("--work-dir", default=".bench")
+    parser.add_argument("--json", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    files = generate_dataset(
+        os.path.join(args.work_dir, "cplt"),
+        parse_size(args.size),
+        seed=args.seed,
+        years=(args.year, args.year),
+    )
+    parquet_dir = os.path.join(
+        args.work_dir, f"audit_{args.size}_seed{args.seed}_{args.year}"
+    )
+    paths, _, _ = run_isolated(ingest, files, parquet_dir)
+    year, month, month_rows = busiest_month(paths)
+    env = environment_info()
+
+    rows = []
+    found = {}
+    for strategy in STRATEGIES:
+        scan = string_scan if strategy == "string" else hash_scan
+        runs = []
+        for _ in range(args.repeat):
+            (totals, seconds), _, peak_rss = run_isolated(scan, paths, year, month)
+            runs.append((seconds, peak_rss))
+        found[strategy] = totals
+        seconds = min(r[0] for r in runs)
+        result = {
+            "strategy": strategy,
+            "month_rows": month_rows,
+            "seconds": round(seconds, 3),
+            "rows_per_s": round(month_rows / seconds),
+            "peak_rss_mb": round(min(r[1] for r in runs), 1),
+            "found": len(totals),
+        }
+        rows.append(result)
+        append_results(
+            args.json,
+            {
+                "benchmark": "audit",
+                "size": args.size,
+                "seed": args.seed,
+                "periodo": f"{year}-{month}",
+                **result,
+                **env,
+            },
+        )
+    if found["string"] != found["hash"]:
+        print("warning: the strategies found different people")
+
+    print(
+        f"\naudit benchmark  size={args.size} month={month} {year} "
+        f"commit={env['commit']}"
+    )
+    print_table(
+        rows,
+        ["strategy", "month_rows", "seconds", "rows_per_s", "peak_rss_mb", "found"],
+    )
+
+
+if __name__ == "__main__":
+    main()
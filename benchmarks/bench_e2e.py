@@ -0,0 +1,199 @@
+"""End-to-end ETL benchmark against the local mock servers.
+
+python -m benchmarks.bench_e2e --sources cplt senado camara --latency 0.05
+
+Starts the CPLT, Senado and Cámara mocks (benchmarks.mock_servers), points
+the sync and the scrapers at them through their base URL variables and runs
+the whole stage graph (scripts/run_pipeline.py) from an empty data
+directory. Reports every stage's time and Parquet rows, the records each
+source downloaded per second and what the servers saw (requests, injected
+errors and 429s).
+
+The scrapers keep their production politeness limits (adaptive Senado
+rate, Cámara token bucket and pauses), so the numbers are what a real
+backfill of the same size would take with the given latency.
+"""
+
+import argparse
+import os
+import shutil
+import time
+
+from benchmarks.common import (
+    append_results,
+    environment_info,
+    format_size,
+    parse_size,
+    print_table,
+)
+from benchmarks.mock_servers import (
+    CamaraHandler,
+    CPLTHandler,
+    MockServer,
+    SenadoHandler,
+    env_overrides,
+)
+from benchmarks.synthetic_cplt import generate_dataset
+
+SOURCES = ("cplt", "senado", "camara")
+
+
+def run_pipeline(run_dir, sources, year):
+    # Imported here so that the base URL variables are set first
+    from etl.job_journal import JobJournal
+    from etl.pipeline import Pipeline, build_stages
+
+    cwd = os.getcwd()
+    os.chdir(run_dir)
+    try:
+        start = time.perf_counter()
+        results = Pipeline(
+            build_stages(sources=sources, start_year=year, end_year=year)
+        ).run()
+        seconds = time.perf_counter() - start
+        journal = JobJournal()
+        records = {}
+        for row in journal.summary():
+            records[row["source"]] = records.get(row["source"], 0) + row["records"]
+    finally:
+        os.chdir(cwd)
+    return results, seconds, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ETL benchmark")
+    parser.add_argument("--sources", nargs="+", choices=SOURCES, default=list(SOURCES))
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--cplt-size", default="20MB")
+    parser.add_argument("--senado-records", type=int, default=200)
+    parser.add_argument("--deputies", type=int, default=10)
+    parser.add_argument("--staff-rows", type=int, default=150)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--rate-limit", type=float, default=None, help="Senado 429s above N req/s"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=".bench")
+    parser.add_argument("--json", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    common = {"latency": args.latency, "error_rate": args.error_rate, "seed": args.seed}
+    servers = {}
+    cplt_rows = 0
+    if "cplt" in args.sources:
+        files = generate_dataset(
+            os.path.join(args.work_dir, "cplt"),
+            parse_size(args.cplt_size),
+            seed=args.seed,
+        )
+        cplt_rows = sum(info["rows"] for info in files.values())
+        fixtures_dir = os.path.dirname(next(iter(files.values()))["path"])
+        servers["cplt"] = MockServer(CPLTHandler, fixtures_dir=fixtures_dir, **common)
+    if "senado" in args.sources:
+        servers["senado"] = MockServer(
+            SenadoHandler,
+            records_per_month=args.senado_records,
+            rate_limit=args.rate_limit,
+            **common,
+        )
+    if "camara" in args.sources:
+        servers["camara"] = MockServer(
+            CamaraHandler,
+            deputies=args.deputies,
+            staff_rows=args.staff_rows,
+            **common,
+        )
+
+    run_dir = os.path.abspath(os.path.join(args.work_dir, "e2e_run"))
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(run_dir)
+
+    for server in servers.values():
+        server.start()
+    env = env_overrides(**servers)
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        results, seconds, records = run_pipeline(run_dir, args.sources, args.year)
+    finally:
+        for server in servers.values():
+            server.stop()
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    if "cplt_sync" in results and results["cplt_sync"].status == "ran":
+        records["cplt"] = cplt_rows
+
+    stages = [result.as_dict() for result in results.values()]
+    sources = []
+    for source in args.sources:
+        scrape = results.get("cplt_sync" if source == "cplt" else f"{source}_scrape")
+        scrape_seconds = scrape.seconds if scrape else 0
+        stats = servers[source].stats
+        sources.append(
+            {
+                "source": source,
+                "records": records.get(source, 0),
+                "fetch_s": round(scrape_seconds, 2),
+                "records_per_s": round(records.get(source, 0) / scrape_seconds)
+                if scrape_seconds
+                else None,
+                "requests": stats["requests"],
+                "errors": stats["errors"],
+                "throttled": stats["throttled"],
+                "served": format_size(stats["bytes"]),
+            }
+        )
+
+    total_records = sum(records.values())
+    environment = environment_info()
+    append_results(
+        args.json,
+        {
+            "benchmark": "e2e",
+            "sources": args.sources,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "rate_limit": args.rate_limit,
+            "seconds": round(seconds, 2),
+            "records": total_records,
+            "records_per_s": round(total_records / seconds) if seconds else None,
+            "by_source": sources,
+            "stages": stages,
+            **environment,
+        },
+    )
+
+    print(
+        f"\ne2e benchmark  sources={' '.join(args.sources)} latency={args.latency}s "
+        f"error_rate={args.error_rate} commit={environment['commit']}"
+    )
+    print_table(
+        [{k: "" if v is None else v for k, v in stage.items()} for stage in stages],
+        ["stage", "status", "seconds", "rows", "error"],
+    )
+    print()
+    print_table(
+        sources,
+        [
+            "source",
+            "records",
+            "fetch_s",
+            "records_per_s",
+            "requests",
+            "errors",
+            "throttled",
+            "served",
+        ],
+    )
+    print(
+        f"\ntotal: {total_records:,} records in {seconds:.1f}s "
+        f"({total_records / seconds:,.0f} records/s end to end)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Compares Cámara page parsing: BeautifulSoup + read_html vs. extract_page.
+
+python -m benchmarks.bench_html_extract --pages 12 --rows 400
+
+The pages are saved once under --work-dir (see benchmarks.synthetic_camara)
+and every parser runs over the same files. "legacy" is the path the scraper
+used before: BeautifulSoup (html.parser) for the form state, then
+`pd.read_html` on the serialized first table; for gastos deltas, a regex for
+the table. It needs bs4, and lxml or html5lib for read_html. `same_csv`
+checks that every parser produces the CSVs of the first one.
+"""
+
+import argparse
+import io
+import os
+import re
+import time
+from glob import glob
+
+import pandas as pd
+
+from benchmarks.common import append_results, environment_info, print_table
+from benchmarks.synthetic_camara import write_fixtures
+from etl.html_extract import DELTA_HIDDEN_FIELD, extract_page
+
+_FORM_FIELDS = ("__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION")
+
+
+def legacy_staff(text):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(text, "html.parser")
+    state = {}
+    for hidden in _FORM_FIELDS:
+        el = soup.find("input", {"id": hidden})
+        if el:
+            state[hidden] = el.get("value", "")
+    selects = [s.get("name") for s in soup.find_all("select")]
+    tables = soup.find_all("table")
+    df = pd.read_html(io.StringIO(str(tables[0])))[0]
+    df.columns = [str(c).strip().replace("\n", " ") for c in df.columns]
+    return state, selects, df
+
+
+def legacy_gastos(text):
+    state = dict(DELTA_HIDDEN_FIELD.findall(text))
+    match = re.search(r"<table.*?>.*?</table>", text, re.IGNORECASE | re.DOTALL)
+    df = pd.read_html(io.StringIO(match.group(0)), thousands=".", decimal=",")[0]
+    df.columns = [str(c).strip().replace("\n", " ") for c in df.columns]
+    return state, [], df
+
+
+def extract_staff(text):
+    page = extract_page(text)
+    return page.hidden, page.selects, page.table()
+
+
+def extract_gastos(text):
+    page = extract_page(text)
+    return page.hidden, page.selects, page.table(thousands=".", decimal=",")
+
+
+def parsers():
+    runs = []
+    try:
+        import bs4  # noqa: F401
+
+        runs.append(("legacy", legacy_staff, legacy_gastos))
+    except ImportError:
+        print("bs4 is not installed: skipping the legacy parser")
+    runs.append(("extract", extract_staff, extract_gastos))
+    return runs
+
+
+def as_csv(df):
+    """CSV text as the scraper writes it, header whitespace collapsed."""
+    df = df.copy()
+    df.columns = [" ".join(str(c).split()) for c in df.columns]
+    return df.to_csv(index=False)
+
+
+def time_parser(pages, staff, gastos, repeat):
+    best = None
+    frames = []
+    for _ in range(repeat):
+        frames = []
+        start = time.perf_counter()
+        for path, text in pages:
+            parse = staff if os.path.basename(path).startswith("staff") else gastos
+            frames.append(parse(text)[2])
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Cámara page parsing")
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--work-dir", default=".bench")
+    parser.add_argument("--json", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    pages_dir = os.path.join(
+        args.work_dir, f"camara_pages_{args.pages}_{args.rows}_seed{args.seed}"
+    )
+    if not os.path.exists(pages_dir):
+        write_fixtures(pages_dir, args.pages, args.rows, args.seed)
+    pages = []
+    for path in sorted(glob(os.path.join(pages_dir, "*"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((path, f.read()))
+    total_mb = sum(len(text.encode("utf-8")) for _, text in pages) / 1024**2
+
+    env = environment_info()
+    rows = []
+    reference = None
+    for name, staff, gastos in parsers():
+        seconds, frames = time_parser(pages, staff, gastos, args.repeat)
+        if reference is None:
+            reference = frames
+        same = all(as_csv(a) == as_csv(b) for a, b in zip(frames, reference))
+        result = {
+            "parser": name,
+            "pages": len(pages),
+            "seconds": round(seconds, 3),
+            "pages_per_s": round(len(pages) / seconds, 1),
+            "mb_per_s": round(total_mb / seconds, 1),
+            "same_csv": same,
+        }
+        rows.append(result)
+        append_results(args.json, {"benchmark": "html_extract", **result, **env})
+
+    print(
+        f"\ncámara html benchmark  pages={len(pages)} ({total_mb:.1f}MB) rows={args.rows} commit={env['commit']}"
+    )
+    print_table(
+        rows, ["parser", "pages", "seconds", "pages_per_s", "mb_per_s", "same_csv"]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Throughput benchmark for the CPLT CSV -> Parquet ingest.
+
+Generates (or reuses) a synthetic dataset and converts it once per compression
+setting, each in a fresh process, reporting rows/s, MB/s, peak RSS and output size.
+
+    python -m benchmarks.bench_ingest --size 1GB --compression zstd snappy
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import pyarrow.parquet as pq
+
+from benchmarks.common import (
+    append_results,
+    environment_info,
+    format_size,
+    parse_size,
+    print_table,
+    run_isolated,
+)
+from benchmarks.synthetic_cplt import generate_dataset
+
+
+def _convert(csv_path, parquet_dir, compression):
+    # Imported here so interpreter and DuckDB start-up stay out of the timing
+    from etl.ingest import process_csv_to_parquet
+
+    start = time.perf_counter()
+    path = process_csv_to_parquet(
+        csv_path, parquet_dir=parquet_dir, compression=compression
+    )
+    return path, time.perf_counter() - start
+
+
+def bench_compression(files: dict, compression: str, work_dir: str) -> dict:
+    parquet_dir = tempfile.mkdtemp(prefix=f"ingest_{compression}_", dir=work_dir)
+    try:
+        total = {
+            "rows": 0,
+            "csv_bytes": 0,
+            "parquet_bytes": 0,
+            "seconds": 0.0,
+            "peak_rss_mb": 0.0,
+        }
+        for info in files.values():
+            (parquet_path, seconds), _, peak_rss = run_isolated(
+                _convert, info["path"], parquet_dir, compression
+            )
+            if not parquet_path:
+                raise RuntimeError(f"Ingest failed for {info['path']}")
+            total["rows"] += pq.ParquetFile(parquet_path).metadata.num_rows
+            total["csv_bytes"] += info["bytes"]
+            total["parquet_bytes"] += os.path.getsize(parquet_path)
+            total["seconds"] += seconds
+            total["peak_rss_mb"] = max(total["peak_rss_mb"], peak_rss)
+        return total
+    finally:
+        shutil.rmtree(parquet_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark process_csv_to_parquet")
+    parser.add_argument(
+        "--size", default="100MB", help="Total CSV size, e.g. 100MB, 1GB, 10GB"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--compression", nargs="+", default=["zstd", "snappy", "uncompressed"]
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Keep the best of N runs")
+    parser.add_argument("--work-dir", default=".bench")
+    parser.add_argument("--json", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    files = generate_dataset(os.path.join(args.work_dir, "cplt"), size, seed=args.seed)
+    env = environment_info()
+
+    rows = []
+    for compression in args.compression:
+        runs = [
+            bench_compression(files, compression, args.work_dir)
+            for _ in range(args.repeat)
+        ]
+        best = min(runs, key=lambda r: r["seconds"])
+        result = {
+            "compression": compression,
+            "rows": best["rows"],
+            "seconds": round(best["seconds"], 2),
+            "rows_per_s": round(best["rows"] / best["seconds"]),
+            "mb_per_s": round(best["csv_bytes"] / 1024**2 / best["seconds"], 1),
+            "peak_rss_mb": round(best["peak_rss_mb"], 1),
+            "output": format_size(best["parquet_bytes"]),
+            "ratio": round(best["csv_bytes"] / best["parquet_bytes"], 1),
+        }
+        rows.append(result)
+        append_results(
+            args.json,
+            {
+                "benchmark": "ingest",
+                "size": args.size,
+                "seed": args.seed,
+                "parquet_bytes": best["parquet_bytes"],
+                **result,
+                **env,
+            },
+        )
+
+    print(
+        f"\ningest benchmark  size={args.size} seed={args.seed} commit={env['commit']}"
+    )
+    print_table(
+        rows,
+        [
+            "compression",
+            "rows",
+            "seconds",
+            "rows_per_s",
+            "mb_per_s",
+            "peak_rss_mb",
+            "output",
+            "ratio",
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
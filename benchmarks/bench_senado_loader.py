@@ -0,0 +1,144 @@
+"""Compares the Senado raw month loaders and cache formats on a synthetic cache.
+
+python -m benchmarks.bench_senado_loader --records 300000 --formats json ndjson parquet
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from glob import glob
+
+from benchmarks.common import (
+    append_results,
+    environment_info,
+    format_size,
+    print_table,
+    run_isolated,
+)
+from benchmarks.synthetic_senado import write_json_cache
+
+ENDPOINT = "dotacion_contrata"
+CACHE_FORMATS = ["json", "ndjson", "parquet"]
+
+
+def legacy_load(cache_dir):
+    """The previous DataProcessor._load_json_files + pd.DataFrame path."""
+    import pandas as pd
+
+    start = time.perf_counter()
+    all_data = []
+    for file_path in glob(os.path.join(cache_dir, ENDPOINT, "*", "*.json")):
+        with open(file_path, "r", encoding="utf-8") as f:
+            content = json.load(f)
+        for item in content["data"]["data"]:
+            all_data.append(item.get("attributes", item))
+    df = pd.DataFrame(all_data)
+    return len(df), time.perf_counter() - start
+
+
+def arrow_load(cache_dir):
+    from etl.raw_loader import load_endpoint
+
+    start = time.perf_counter()
+    df = load_endpoint(cache_dir, ENDPOINT).to_pandas()
+    return len(df), time.perf_counter() - start
+
+
+def cache_size(cache_dir):
+    return sum(
+        os.path.getsize(p)
+        for p in glob(os.path.join(cache_dir, "**", "*.*"), recursive=True)
+    )
+
+
+def build_format_cache(json_dir, out_dir, cache_format):
+    """Copies the JSON cache and migrates it to `cache_format`."""
+    from core.raw_cache import RawMonthCache
+
+    if not os.path.exists(out_dir):
+        shutil.copytree(json_dir, out_dir)
+        start = time.perf_counter()
+        RawMonthCache(out_dir, cache_format).migrate()
+        print(f"migrated to {cache_format} in {time.perf_counter() - start:.1f}s")
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Senado raw month loading")
+    parser.add_argument("--records", type=int, default=300_000)
+    parser.add_argument("--months", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        default=CACHE_FORMATS,
+        choices=CACHE_FORMATS,
+        help="Raw cache formats loaded with the Arrow loader",
+    )
+    parser.add_argument("--work-dir", default=".bench")
+    parser.add_argument("--json", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    cache_dir = os.path.join(
+        args.work_dir, f"senado_{args.records}_{args.months}_seed{args.seed}"
+    )
+    if not os.path.exists(cache_dir):
+        months = [(2022 + m // 12, m % 12 + 1) for m in range(args.months)]
+        try:
+            write_json_cache(
+                cache_dir, ENDPOINT, months, args.records // args.months, seed=args.seed
+            )
+        except BaseException:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            raise
+
+    runs = [("legacy_json", "json", legacy_load, cache_dir)]
+    for cache_format in args.formats:
+        run_dir = cache_dir
+        if cache_format != "json":
+            run_dir = build_format_cache(
+                cache_dir, f"{cache_dir}_{cache_format}", cache_format
+            )
+        runs.append(("arrow_parallel", cache_format, arrow_load, run_dir))
+
+    env = environment_info()
+    rows = []
+    for loader_name, cache_format, loader, run_dir in runs:
+        (records, seconds), _, peak_rss = run_isolated(loader, run_dir)
+        cache_bytes = cache_size(run_dir)
+        result = {
+            "loader": loader_name,
+            "cache_format": cache_format,
+            "cache_size": format_size(cache_bytes),
+            "records": records,
+            "seconds": round(seconds, 2),
+            "records_per_s": round(records / seconds),
+            "peak_rss_mb": round(peak_rss, 1),
+        }
+        rows.append(result)
+        append_results(
+            args.json,
+            {"benchmark": "senado_loader", "cache_bytes": cache_bytes, **result, **env},
+        )
+
+    print(
+        f"\nsenado loader benchmark  records={args.records} months={args.months} commit={env['commit']}"
+    )
+    print_table(
+        rows,
+        [
+            "loader",
+            "cache_format",
+            "cache_size",
+            "records",
+            "seconds",
+            "records_per_s",
+            "peak_rss_mb",
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import re
+import subprocess
+import sys
+import time
+
+_SIZE_UNITS = {
+    "": 1,
+    "B": 1,
+    "K": 1024,
+    "KB": 1024,
+    "M": 1024**2,
+    "MB": 1024**2,
+    "G": 1024**3,
+    "GB": 1024**3,
+}
+
+
+def parse_size(text: str) -> int:
+    """Parses human sizes like '100MB' or '1.5GB' into bytes."""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?B?)\s*", text.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def format_size(num_bytes: int) -> str:
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.2f}GB"
+
+
+def git_revision() -> str:
+    """Returns the current commit (with a '-dirty' suffix) to tag results."""
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        return f"{rev}-dirty" if dirty else rev
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment_info() -> dict:
+    """Context needed to compare benchmark runs across commits and machines."""
+    info = {
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import duckdb
+
+        info["duckdb"] = duckdb.__version__
+    except ImportError:
+        pass
+    try:
+        import pyarrow
+
+        info["pyarrow"] = pyarrow.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _isolated_worker(queue, func, args, kwargs):
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+        error = None
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    queue.put((result, error, time.perf_counter() - start, _peak_rss_mb()))
+
+
+def run_isolated(func, *args, **kwargs):
+    """Runs func in a fresh process so that peak RSS belongs to that run only.
+
+    Returns (result, seconds, peak_rss_mb). func and its result must be picklable.
+    Raises RuntimeError if the process dies without a result (e.g. killed by
+    the OOM killer).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_isolated_worker, args=(results, func, args, kwargs))
+    proc.start()
+    while True:
+        try:
+            result, error, seconds, peak_rss = results.get(timeout=1)
+            break
+        except queue.Empty:
+            if proc.is_alive():
+                continue
+            # It may have put its result just before exiting
+            try:
+                result, error, seconds, peak_rss = results.get(timeout=1)
+                break
+            except queue.Empty:
+                raise RuntimeError(
+                    f"{getattr(func, '__name__', func)} exited with code "
+                    f"{proc.exitcode} without a result"
+                ) from None
+    proc.join()
+    if error:
+        raise RuntimeError(error)
+    return result, seconds, peak_rss
+
+
+def print_table(rows: list, columns: list):
+    """Prints a list of dicts as a fixed-width text table."""
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
+
+
+def append_results(path: str, record: dict):
+    """Appends one JSON line per run, so results accumulate across commits."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
@@ -0,0 +1,442 @@
+"""Local stand-ins for the CPLT, Senado and Cámara servers.
+
+Each server replays fixtures instead of hitting a government site, so the
+scrapers and the sync can be benchmarked (and tried) offline:
+
+- `CPLTHandler` serves CSV files from a directory with HEAD,
+  Last-Modified and single-range GETs, like the CPLT file server.
+- `SenadoHandler` answers the Strapi transparency API with pagination and
+  ETags. Records come from a recorded raw cache (`cache_dir`) or from
+  benchmarks.synthetic_senado. 429s with Retry-After are returned above
+  `rate_limit` requests/s, or at random with `throttle_rate`.
+- `CamaraHandler` answers the ASP.NET pages: staff-table postbacks, the
+  gastos UpdatePanel deltas, the deputies listing and the profiles
+  (benchmarks.synthetic_camara).
+
+Every server takes a `latency` (seconds, with +-50% jitter) and an
+`error_rate` of 500 responses. The scrapers and sync are pointed at them
+with CPLT_BASE_URL, SENADO_API_BASE_URL and CAMARA_BASE_URL.
+
+python -m benchmarks.mock_servers --cplt-dir .bench/cplt/... --latency 0.05
+"""
+
+import argparse
+import collections
+import functools
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks import synthetic_camara
+from benchmarks.synthetic_senado import make_items
+
+# API endpoint -> cache folder, as in etl.senado_scraper.CATEGORIES
+# Every page of a month asks for the same records; heavy staffing months
+# would otherwise be rebuilt once per page
+_synthetic_items = functools.lru_cache(maxsize=32)(make_items)
+
+SENADO_ENDPOINTS = {
+    "diet": "dietas",
+    "expenses/senator-Operational-expenses": "gastos_operacionales",
+    "domestic-air-tickets": "viajes_nacionales",
+    "foreign-missions": "misiones_extranjero",
+    "dotation/plant-equipment": "dotacion_planta",
+    "dotation/staffing": "dotacion_contrata",
+    "dotation/fee": "dotacion_honorarios",
+}
+
+STAFF_KINDS = {
+    "personalapoyogral.aspx": "apoyo",
+    "funcionariosplanta.aspx": "planta",
+    "funcionarios.aspx": "contrata",
+    "honorarios.aspx": "honorarios",
+}
+
+
+class MockServer:
+    """Runs a handler on 127.0.0.1 (a free port) in a background thread.
+
+    :param latency: Mean seconds added to every response.
+    :param error_rate: Fraction of requests answered with a 500.
+    :param options: Handler-specific settings, read as `server.options`.
+    """
+
+    def __init__(self, handler, latency=0.0, error_rate=0.0, seed=0, **options):
+        self.handler = handler
+        self.latency = latency
+        self.error_rate = error_rate
+        self.options = options
+        self.stats = {"requests": 0, "errors": 0, "throttled": 0, "bytes": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = collections.deque()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def random(self):
+        with self._lock:
+            return self._rng.random()
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def over_limit(self, limit):
+        """True if `limit` requests were already accepted in the last second."""
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and self._recent[0] <= now - 1:
+                self._recent.popleft()
+            if len(self._recent) >= limit:
+                return True
+            self._recent.append(now)
+            return False
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def mock(self):
+        return self.server.mock
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(
+        self, status, body, content_type="text/html; charset=utf-8", **headers
+    ):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+            self.mock.count("bytes", len(body))
+
+    def _prepare(self):
+        """Latency and injected errors. False if the request was answered."""
+        mock = self.mock
+        mock.count("requests")
+        if mock.latency:
+            time.sleep(mock.latency * (0.5 + mock.random()))
+        if mock.error_rate and mock.random() < mock.error_rate:
+            mock.count("errors")
+            self.send_body(500, "Internal Server Error", "text/plain")
+            return False
+        return True
+
+    def _read_form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        return {key: values[0] for key, values in parse_qs(body).items()}
+
+    def do_GET(self):
+        if self._prepare():
+            self.get()
+
+    def do_HEAD(self):
+        if self._prepare():
+            self.get()
+
+    def do_POST(self):
+        form = self._read_form()
+        if self._prepare():
+            self.post(form)
+
+    def get(self):
+        self.send_body(404, "Not Found", "text/plain")
+
+    def post(self, form):
+        self.send_body(405, "Method Not Allowed", "text/plain")
+
+
+class CPLTHandler(_MockHandler):
+    """Serves `<fixtures_dir>/<file name>` with HEAD and Range support.
+
+    Options: fixtures_dir (required), chunk_size.
+    """
+
+    def get(self):
+        name = os.path.basename(urlparse(self.path).path)
+        path = os.path.join(self.mock.options["fixtures_dir"], name)
+        if not name or not os.path.isfile(path):
+            return self.send_body(404, "Not Found", "text/plain")
+
+        size = os.path.getsize(path)
+        start, end, status = 0, size - 1, 200
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range") or "")
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(end, int(match.group(2))) if match.group(2) else end
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header(
+            "Last-Modified", formatdate(os.path.getmtime(path), usegmt=True)
+        )
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+
+        chunk_size = self.mock.options.get("chunk_size", 1 << 20)
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                self.mock.count("bytes", len(chunk))
+                remaining -= len(chunk)
+
+
+class SenadoHandler(_MockHandler):
+    """The Strapi transparency API: /<endpoint>?filters[ano][$eq]=...
+
+    Options: cache_dir (replay a raw cache written by the scraper),
+    records_per_month (synthetic records otherwise, default 200), seed,
+    rate_limit (requests/s before answering 429), throttle_rate (fraction
+    of random 429s), retry_after (seconds, default 1).
+    """
+
+    def _throttled(self):
+        options = self.mock.options
+        rate = options.get("throttle_rate")
+        if rate and self.mock.random() < rate:
+            return True
+        limit = options.get("rate_limit")
+        return bool(limit) and self.mock.over_limit(limit)
+
+    def _records(self, endpoint, year, month):
+        options = self.mock.options
+        folder = SENADO_ENDPOINTS.get(endpoint, endpoint.replace("/", "_"))
+        if options.get("cache_dir"):
+            from core.raw_cache import RawMonthCache, split_payload
+
+            cache = RawMonthCache(options["cache_dir"])
+            payload = cache.load(folder, year, month)
+            return [] if payload is None else split_payload(payload)[1]
+        return _synthetic_items(
+            folder,
+            year,
+            month,
+            options.get("records_per_month", 200),
+            seed=options.get("seed", 0),
+        )
+
+    def get(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        prefix = self.mock.options.get("prefix", "")
+        endpoint = url.path[len(prefix) :].strip("/")
+        try:
+            year = int(query["filters[ano][$eq]"])
+            month = int(query["filters[mes][$eq]"])
+            page = int(query.get("pagination[page]", 1))
+            page_size = int(query.get("pagination[pageSize]", 25))
+        except (KeyError, ValueError):
+            return self.send_body(400, "Bad Request", "text/plain")
+
+        if self._throttled():
+            self.mock.count("throttled")
+            return self.send_body(
+                429,
+                json.dumps({"error": "Too Many Requests"}),
+                "application/json",
+                Retry_After=str(self.mock.options.get("retry_after", 1)),
+            )
+
+        items = self._records(endpoint, year, month)
+        chunk = items[(page - 1) * page_size : page * page_size]
+        body = json.dumps(
+            {
+                "data": {
+                    "data": chunk,
+                    "meta": {
+                        "pagination": {
+                            "page": page,
+                            "pageSize": page_size,
+                            "pageCount": max(1, -(-len(items) // page_size)),
+                            "total": len(items),
+                        }
+                    },
+                }
+            },
+            ensure_ascii=False,
+        )
+        etag = f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_body(200, body, "application/json", ETag=etag)
+
+
+class CamaraHandler(_MockHandler):
+    """The Cámara pages the scraper requests.
+
+    Options: deputies (how many, default 20), staff_rows (default 150),
+    seed.
+    """
+
+    def _pids(self):
+        return list(range(1001, 1001 + self.mock.options.get("deputies", 20)))
+
+    def _seed(self):
+        return self.mock.options.get("seed", 0)
+
+    def get(self):
+        url = urlparse(self.path)
+        name = os.path.basename(url.path).lower()
+        query = {k.lower(): v[0] for k, v in parse_qs(url.query).items()}
+        today = time.localtime()
+        if name == "diputados.aspx":
+            body = synthetic_camara.deputies_listing(self._pids(), self._seed())
+        elif name == "mociones.aspx":
+            body = synthetic_camara.profile_page(query.get("prmid"), self._seed())
+        elif name == "gastosoperacionales.aspx":
+            body = synthetic_camara.gastos_form(
+                self._pids(), today.tm_year, today.tm_mon, self._seed()
+            )
+        elif name in STAFF_KINDS:
+            body = synthetic_camara.staff_page(
+                today.tm_year, today.tm_mon, 0, self._seed(), kind=STAFF_KINDS[name]
+            )
+        else:
+            return super().get()
+        self.send_body(200, body)
+
+    def post(self, form):
+        name = os.path.basename(urlparse(self.path).path).lower()
+
+        def field(suffix):
+            return next(
+                (value for key, value in form.items() if key.endswith(suffix)), None
+            )
+
+        try:
+            year, month = int(field("ddlAno")), int(field("ddlMes"))
+        except (TypeError, ValueError):
+            return self.send_body(400, "Bad Request", "text/plain")
+        if name == "gastosoperacionales.aspx":
+            body = synthetic_camara.gastos_delta(
+                year, month, field("ddlDiputados"), seed=self._seed()
+            )
+            return self.send_body(200, body, "text/plain; charset=utf-8")
+        if name in STAFF_KINDS:
+            body = synthetic_camara.staff_page(
+                year,
+                month,
+                self.mock.options.get("staff_rows", 150),
+                self._seed(),
+                kind=STAFF_KINDS[name],
+            )
+            return self.send_body(200, body)
+        return super().post(form)
+
+
+def env_overrides(cplt=None, senado=None, camara=None):
+    """Environment variables that point the sync and scrapers at the mocks."""
+    env = {}
+    if cplt is not None:
+        env["CPLT_BASE_URL"] = cplt.url
+    if senado is not None:
+        env["SENADO_API_BASE_URL"] = senado.url + senado.options.get("prefix", "")
+    if camara is not None:
+        env["CAMARA_BASE_URL"] = camara.url
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the mock servers")
+    parser.add_argument("--cplt-dir", help="Directory of TA_*.csv files to serve")
+    parser.add_argument("--senado-cache", help="Raw Senado cache to replay")
+    parser.add_argument("--senado-records", type=int, default=200)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--deputies", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    common = {"latency": args.latency, "error_rate": args.error_rate}
+    servers = {
+        "senado": MockServer(
+            SenadoHandler,
+            cache_dir=args.senado_cache,
+            records_per_month=args.senado_records,
+            rate_limit=args.rate_limit,
+            **common,
+        ).start(),
+        "camara": MockServer(CamaraHandler, deputies=args.deputies, **common).start(),
+    }
+    if args.cplt_dir:
+        servers["cplt"] = MockServer(
+            CPLTHandler, fixtures_dir=args.cplt_dir, **common
+        ).start()
+    for name, value in env_overrides(**servers).items():
+        print(f"export {name}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers.values():
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
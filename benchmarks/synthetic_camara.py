@@ -0,0 +1,231 @@
+"""Deterministic Cámara pages shaped like the ASP.NET transparency forms.
+
+`staff_page` is a full page as returned by a postback of the personal de
+apoyo / planta / contrata / honorarios forms; `gastos_delta` is the partial
+UpdatePanel response of the gastos operacionales page. Both carry a
+__VIEWSTATE of realistic size, which is most of the bytes to parse.
+`deputies_listing`, `profile_page` and `gastos_form` complete what the
+scraper requests (see benchmarks.mock_servers).
+"""
+
+import argparse
+import base64
+import html
+import os
+import random
+
+from benchmarks.synthetic_cplt import APELLIDOS, NOMBRES
+
+_PREFIX = "ctl00$ctl00$ctl00$ContentPlaceHolder1$ContentPlaceHolder1$"
+_MESES = [
+    "Enero",
+    "Febrero",
+    "Marzo",
+    "Abril",
+    "Mayo",
+    "Junio",
+    "Julio",
+    "Agosto",
+    "Septiembre",
+    "Octubre",
+    "Noviembre",
+    "Diciembre",
+]
+CARGOS = ["Asesor", "Secretaria", "Periodista", "Conductor", "Analista"]
+CONCEPTOS = [
+    "TRASLACIÓN",
+    "ARRIENDO DE OFICINA",
+    "TELEFONÍA",
+    "DIFUSIÓN",
+    "CONSUMOS BÁSICOS",
+    "MATERIALES DE OFICINA",
+]
+
+
+def _money(value):
+    # Chilean format: '.' for thousands
+    return f"{value:,}".replace(",", ".")
+
+
+def _viewstate(rng, size):
+    return base64.b64encode(rng.randbytes(size * 3 // 4)).decode()
+
+
+def _select(name, options, selected):
+    items = "".join(
+        f'<option value="{value}"{" selected" if value == selected else ""}>{label}</option>'
+        for value, label in options
+    )
+    return f'<select name="{name}" id="{name.replace("$", "_")}">{items}</select>'
+
+
+def _name(rng):
+    return f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+
+
+def _page(rng, content, viewstate_bytes):
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Transparencia</title>"
+        "</head><body><div id='menu'>"
+        + "".join(f"<a href='/p/{i}'>Sección {i}</a>" for i in range(80))
+        + "</div><form method='post' id='aspnetForm'>"
+        f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{_viewstate(rng, viewstate_bytes)}" />'
+        '<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="1A2B3C4D" />'
+        f'<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{_viewstate(rng, 2_000)}" />'
+        + content
+        + "</form><footer>Cámara de Diputadas y Diputados</footer></body></html>"
+    )
+
+
+def _date_selects(year, month, prefix=_PREFIX):
+    years = [(str(y), str(y)) for y in range(year - 4, year + 1)]
+    months = [(str(m), _MESES[m - 1]) for m in range(1, 13)]
+    return _select(f"{prefix}ddlAno", years, str(year)) + _select(
+        f"{prefix}ddlMes", months, str(month)
+    )
+
+
+def staff_page(year, month, rows, seed=0, viewstate_bytes=60_000, kind="planta"):
+    """A full postback page whose first table has `rows` staff rows.
+
+    :param kind: "apoyo" for the personal de apoyo layout (one row per
+        adviser, with the deputy and a "Sueldo" column); anything else for
+        the planta / contrata / honorarios layout.
+    """
+    rng = random.Random(f"{seed}-staff-{kind}-{year}-{month}")
+    body = []
+    for i in range(rows):
+        if kind == "apoyo":
+            cells = [
+                _name(rng),
+                rng.choice(CARGOS),
+                f"Diputado {_name(rng)}",
+                _money(rng.randint(600_000, 4_000_000)),
+            ]
+        else:
+            cells = [
+                i + 1,
+                _name(rng),
+                rng.choice(CARGOS),
+                rng.randint(1, 20),
+                _money(rng.randint(600_000, 6_000_000)),
+                _MESES[month - 1],
+            ]
+        body.append(
+            "<tr>" + "".join(f"<td>{html.escape(str(c))}</td>" for c in cells) + "</tr>"
+        )
+    if kind == "apoyo":
+        header = "<th>Nombre</th><th>Cargo</th><th>Diputado</th><th>Sueldo</th>"
+    else:
+        header = (
+            "<th>N°</th><th>Nombre</th><th>Cargo</th><th>Grado</th>"
+            "<th>Remuneración\n                Bruta</th><th>Mes</th>"
+        )
+    table = (
+        f'<table class="tabla"><thead><tr>{header}</tr></thead><tbody>'
+        + "".join(body)
+        + "</tbody></table>"
+    )
+    return _page(rng, _date_selects(year, month) + table, viewstate_bytes)
+
+
+def gastos_form(pids, year, month, seed=0, viewstate_bytes=20_000):
+    """The gastos operacionales page as first loaded (no table yet)."""
+    rng = random.Random(f"{seed}-gastos-form")
+    deputies = _select(
+        f"{_PREFIX}ddlDiputados", [(str(pid), str(pid)) for pid in pids], None
+    )
+    return _page(
+        rng,
+        deputies + _date_selects(year, month, f"{_PREFIX}DetallePlaceHolder$"),
+        viewstate_bytes,
+    )
+
+
+def deputies_listing(pids, seed=0):
+    """The deputies listing, with the profile links the scraper reads."""
+    links = "".join(
+        f'<li><a href="detalle/mociones.aspx?prmID={pid}">{html.escape(profile_name(pid, seed))}</a></li>'
+        for pid in pids
+    )
+    return f"<html><body><ul class='grid'>{links}</ul></body></html>"
+
+
+def profile_name(pid, seed=0):
+    return _name(random.Random(f"{seed}-deputy-{pid}"))
+
+
+def profile_page(pid, seed=0):
+    return (
+        "<html><body><section class='perfil'>"
+        f"<h2>Diputado {html.escape(profile_name(pid, seed))}</h2>"
+        "</section></body></html>"
+    )
+
+
+def _delta(kind, id_, content):
+    return f"{len(content)}|{kind}|{id_}|{content}|"
+
+
+def gastos_delta(year, month, pid, rows=None, seed=0, viewstate_bytes=20_000):
+    """An UpdatePanel delta response with a deputy's monthly expense table."""
+    rng = random.Random(f"{seed}-gastos-{year}-{month}-{pid}")
+    if rows is None:
+        rows = rng.randint(0, len(CONCEPTOS))
+    if rows:
+        body = "".join(
+            f"<tr><td>{CONCEPTOS[i % len(CONCEPTOS)]}</td>"
+            f"<td>{_money(rng.randint(5_000, 3_000_000))}</td></tr>"
+            for i in range(rows)
+        )
+        table = (
+            '<table class="tabla"><tr><th>Concepto</th><th>Monto</th></tr>'
+            f"{body}</table>"
+        )
+    else:
+        table = "<p>No hay gastos para el período seleccionado.</p>"
+    panel = f"<div class='detalle'><h3>{_MESES[month - 1]} {year}</h3>{table}</div>"
+    return (
+        "1|#||4|"
+        + _delta("updatePanel", f"{_PREFIX}DetallePlaceHolder_UpdatePanel1", panel)
+        + _delta("hiddenField", "__EVENTTARGET", "")
+        + _delta("hiddenField", "__VIEWSTATE", _viewstate(rng, viewstate_bytes))
+        + _delta("hiddenField", "__EVENTVALIDATION", _viewstate(rng, 1_000))
+        + _delta("asyncPostBackControlIDs", "", "")
+        + _delta("pageTitle", "", "Gastos operacionales")
+    )
+
+
+def write_fixtures(out_dir, pages=12, staff_rows=400, seed=0):
+    """Saves `pages` staff pages and as many gastos deltas. Returns the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(pages):
+        month = i % 12 + 1
+        for name, text in (
+            (
+                f"staff_{month:02d}.html",
+                staff_page(2024, month, staff_rows, seed),
+            ),
+            (f"gastos_{month:02d}.txt", gastos_delta(2024, month, 1000 + i, 6, seed)),
+        ):
+            path = os.path.join(out_dir, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Cámara pages")
+    parser.add_argument("--out", default=".bench/camara_pages")
+    parser.add_argument("--pages", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths = write_fixtures(args.out, args.pages, args.rows, args.seed)
+    print(f"{len(paths)} pages written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""Deterministic generator of CPLT-shaped Transparencia Activa CSVs.
+
+The files mimic the raw downloads handled by `src/etl/ingest.py`: latin-1
+encoding, ';' delimiter, Chilean money strings ('$ 1.234.567') and accented
+names, with the column variants listed in `CONCEPT_MAPPING`.
+"""
+
+import argparse
+import os
+import random
+
+from benchmarks.common import format_size, parse_size
+
+# Bump when the output changes, so cached datasets are regenerated
+GENERATOR_VERSION = 1
+
+MONTHS = [
+    "Enero",
+    "Febrero",
+    "Marzo",
+    "Abril",
+    "Mayo",
+    "Junio",
+    "Julio",
+    "Agosto",
+    "Septiembre",
+    "Octubre",
+    "Noviembre",
+    "Diciembre",
+]
+
+ORGANISMOS = [
+    "Servicio de Salud Metropolitano Sur Oriente",
+    "Municipalidad de Ñuñoa",
+    "Municipalidad de Concepción",
+    "Municipalidad de Peñalolén",
+    "Ministerio de Educación",
+    "Subsecretaría de Salud Pública",
+    "Servicio Nacional de Aduanas",
+    "Instituto de Previsión Social",
+    "Dirección de Presupuestos",
+    "Gobierno Regional de Valparaíso",
+    "Servicio de Impuestos Internos",
+    "Corporación Nacional Forestal",
+    "Junta Nacional de Jardines Infantiles",
+    "Universidad de Chile",
+    "Servicio Agrícola y Ganadero",
+    "Tesorería General de la República",
+]
+
+NOMBRES = [
+    "José",
+    "María",
+    "Juan",
+    "Ana",
+    "Sofía",
+    "Matías",
+    "Martín",
+    "Benjamín",
+    "Agustín",
+    "Josefa",
+    "Catalina",
+    "Ignacio",
+    "Andrés",
+    "Valentina",
+    "Raúl",
+    "Inés",
+    "Héctor",
+    "Verónica",
+    "Ramón",
+    "Begoña",
+]
+
+APELLIDOS = [
+    "González",
+    "Muñoz",
+    "Rojas",
+    "Díaz",
+    "Pérez",
+    "Soto",
+    "Contreras",
+    "Silva",
+    "Martínez",
+    "Sepúlveda",
+    "Morales",
+    "Rodríguez",
+    "López",
+    "Fuentes",
+    "Hernández",
+    "Torres",
+    "Araya",
+    "Flores",
+    "Espinoza",
+    "Valenzuela",
+    "Castillo",
+    "Núñez",
+    "Ibáñez",
+    "Cañas",
+    "Tapia",
+    "Reyes",
+    "Gutiérrez",
+    "Castro",
+    "Vargas",
+    "Álvarez",
+]
+
+ESTAMENTOS = ["Directivo", "Profesional", "Técnico", "Administrativo", "Auxiliar"]
+CARGOS = [
+    "Jefe de Departamento",
+    "Profesional de Apoyo",
+    "Técnico en Enfermería",
+    "Administrativo Contable",
+    "Auxiliar de Servicios",
+    "Encargado de Adquisiciones",
+    "Asesor Jurídico",
+    "Médico Cirujano",
+]
+FUNCIONES = [
+    "Asesoría en gestión de proyectos",
+    "Apoyo administrativo en oficina de partes",
+    "Atención de público en programa social",
+    "Desarrollo de software y soporte informático",
+    "Capacitación a funcionarios en compras públicas",
+]
+REGIONES = [
+    "Región Metropolitana de Santiago",
+    "Región de Valparaíso",
+    "Región del Biobío",
+    "Región de la Araucanía",
+    "Región de Ñuble",
+]
+
+# Column layout per dataset, exercising the different CONCEPT_MAPPING variants
+DATASETS = {
+    "Planta": {
+        "filename": "TA_PersonalPlanta.csv",
+        "columns": [
+            "anyo",
+            "Mes",
+            "organismo_nombre",
+            "organismo_codigo",
+            "Tipo Estamento",
+            "Paterno",
+            "Materno",
+            "Nombres",
+            "Grado EUS",
+            "Tipo cargo",
+            "region",
+            "remuneracionbruta_mensual",
+            "remuliquida_mensual",
+            "Fecha de inicio",
+            "Fecha de término",
+            "Observaciones",
+        ],
+    },
+    "Contrata": {
+        "filename": "TA_PersonalContrata.csv",
+        "columns": [
+            "anyo",
+            "Mes",
+            "organismo_nombre",
+            "organismo_codigo",
+            "tipo_calificacionp",
+            "Paterno",
+            "Materno",
+            "Nombres",
+            "Grado EUS",
+            "Tipo cargo",
+            "region",
+            "remuneracionbruta_mensual",
+            "remuliquida_mensual",
+            "Fecha de inicio",
+            "Fecha de término",
+            "Observaciones",
+        ],
+    },
+    "Honorarios": {
+        "filename": "TA_PersonalContratohonorarios.csv",
+        "columns": [
+            "anyo",
+            "Mes",
+            "organismo_nombre",
+            "organismo_codigo",
+            "tipo_calificacionp",
+            "Paterno",
+            "Materno",
+            "Nombres",
+            "descripcion_funcion",
+            "region",
+            "remuneracionbruta",
+            "remuliquida_mensual",
+            "tipo_pago",
+            "Fecha de inicio",
+            "Fecha de término",
+            "Observaciones",
+        ],
+    },
+}
+
+
+def _money(value: int, rng: random.Random) -> str:
+    text = f"{value:,}".replace(",", ".")
+    # The raw files mix plain thousands-separated numbers and '$ ' prefixed ones
+    return f"$ {text}" if rng.random() < 0.5 else text
+
+
+def _row(kind: str, rng: random.Random, years: tuple) -> list:
+    anyo = rng.randint(*years)
+    mes = rng.randrange(12)
+    organismo = rng.randrange(len(ORGANISMOS))
+    bruto = int(rng.lognormvariate(14.2, 0.55))
+    liquido = int(bruto * rng.uniform(0.72, 0.85))
+    inicio = (
+        f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1995, anyo)}"
+    )
+
+    row = [
+        str(anyo),
+        MONTHS[mes],
+        ORGANISMOS[organismo],
+        f"AB{organismo:03d}",
+        rng.choice(ESTAMENTOS),
+        rng.choice(APELLIDOS),
+        rng.choice(APELLIDOS),
+        " ".join(rng.sample(NOMBRES, rng.randint(1, 2))),
+    ]
+    if kind == "Honorarios":
+        row += [
+            rng.choice(FUNCIONES),
+            rng.choice(REGIONES),
+            _money(bruto, rng),
+            _money(liquido, rng),
+            rng.choice(["Mensual", "Boleta única"]),
+        ]
+    else:
+        row += [
+            str(rng.randint(1, 25)),
+            rng.choice(CARGOS),
+            rng.choice(REGIONES),
+            _money(bruto, rng),
+            _money(liquido, rng),
+        ]
+    row += [inicio, "Indefinido" if rng.random() < 0.7 else f"31/12/{anyo}", ""]
+    return row
+
+
+def generate_csv(
+    path: str, kind: str, target_bytes: int, seed: int = 0, years=(2020, 2025)
+):
+    """Writes a CSV of about target_bytes. Same arguments always give the same file.
+
+    :return: Dict with the number of data rows and bytes written.
+    """
+    spec = DATASETS[kind]
+    rng = random.Random(f"{seed}-{kind}")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    rows = 0
+    written = 0
+    part_path = path + ".part"
+    with open(part_path, "wb") as f:
+        header = (";".join(spec["columns"]) + "\n").encode("latin-1")
+        f.write(header)
+        written += len(header)
+        while written < target_bytes:
+            # Batch rows to keep the generator from being the bottleneck
+            chunk = "".join(
+                ";".join(_row(kind, rng, years)) + "\n" for _ in range(5000)
+            )
+            data = chunk.encode("latin-1")
+            if written + len(data) > target_bytes:
+                # Trim to whole lines around the target size
+                cut = data.rfind(b"\n", 0, target_bytes - written) + 1
+                if cut == 0:
+                    break
+                data = data[:cut]
+            f.write(data)
+            written += len(data)
+            rows += data.count(b"\n")
+    os.replace(part_path, path)
+    return {"rows": rows, "bytes": written}
+
+
+def generate_dataset(
+    out_dir: str, total_bytes: int, seed: int = 0, years=(2020, 2025)
+) -> dict:
+    """Generates the Planta/Contrata/Honorarios trio splitting total_bytes among them.
+
+    Files are reused if they were already generated with the same parameters.
+    :param years: Inclusive range the rows are spread over; fewer years give
+    bigger months.
+    :return: Dict of kind -> {"path", "rows", "bytes"}.
+    """
+    # Contrata and Planta dominate the real downloads, Honorarios is smaller
+    shares = {"Planta": 0.35, "Contrata": 0.45, "Honorarios": 0.20}
+    name = f"v{GENERATOR_VERSION}_seed{seed}_{format_size(total_bytes)}"
+    if tuple(years) != (2020, 2025):
+        name += f"_{years[0]}-{years[1]}"
+    dataset_dir = os.path.join(out_dir, name)
+    files = {}
+    for kind, share in shares.items():
+        path = os.path.join(dataset_dir, DATASETS[kind]["filename"])
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                rows = sum(
+                    chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 24), b"")
+                )
+            stats = {"rows": rows - 1, "bytes": os.path.getsize(path)}
+        else:
+            stats = generate_csv(
+                path, kind, int(total_bytes * share), seed=seed, years=years
+            )
+        files[kind] = {"path": path, **stats}
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--size", default="100MB", help="Total size, e.g. 100MB, 1GB, 10GB"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default=os.path.join(".bench", "cplt"))
+    args = parser.parse_args()
+
+    files = generate_dataset(args.out_dir, parse_size(args.size), seed=args.seed)
+    for kind, info in files.items():
+        print(
+            f"{kind:<11} {info['rows']:>12,} rows  {format_size(info['bytes']):>9}  {info['path']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
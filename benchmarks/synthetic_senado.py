@@ -0,0 +1,129 @@
+"""Deterministic Senado API records shaped like the transparency endpoints."""
+
+import json
+import os
+import random
+
+from benchmarks.synthetic_cplt import APELLIDOS, NOMBRES
+
+CARGOS = [
+    "Asesor Legislativo",
+    "Secretario de Comisión",
+    "Técnico Administrativo",
+    "Periodista",
+    "Auxiliar",
+]
+CIUDADES = ["ARICA", "IQUIQUE", "ANTOFAGASTA", "CONCEPCION", "TEMUCO", "PUNTA ARENAS"]
+PAISES = ["ARGENTINA", "PERU", "ESPAÑA", "ESTADOS UNIDOS", "BELGICA"]
+MOTIVOS = [
+    "Semana distrital",
+    "Sesión de comisión",
+    "Reunión interparlamentaria",
+    "Foro internacional",
+]
+
+
+def make_items(endpoint: str, year: int, month: int, count: int, seed: int = 0) -> list:
+    """Builds `count` Strapi v4 records ({"id", "attributes"}) for one month."""
+    rng = random.Random(f"{seed}-{endpoint}-{year}-{month}")
+    items = []
+    for i in range(count):
+        attributes = {
+            "ano": year,
+            "mes": month,
+            "nombre": rng.choice(NOMBRES),
+            "appaterno": rng.choice(APELLIDOS),
+            "apmaterno": rng.choice(APELLIDOS),
+        }
+        if endpoint == "dietas":
+            dieta = 7_349_623
+            deducciones = rng.randint(900_000, 1_600_000)
+            attributes.update(
+                {
+                    "rut": f"{rng.randint(5_000_000, 20_000_000)}-{rng.randint(0, 9)}",
+                    "dieta": dieta,
+                    "deducciones": deducciones,
+                    "saldo": dieta - deducciones,
+                }
+            )
+        elif endpoint == "gastos_operacionales":
+            attributes.update(
+                {
+                    "gastos_operacionales": rng.choice(
+                        [
+                            "TELEFONIA CELULAR",
+                            "ARRIENDO OFICINA",
+                            "TRASLACION",
+                            "DIFUSION",
+                        ]
+                    ),
+                    "monto": rng.randint(10_000, 3_000_000),
+                }
+            )
+        elif endpoint == "viajes_nacionales":
+            attributes.update(
+                {
+                    "fecha_ida": f"{year}-{month:02d}-{rng.randint(1, 28):02d}",
+                    "origen": "SANTIAGO",
+                    "destino": rng.choice(CIUDADES),
+                    "motivo": rng.choice(MOTIVOS),
+                    "monto": rng.randint(40_000, 450_000),
+                }
+            )
+        elif endpoint == "misiones_extranjero":
+            pasaje = rng.randint(600_000, 4_000_000)
+            viatico = rng.randint(300_000, 2_500_000)
+            attributes.update(
+                {
+                    "fecha_ida": f"{year}-{month:02d}-{rng.randint(1, 20):02d}",
+                    "pais": rng.choice(PAISES),
+                    "motivo": rng.choice(MOTIVOS),
+                    "pasaje": pasaje,
+                    "viatico": viatico,
+                    "monto_total": pasaje + viatico,
+                }
+            )
+        else:
+            # Staffing-like records (dotation/staffing, dotation/fee)
+            attributes.update(
+                {
+                    "escalafon": rng.choice(
+                        ["Profesional", "Técnico", "Administrativo"]
+                    ),
+                    "cargo": rng.choice(CARGOS),
+                    "grado": rng.randint(5, 25),
+                    "remuneracion": rng.randint(600_000, 6_000_000),
+                    "calidad_juridica": rng.choice(
+                        ["Contrata", "Planta", "Honorarios"]
+                    ),
+                }
+            )
+        items.append({"id": i + 1, "attributes": attributes})
+    return items
+
+
+def write_json_cache(
+    cache_dir: str, endpoint: str, months: list, per_month: int, seed: int = 0
+):
+    """Writes months like SenadoScraper.fetch_category does (pretty-printed JSON)."""
+    for year, month in months:
+        items = make_items(endpoint, year, month, per_month, seed=seed)
+        dir_path = os.path.join(cache_dir, endpoint, str(year))
+        os.makedirs(dir_path, exist_ok=True)
+        payload = {
+            "data": {
+                "data": items,
+                "meta": {
+                    "pagination": {
+                        "page": 1,
+                        "pageSize": len(items),
+                        "pageCount": 1,
+                        "total": len(items),
+                    }
+                },
+            }
+        }
+        with open(
+            os.path.join(dir_path, f"{month:02d}.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
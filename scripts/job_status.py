@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Shows the progress of the scrapers from their job journal.
+
+One line per source and category with the items in each state, the mean
+seconds per item and the throughput, followed by the failed items and when
+they will be retried.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+
+# Add src to PATH
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from etl.job_journal import DEFAULT_PATH, STATES, JobJournal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--journal", default=DEFAULT_PATH)
+    parser.add_argument("--source", choices=["senado", "camara"], default=None)
+    parser.add_argument(
+        "--hours",
+        type=float,
+        default=None,
+        help="Only count items finished in the last N hours for the throughput",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.journal):
+        print(f"No job journal at {args.journal}")
+        return
+    journal = JobJournal(args.journal)
+    since = None
+    if args.hours is not None:
+        since = datetime.datetime.now().timestamp() - args.hours * 3600
+
+    print(
+        f"{'source':<8} {'category':<24} "
+        + " ".join(f"{s:>8}" for s in STATES)
+        + f" {'s/item':>8} {'items/min':>10}"
+    )
+    for row in journal.summary(args.source, since=since):
+        mean = "-" if row["mean_seconds"] is None else f"{row['mean_seconds']:.2f}"
+        rate = "-" if row["items_per_minute"] is None else row["items_per_minute"]
+        print(
+            f"{row['source']:<8} {row['category']:<24} "
+            + " ".join(f"{row[s]:>8}" for s in STATES)
+            + f" {mean:>8} {rate:>10}"
+        )
+
+    failures = journal.failures(args.source)
+    if failures:
+        print(f"\n{len(failures)} failed items:")
+    for item in failures:
+        retry = datetime.datetime.fromtimestamp(item["next_attempt_at"])
+        key = f"{item['year']}-{item['month']:02d}" + (
+            f" {item['item']}" if item["item"] else ""
+        )
+        print(
+            f"  {item['source']} {item['category']} {key}: "
+            f"{item['attempts']} attempts, retry after {retry:%Y-%m-%d %H:%M} "
+            f"({item['last_error']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,9 @@
 import sys
 import os
 
-# Ensure the root of the project is in the PYTHONPATH
+# Ensure the root of the project and src/ are in the PYTHONPATH
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
 import logging
 from src.etl.diputados_scraper import DiputadosScraper
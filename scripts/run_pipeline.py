@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Runs the CPLT, Senado and Cámara pipelines as one stage graph.
+
+Independent sources run in parallel and stages whose inputs did not change
+since the last successful run are skipped. Timings and row counts are
+logged and written to data/pipeline_metrics.json.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add src to PATH
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from etl.pipeline import SOURCES, Pipeline, build_stages
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        choices=SOURCES,
+        default=list(SOURCES),
+        help="Sources to run (default: all)",
+    )
+    parser.add_argument("--start-year", type=int, default=2022)
+    parser.add_argument("--end-year", type=int, default=2026)
+    parser.add_argument(
+        "--no-scrape",
+        action="store_true",
+        help="Skip the download stages and only rebuild from local files",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Run every stage even if unchanged"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print the stage order and exit"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    pipeline = Pipeline(
+        build_stages(
+            sources=args.sources,
+            start_year=args.start_year,
+            end_year=args.end_year,
+            scrape=not args.no_scrape,
+        ),
+        max_workers=args.workers,
+    )
+    if args.dry_run:
+        for name in pipeline.plan():
+            deps = ", ".join(pipeline.stages[name].deps) or "-"
+            print(f"{name:<16} after: {deps}")
+        return
+
+    results = pipeline.run(force=args.force)
+    if any(r.status in ("failed", "blocked") for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,7 @@ def main():
     scraper.run_all()
 
     # 2. Processing (Cross data in Pandas -> Generate CSV and Parquet)
-    processor = DataProcessor(cache_dir="data/raw", output_dir="data")
+    processor = DataProcessor()
     processor.process_all()
 
     # 3. Regenerate Global Metadata Cache
@@ -1,10 +1,47 @@
 import streamlit as st
 import duckdb
+import functools
 import os
+from src.audits.result_cache import AuditResultCache
+from src.core.config import MONTHS_MAP
+from src.etl.audit_tables import sketch_stats_sql
+from src.etl.parquet_writer import PERSON_NAME_SQL
 
+# Version of each audit's result in the on-disk cache (AuditResultCache).
+# Bump it when the audit's query or columns change.
+RESULT_VERSIONS = {"multiempleo": 1, "ranking": 1, "apellidos": 1, "atipicos": 1}
 
-def generate_unified_sql(valid_paths):
-    """Generates a UNION ALL query for all available files."""
+_CSV_OPTIONS = "delim=';', encoding='latin-1', ignore_errors=true, null_padding=true"
+_NUMERIC_TYPES = ("INTEGER", "BIGINT", "UBIGINT", "HUGEINT", "DOUBLE", "FLOAT")
+
+
+def _reader(path):
+    """read_parquet for the app's files, read_csv for raw CPLT downloads."""
+    if path.endswith(".parquet"):
+        return "read_parquet(?)"
+    return f"read_csv(?, {_CSV_OPTIONS})"
+
+
+@functools.lru_cache(maxsize=64)
+def _file_columns(path, size, mtime_ns):
+    """{column: type} of a file, read from its header.
+
+    Keyed by size and mtime as well, so a rewritten file is probed again.
+    """
+    described = duckdb.execute(
+        f"DESCRIBE SELECT * FROM {_reader(path)}", [path]
+    ).fetchall()
+    return {row[0]: row[1] for row in described}
+
+
+def generate_unified_sql(valid_paths, year=None, month=None):
+    """Generates a UNION ALL query for all available files.
+
+    Every row carries persona_id, the 64-bit normalized name hash written at
+    ingest (computed here for files written before it existed), and sueldo as
+    a BIGINT. With year (and optionally month) each file is filtered on its
+    own, so DuckDB only reads the row groups of that period.
+    """
     subqueries = []
     params = []
 
@@ -31,33 +68,62 @@ def generate_unified_sql(valid_paths):
             "Calificacion Profesional",
         ],
         "cargo": ["Tipo cargo", "descripcion_funcion", "Cargo", "Funcion"],
+        "periodo": ["periodo"],
+        "persona_id": ["persona_id"],
     }
 
     for source_name, path in valid_paths:
-        # Detect real columns in the file
+        reader = _reader(path)
+        # Detect real columns (and their types) reading only the schema
         try:
-            # Read only the header (limit 0) to check columns
-            schema_query = "SELECT * FROM read_csv(?, delim=';', encoding='latin-1', ignore_errors=true) LIMIT 0"
-            df_schema = duckdb.query(schema_query, params=[path]).to_df()
-            real_cols = set(df_schema.columns)
+            stat = os.stat(path)
+            real_cols = _file_columns(path, stat.st_size, stat.st_mtime_ns)
         except Exception:
             continue
 
         selects = [f"'{source_name}' AS Origen"]
-
+        found = {}
         for alias, options in column_mapping.items():
-            found_col = "NULL"
-            for op in options:
-                if op in real_cols:
-                    found_col = f'"{op}"'
-                    break
-            selects.append(f"{found_col} AS {alias}")
-
-        # Build the subquery for this file
-        subqueries.append(
-            f"SELECT {', '.join(selects)} FROM read_csv(?, delim=';', encoding='latin-1', ignore_errors=true, null_padding=true)"
-        )
+            found_col = next((op for op in options if op in real_cols), None)
+            found[alias] = found_col
+            if alias == "sueldo" and found_col:
+                if real_cols[found_col].startswith(_NUMERIC_TYPES):
+                    expr = f'CAST("{found_col}" AS BIGINT)'
+                else:
+                    # Chilean amounts in text: '1.234.567' -> 1234567
+                    expr = (
+                        "TRY_CAST(regexp_replace(replace("
+                        f"CAST(\"{found_col}\" AS VARCHAR), '.', ''), '[^0-9]', '', 'g') AS BIGINT)"
+                    )
+            else:
+                expr = f'"{found_col}"' if found_col else "NULL"
+            selects.append(f"{expr} AS {alias}")
+
+        subquery = f"SELECT {', '.join(selects)} FROM {reader}"
         params.append(path)
+        if not found["persona_id"]:
+            # Files ingested before persona_id existed: hash the mapped names
+            subquery = (
+                "SELECT * REPLACE "
+                f"(md5_number_lower({PERSON_NAME_SQL}) AS persona_id) FROM ({subquery})"
+            )
+        if year is not None:
+            # DuckDB pushes the filter into the scan, so only the row groups
+            # of the period are read
+            subquery = f"SELECT * FROM ({subquery})"
+            if found["periodo"] and month is None:
+                subquery += " WHERE periodo BETWEEN ? AND ?"
+                params.extend([year * 100 + 1, year * 100 + 12])
+            elif found["periodo"]:
+                subquery += " WHERE periodo = ?"
+                params.append(year * 100 + MONTHS_MAP[month])
+            elif month is None:
+                subquery += " WHERE TRY_CAST(anyo AS INTEGER) = ?"
+                params.append(year)
+            else:
+                subquery += " WHERE TRY_CAST(anyo AS INTEGER) = ? AND Mes = ?"
+                params.extend([year, month])
+        subqueries.append(subquery)
 
     if not subqueries:
         return "", []
@@ -65,6 +131,318 @@ def generate_unified_sql(valid_paths):
     return " UNION ALL ".join(subqueries), params
 
 
+def find_multiempleo(paths, year, month, limit=100):
+    """People paid by more than one organismo in the month, highest total first.
+
+    Groups on persona_id (a 64-bit hash) instead of the concatenated name, so
+    the aggregation keeps one integer per person; display names and the
+    organismo lists are only built for the final `limit` people.
+    :return: DataFrame with nombre_completo, anyo, Mes, num_empleos, sueldo_total,
+    lista_organismos and tipos_contrato.
+    """
+    base_sql, params = generate_unified_sql(paths, year, month)
+    if not base_sql:
+        return None
+    query = f"""
+    WITH mes AS (
+        SELECT persona_id, organismo, sueldo, Origen, Nombres, Paterno, Materno
+        FROM ({base_sql})
+        WHERE persona_id IS NOT NULL
+    ),
+    conteo AS (
+        SELECT
+            persona_id,
+            COUNT(DISTINCT organismo) as num_empleos,
+            SUM(sueldo) as sueldo_total
+        FROM mes
+        GROUP BY persona_id
+        HAVING num_empleos > 1
+        ORDER BY sueldo_total DESC
+        LIMIT ?
+    )
+    SELECT
+        any_value({PERSON_NAME_SQL}) as nombre_completo,
+        ? as anyo,
+        ? as Mes,
+        c.num_empleos,
+        c.sueldo_total,
+        LIST(DISTINCT m.organismo ORDER BY m.organismo) as lista_organismos,
+        LIST(DISTINCT m.Origen ORDER BY m.Origen) as tipos_contrato
+    FROM conteo c
+    JOIN mes m USING (persona_id)
+    GROUP BY c.persona_id, c.num_empleos, c.sueldo_total
+    ORDER BY c.sueldo_total DESC
+    """
+    return duckdb.execute(query, params + [limit, year, month]).df()
+
+
+def find_top_salaries(paths, year, month, limit=100):
+    """Highest salaries of the month across all files.
+
+    :return: DataFrame, or None without data.
+    """
+    base_sql, params = generate_unified_sql(paths, year, month)
+    if not base_sql:
+        return None
+    # Names are only concatenated for the rows kept
+    query = f"""
+    SELECT
+        organismo,
+        {PERSON_NAME_SQL} as nombre_completo,
+        sueldo as sueldo_num,
+        Origen,
+        cargo
+    FROM (
+        SELECT organismo, Nombres, Paterno, Materno, sueldo, Origen, cargo
+        FROM ({base_sql})
+        WHERE sueldo IS NOT NULL
+        ORDER BY sueldo DESC
+        LIMIT ?
+    )
+    ORDER BY sueldo_num DESC
+    """
+    return duckdb.execute(query, params + [limit]).df()
+
+
+def find_salary_outliers(
+    paths, sketch_path, year, month=None, threshold=3.5, min_people=10, limit=100
+):
+    """Salaries far above their organismo x estamento, measured with the sketches.
+
+    The median and MAD come from the precomputed quantile sketches
+    (etl.audit_tables.SalarySketches) merged over the month, or over the year
+    when month is None, so the statistics never rescan the salary rows. A row
+    is flagged when its modified z-score 0.6745 * (sueldo - mediana) / MAD
+    exceeds threshold. On flat pay scales, where most people earn the same,
+    the MAD is near 0 and a small raise would score high, so it is floored at
+    the typical spread of the period: the median MAD / mediana ratio of the
+    groups with a spread, times the group's median. Groups count as many
+    people as their busiest month (not person-months) against min_people.
+    :return: DataFrame of the `limit` highest scores, or None without data.
+    """
+    base_sql, params = generate_unified_sql(paths, year, month)
+    if not base_sql:
+        return None
+    if month is None:
+        desde, hasta = year * 100 + 1, year * 100 + 12
+    else:
+        desde = hasta = year * 100 + MONTHS_MAP[month]
+    stats_sql = sketch_stats_sql(where="WHERE periodo BETWEEN ? AND ?")
+    query = f"""
+    WITH grupos AS MATERIALIZED (
+        SELECT * FROM ({stats_sql}) WHERE personas >= ?
+    ),
+    stats AS MATERIALIZED (
+        SELECT * FROM (
+            SELECT
+                *,
+                GREATEST(
+                    mad,
+                    mediana * (SELECT median(mad / mediana) FROM grupos WHERE mad > 0)
+                ) AS escala
+            FROM grupos
+        )
+        WHERE escala > 0
+    ),
+    -- No group flags a salary below this, so most rows never reach the join
+    candidatos AS (
+        SELECT * FROM ({base_sql})
+        WHERE sueldo > (SELECT MIN(mediana + ? * escala / 0.6745) FROM stats)
+    ),
+    puntajes AS (
+        SELECT
+            b.organismo,
+            b.estamento,
+            b.Nombres,
+            b.Paterno,
+            b.Materno,
+            b.anyo,
+            b.Mes,
+            b.sueldo,
+            s.mediana,
+            s.p99,
+            0.6745 * (b.sueldo - s.mediana) / s.escala AS puntaje
+        FROM candidatos b
+        JOIN stats s
+            ON b.organismo IS NOT DISTINCT FROM s.organismo
+            AND b.estamento IS NOT DISTINCT FROM s.estamento
+    ),
+    atipicos AS (
+        SELECT * FROM puntajes
+        WHERE puntaje > ?
+        ORDER BY puntaje DESC
+        LIMIT ?
+    )
+    SELECT
+        organismo,
+        {PERSON_NAME_SQL} as nombre,
+        estamento,
+        anyo,
+        Mes,
+        sueldo,
+        CAST(mediana AS BIGINT) as mediana_estamento,
+        CAST(p99 AS BIGINT) as p99_estamento,
+        CAST(puntaje AS DECIMAL(10,1)) as puntaje_robusto
+    FROM atipicos
+    ORDER BY puntaje DESC
+    """
+    return duckdb.execute(
+        query,
+        [sketch_path, desde, hasta, min_people]
+        + params
+        + [threshold, threshold, limit],
+    ).df()
+
+
+def find_surname_clusters(freq_path, year, month, min_repeats=5, limit=100):
+    """Organismos where surnames are over-represented against the national baseline.
+
+    Reads only the precomputed counts of the period (etl.audit_tables.
+    SurnameFrequencies). A surname (or paterno+materno pair) held by k of the
+    organismo's N people is expected E = N * share of the country times; its
+    score is the log-likelihood ratio G = 2 * (k ln(k/E) + (N-k) ln((N-k)/(N-E))),
+    which is large for repeats that are unlikely by chance, so surnames that
+    are common everywhere rank low without an exclusion list.
+    :return: (organismos, apellidos) DataFrames, ranked by score.
+    """
+    periodo = year * 100 + MONTHS_MAP[month]
+    conn = duckdb.connect()
+    try:
+        conn.execute(
+            """
+            CREATE TEMP TABLE puntajes AS
+            WITH f AS (SELECT * FROM read_parquet(?) WHERE periodo = ?),
+            nacional AS (
+                SELECT tipo, apellido, n AS en_pais FROM f
+                WHERE organismo IS NULL AND tipo <> 'total'
+            ),
+            poblacion AS (
+                SELECT n FROM f WHERE organismo IS NULL AND tipo = 'total'
+            ),
+            plantas AS (
+                SELECT organismo, n AS personas FROM f
+                WHERE organismo IS NOT NULL AND tipo = 'total'
+            ),
+            observados AS (
+                SELECT
+                    o.organismo,
+                    o.tipo,
+                    o.apellido,
+                    o.n AS k,
+                    p.personas,
+                    p.personas * nac.en_pais / (SELECT n FROM poblacion) AS esperado
+                FROM f o
+                JOIN nacional nac USING (tipo, apellido)
+                JOIN plantas p USING (organismo)
+                WHERE o.organismo IS NOT NULL AND o.tipo <> 'total' AND o.n >= ?
+            )
+            SELECT
+                *,
+                k / esperado AS veces,
+                2 * (
+                    k * ln(k / esperado)
+                    + CASE
+                        WHEN personas > k
+                        THEN (personas - k) * ln((personas - k) / (personas - esperado))
+                        ELSE 0
+                    END
+                ) AS puntaje
+            FROM observados
+            WHERE k > esperado
+            """,
+            [freq_path, periodo, min_repeats],
+        )
+        organismos = conn.execute(
+            """
+            SELECT
+                organismo,
+                any_value(personas) AS personas,
+                COUNT(*) AS apellidos_repetidos,
+                CAST(SUM(puntaje) AS DECIMAL(12,1)) AS puntaje_total,
+                list(apellido ORDER BY puntaje DESC)[1:5] AS principales
+            FROM puntajes
+            GROUP BY organismo
+            ORDER BY SUM(puntaje) DESC
+            LIMIT ?
+            """,
+            [limit],
+        ).df()
+        apellidos = conn.execute(
+            """
+            SELECT
+                organismo,
+                tipo,
+                apellido,
+                k AS cantidad_personas,
+                personas AS personas_organismo,
+                CAST(esperado AS DECIMAL(10,2)) AS esperado,
+                CAST(veces AS DECIMAL(10,1)) AS veces_esperado,
+                CAST(puntaje AS DECIMAL(10,1)) AS puntaje
+            FROM puntajes
+            ORDER BY puntaje DESC
+            LIMIT ?
+            """,
+            [limit],
+        ).df()
+        return organismos, apellidos
+    finally:
+        conn.close()
+
+
+def load_multiempleo_streaks(path, min_months=2, current_only=False, limit=500):
+    """Longest multiempleo streaks from the precomputed table (etl.audit_tables).
+
+    :param current_only: Keep only streaks reaching the latest month in the table.
+    """
+    where = "meses >= ?"
+    if current_only:
+        where += " AND fin = (SELECT MAX(fin) FROM read_parquet(?))"
+    params = [path, min_months] + ([path] if current_only else []) + [limit]
+    return duckdb.execute(
+        f"""
+        SELECT nombre, inicio, fin, meses, max_organismos, sueldo_total, organismos
+        FROM read_parquet(?)
+        WHERE {where}
+        ORDER BY meses DESC, sueldo_total DESC
+        LIMIT ?
+        """,
+        params,
+    ).df()
+
+
+def render_multiempleo_history(path):
+    st.subheader("Historial de Multiempleo")
+    st.write(
+        "Rachas de meses **consecutivos** en que una persona recibió sueldo de más de un organismo, en toda la historia disponible."
+    )
+    if not os.path.exists(path):
+        st.info(
+            "El historial se calcula en el pipeline ETL (`scripts/run_pipeline.py`)."
+        )
+        return
+
+    col1, col2 = st.columns(2)
+    min_months = col1.slider("Meses consecutivos mínimos", 1, 24, 3)
+    current_only = col2.checkbox("Solo rachas vigentes (último mes)")
+
+    df = load_multiempleo_streaks(path, min_months, current_only)
+    if df.empty:
+        st.success(":material/check_circle: Sin hallazgos.")
+        return
+
+    st.error(f":material/warning: {len(df)} rachas detectadas.")
+    for col in ["inicio", "fin"]:
+        df[col] = df[col].apply(lambda p: f"{p % 100:02d}/{p // 100}")
+    df["sueldo_total"] = df["sueldo_total"].apply(
+        lambda x: f"$ {x:,.0f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    )
+    st.dataframe(
+        df,
+        use_container_width=True,
+        column_config={"organismos": st.column_config.ListColumn("Organismos")},
+    )
+
+
 def render_audit_ui(data_dir, urls_config):
     st.header(":material/policy: Auditoría Civil de Anomalías")
     st.markdown(
@@ -89,12 +467,13 @@ def render_audit_ui(data_dir, urls_config):
             ":material/warning: Se recomienda descargar todas las bases de datos (Planta, Contrata, Honorarios) en el modo 'Explorador' para una auditoría completa."
         )
 
-    tab1, tab2, tab3, tab4 = st.tabs(
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
         [
             ":material/sync: Multiempleo",
             ":material/emoji_events: Ranking Nacional",
             ":material/family_restroom: Apellidos (Nepotismo)",
             ":material/trending_up: Sueldos Atípicos",
+            ":material/timeline: Historial Multiempleo",
         ]
     )
 
@@ -121,6 +500,17 @@ def render_audit_ui(data_dir, urls_config):
             index=0,
         )
 
+    parquet_dir = os.path.join(data_dir, "parquet")
+    sketch_path = os.path.join(parquet_dir, "sueldos_sketch.parquet")
+    freq_path = os.path.join(parquet_dir, "apellidos_frecuencia.parquet")
+    # Results are reused across sessions until one of the inputs changes
+    cache = AuditResultCache(
+        os.path.join(data_dir, "cache", "audits"),
+        [path for _, path in paths] + [sketch_path, freq_path],
+        versions=RESULT_VERSIONS,
+    )
+    period = {"year": audit_year, "month": audit_month}
+
     with tab1:
         st.subheader("Detección de Multiempleo Simultáneo")
         st.write(
@@ -129,86 +519,47 @@ def render_audit_ui(data_dir, urls_config):
 
         if st.button(":material/search: Escanear Multiempleo"):
             with st.spinner("Cruzando bases de datos..."):
-                base_sql, params = generate_unified_sql(paths)
-                if not base_sql:
-                    st.error("No hay datos.")
-                else:
-                    query = f"""
-                    WITH unificados AS ({base_sql}),
-                    limpios AS (
-                        SELECT
-                            upper(trim(COALESCE(Nombres,'')) || ' ' || trim(COALESCE(Paterno,'')) || ' ' || trim(COALESCE(Materno,''))) as nombre_completo,
-                            organismo,
-                            TRY_CAST(anyo AS INTEGER) as anyo_int,
-                            Mes,
-                            TRY_CAST(regexp_replace(replace(CAST(sueldo AS VARCHAR), '.', ''), '[^0-9]', '', 'g') AS BIGINT) as sueldo_num,
-                            Origen
-                        FROM unificados
-                    ),
-                    conteo AS (
-                        SELECT
-                            nombre_completo,
-                            anyo_int as anyo,
-                            Mes,
-                            COUNT(DISTINCT organismo) as num_empleos,
-                            SUM(sueldo_num) as sueldo_total,
-                            LIST(DISTINCT organismo) as lista_organismos,
-                            LIST(DISTINCT Origen) as tipos_contrato
-                        FROM limpios
-                        WHERE anyo_int = ? AND Mes = ?
-                        GROUP BY 1, 2, 3
-                        HAVING num_empleos > 1
+                try:
+                    df = cache.get_or_compute(
+                        "multiempleo",
+                        period,
+                        lambda: find_multiempleo(paths, audit_year, audit_month),
                     )
-                    SELECT * FROM conteo ORDER BY sueldo_total DESC LIMIT 100
-                    """
-                    try:
-                        df = duckdb.query(
-                            query, params=params + [audit_year, audit_month]
-                        ).to_df()
-                        if not df.empty:
-                            st.error(f":material/warning: {len(df)} casos detectados.")
-                            df["sueldo_total"] = df["sueldo_total"].apply(
-                                lambda x: (
-                                    f"$ {x:,.0f}".replace(",", "X")
-                                    .replace(".", ",")
-                                    .replace("X", ".")
-                                )
-                            )
-                            st.dataframe(
-                                df,
-                                use_container_width=True,
-                                column_config={
-                                    "lista_organismos": st.column_config.ListColumn(
-                                        "Organismos"
-                                    )
-                                },
+                    if df is None:
+                        st.error("No hay datos.")
+                    elif not df.empty:
+                        st.error(f":material/warning: {len(df)} casos detectados.")
+                        df["sueldo_total"] = df["sueldo_total"].apply(
+                            lambda x: (
+                                f"$ {x:,.0f}".replace(",", "X")
+                                .replace(".", ",")
+                                .replace("X", ".")
                             )
-                        else:
-                            st.success(":material/check_circle: Sin hallazgos.")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
+                        )
+                        st.dataframe(
+                            df,
+                            use_container_width=True,
+                            column_config={
+                                "lista_organismos": st.column_config.ListColumn(
+                                    "Organismos"
+                                )
+                            },
+                        )
+                    else:
+                        st.success(":material/check_circle: Sin hallazgos.")
+                except Exception as e:
+                    st.error(f"Error: {e}")
 
     with tab2:
         st.subheader("Ranking Nacional de Sueldos")
         if st.button(":material/emoji_events: Generar Ranking"):
             with st.spinner("Analizando..."):
-                base_sql, params = generate_unified_sql(paths)
-                if base_sql:
-                    query = f"""
-                    SELECT
-                        organismo,
-                        upper(trim(COALESCE(Nombres,'')) || ' ' || trim(COALESCE(Paterno,'')) || ' ' || trim(COALESCE(Materno,''))) as nombre_completo,
-                        TRY_CAST(regexp_replace(replace(CAST(sueldo AS VARCHAR), '.', ''), '[^0-9]', '', 'g') AS BIGINT) as sueldo_num,
-                        Origen,
-                        cargo
-                    FROM ({base_sql})
-                    WHERE sueldo_num IS NOT NULL AND TRY_CAST(anyo AS INTEGER) = ? AND Mes = ?
-                    ORDER BY sueldo_num DESC
-                    LIMIT 100
-                    """
-                    df = duckdb.query(
-                        query, params=params + [audit_year, audit_month]
-                    ).to_df()
+                df = cache.get_or_compute(
+                    "ranking",
+                    period,
+                    lambda: find_top_salaries(paths, audit_year, audit_month),
+                )
+                if df is not None:
                     df["sueldo_num"] = df["sueldo_num"].apply(
                         lambda x: (
                             f"$ {x:,.0f}".replace(",", "X")
@@ -221,102 +572,65 @@ def render_audit_ui(data_dir, urls_config):
     with tab3:
         st.subheader("Concentración de Apellidos (Posible Nepotismo)")
         st.markdown(
-            "Lista organismos donde se repite inusualmente un mismo apellido paterno."
+            "Ordena los organismos según cuánto se repiten sus apellidos (paterno, materno y la pareja paterno + materno) **más de lo esperable** por su frecuencia en todo el país. Los apellidos comunes pesan poco sin necesidad de excluirlos."
         )
+        min_repeats = st.slider("Mínimo de personas con mismo apellido", 2, 50, 3)
 
-        min_repeats = st.slider("Mínimo de personas con mismo apellido", 3, 50, 5)
-
-        if st.button(":material/search: Buscar Clanes"):
-            with st.spinner("Agrupando apellidos..."):
-                base_sql, params = generate_unified_sql(paths)
-                if base_sql:
-                    # Exclude common surnames in Chile to reduce noise
-                    common_surnames = "'GONZALEZ', 'MUÑOZ', 'ROJAS', 'DIAZ', 'PEREZ', 'SOTO', 'CONTRERAS', 'SILVA', 'MARTINEZ', 'SEPULVEDA'"
-
-                    query = f"""
-                    SELECT
-                        organismo,
-                        upper(Paterno) as apellido,
-                        COUNT(*) as cantidad_personas,
-                        SUM(TRY_CAST(regexp_replace(replace(CAST(sueldo AS VARCHAR), '.', ''), '[^0-9]', '', 'g') AS BIGINT)) as costo_mensual_total
-                    FROM ({base_sql})
-                    WHERE
-                        TRY_CAST(anyo AS INTEGER) = ?
-                        AND Mes = ?
-                        AND length(Paterno) > 2
-                        AND upper(Paterno) NOT IN ({common_surnames})
-                    GROUP BY 1, 2
-                    HAVING cantidad_personas >= ?
-                    ORDER BY cantidad_personas DESC
-                    LIMIT 100
-                    """
-                    df = duckdb.query(
-                        query, params=params + [audit_year, audit_month, min_repeats]
-                    ).to_df()
-                    if not df.empty:
-                        df["costo_mensual_total"] = df["costo_mensual_total"].apply(
-                            lambda x: (
-                                f"$ {x:,.0f}".replace(",", "X")
-                                .replace(".", ",")
-                                .replace("X", ".")
+        if not os.path.exists(freq_path):
+            st.info(
+                "Las frecuencias de apellidos se calculan en el pipeline ETL (`scripts/run_pipeline.py`)."
+            )
+        elif st.button(":material/search: Buscar Clanes"):
+            with st.spinner("Comparando con la frecuencia nacional..."):
+                organismos, apellidos = cache.get_or_compute(
+                    "apellidos",
+                    {**period, "min_repeats": min_repeats},
+                    lambda: find_surname_clusters(
+                        freq_path, audit_year, audit_month, min_repeats
+                    ),
+                )
+                if organismos.empty:
+                    st.info(
+                        "No se encontraron apellidos sobrerrepresentados en este periodo."
+                    )
+                else:
+                    st.dataframe(
+                        organismos,
+                        use_container_width=True,
+                        column_config={
+                            "principales": st.column_config.ListColumn(
+                                "Apellidos principales"
                             )
-                        )
-                        st.dataframe(df, use_container_width=True)
-                    else:
-                        st.info(
-                            "No se encontraron concentraciones altas de apellidos (excluyendo los comunes)."
-                        )
+                        },
+                    )
+                    st.markdown("#### Apellidos sobrerrepresentados")
+                    st.dataframe(apellidos, use_container_width=True)
 
     with tab4:
         st.subheader("Sueldos Atípicos (Outliers)")
         st.markdown(
-            "Detecta sueldos que se desvían más de **3 veces** del promedio de su estamento/función."
+            "Detecta sueldos muy por sobre la **mediana** de su organismo y estamento, medidos en desviaciones absolutas medianas (MAD), que no se distorsionan con los sueldos extremos."
         )
+        col1, col2 = st.columns(2)
+        scope = col1.radio("Periodo", ["Mes", "Año completo"], horizontal=True)
+        threshold = col2.slider("Puntaje robusto mínimo", 2.0, 10.0, 3.5, 0.5)
 
-        if st.button(":material/trending_up: Detectar Atípicos"):
-            with st.spinner("Calculando estadísticas por estamento..."):
-                base_sql, params = generate_unified_sql(paths)
-                if base_sql:
-                    query = f"""
-                    WITH base AS (
-                        SELECT
-                            organismo,
-                            estamento,
-                            upper(trim(COALESCE(Nombres,'')) || ' ' || trim(COALESCE(Paterno,'')) || ' ' || trim(COALESCE(Materno,''))) as nombre,
-                            TRY_CAST(regexp_replace(replace(CAST(sueldo AS VARCHAR), '.', ''), '[^0-9]', '', 'g') AS BIGINT) as sueldo_num
-                        FROM ({base_sql})
-                        WHERE TRY_CAST(anyo AS INTEGER) = ? AND Mes = ?
+        if not os.path.exists(sketch_path):
+            st.info(
+                "Las estadísticas por estamento se calculan en el pipeline ETL (`scripts/run_pipeline.py`)."
+            )
+        elif st.button(":material/trending_up: Detectar Atípicos"):
+            with st.spinner("Comparando con las estadísticas por estamento..."):
+                month = audit_month if scope == "Mes" else None
+                df = cache.get_or_compute(
+                    "atipicos",
+                    {"year": audit_year, "month": month, "threshold": threshold},
+                    lambda: find_salary_outliers(
+                        paths, sketch_path, audit_year, month, threshold=threshold
                     ),
-                    stats AS (
-                        SELECT
-                            estamento,
-                            AVG(sueldo_num) as promedio,
-                            STDDEV(sueldo_num) as desv
-                        FROM base
-                        WHERE sueldo_num > 400000 -- Ignore low/symbolic salaries for average
-                        GROUP BY 1
-                        HAVING COUNT(*) > 10 -- Only roles with enough people
-                    )
-                    SELECT
-                        b.organismo,
-                        b.nombre,
-                        b.estamento,
-                        b.sueldo_num as sueldo,
-                        CAST(s.promedio AS BIGINT) as promedio_estamento,
-                        CAST((b.sueldo_num / NULLIF(s.promedio, 0)) AS DECIMAL(10,1)) as veces_promedio
-                    FROM base b
-                    JOIN stats s ON b.estamento = s.estamento
-                    WHERE
-                        b.sueldo_num > (s.promedio + 3 * s.desv) -- 3 Sigma rule
-                        AND b.sueldo_num > 2000000 -- Only check relevant salaries
-                    ORDER BY veces_promedio DESC
-                    LIMIT 100
-                    """
-                    df = duckdb.query(
-                        query, params=params + [audit_year, audit_month]
-                    ).to_df()
-
-                    for col in ["sueldo", "promedio_estamento"]:
+                )
+                if df is not None and not df.empty:
+                    for col in ["sueldo", "mediana_estamento", "p99_estamento"]:
                         df[col] = df[col].apply(
                             lambda x: (
                                 f"$ {x:,.0f}".replace(",", "X")
@@ -326,3 +640,10 @@ def render_audit_ui(data_dir, urls_config):
                         )
 
                     st.dataframe(df, use_container_width=True)
+                else:
+                    st.success(":material/check_circle: Sin hallazgos.")
+
+    with tab5:
+        render_multiempleo_history(
+            os.path.join(parquet_dir, "multiempleo_rachas.parquet")
+        )
@@ -0,0 +1,127 @@
+"""Audit results persisted as small Parquet files.
+
+A result is stored under the version of the data it was computed from (a
+fingerprint of the input files' paths, sizes and modification times) and
+keyed by audit name, the audit's result version and its parameters:
+
+    <cache_dir>/<data version>/<audit>-v<result version>-<params hash>[-<i>].parquet
+
+The result version stands for the code: an audit whose SQL or columns change
+gets a new version, so results computed by the previous code are not served.
+
+The cache lives on disk, so it is shared by every Streamlit session and
+survives restarts. When the data changes the version changes, and the
+directories of older versions are deleted the next time the cache is used.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+
+from src.core.logger import get_logger
+
+logger = get_logger()
+
+
+def data_version(paths):
+    """Fingerprint of files by path, size and mtime (no content read)."""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+class AuditResultCache:
+    """Caches DataFrames (or tuples of them) returned by the audit functions.
+
+    :param cache_dir: Root directory of the cache.
+    :param paths: Files the audits read; their fingerprint is the data version.
+    :param versions: {audit: result version}; bump an audit's version when
+        what it returns changes. Audits not listed are version 0.
+    """
+
+    def __init__(self, cache_dir, paths, versions=None):
+        self.cache_dir = cache_dir
+        self.versions = versions or {}
+        self.version = data_version(paths)
+        self.version_dir = os.path.join(cache_dir, self.version)
+        self._evicted = False
+
+    def _evict_old_versions(self):
+        if self._evicted or not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name != self.version and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+        self._evicted = True
+
+    def _prefix(self, audit, params):
+        key = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        version = self.versions.get(audit, 0)
+        return os.path.join(self.version_dir, f"{audit}-v{version}-{digest}")
+
+    def _read(self, prefix):
+        single = f"{prefix}.parquet"
+        if os.path.exists(single):
+            return pd.read_parquet(single)
+        parts = []
+        while os.path.exists(f"{prefix}-{len(parts)}.parquet"):
+            parts.append(pd.read_parquet(f"{prefix}-{len(parts)}.parquet"))
+        return tuple(parts) if parts else None
+
+    def _write(self, prefix, result):
+        frames = result if isinstance(result, tuple) else (result,)
+        names = (
+            [f"{prefix}-{i}.parquet" for i in range(len(frames))]
+            if isinstance(result, tuple)
+            else [f"{prefix}.parquet"]
+        )
+        os.makedirs(self.version_dir, exist_ok=True)
+        # Parts first, so a reader never finds the first part without the rest
+        for df, path in reversed(list(zip(frames, names))):
+            tmp_path = f"{path}.tmp"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+
+    def get_or_compute(self, audit, params, compute):
+        """Returns the cached result of (audit, params) or computes and stores it.
+
+        :param compute: Callable returning a DataFrame, a tuple of DataFrames
+            or None (not cached, e.g. when there is no data).
+        """
+        self._evict_old_versions()
+        prefix = self._prefix(audit, params)
+        try:
+            cached = self._read(prefix)
+        except (OSError, pa.ArrowException) as e:
+            # A truncated or corrupt entry is recomputed and overwritten
+            logger.warning(
+                "unreadable audit cache entry",
+                extra={"audit": audit, "error": str(e).replace("\n", " ")},
+            )
+            cached = None
+        if cached is not None:
+            return cached
+
+        result = compute()
+        if result is None:
+            return result
+        try:
+            self._write(prefix, result)
+        except OSError as e:
+            # A read-only disk only costs the cache
+            logger.warning(
+                "audit cache not written",
+                extra={"audit": audit, "error": str(e).replace("\n", " ")},
+            )
+        return result
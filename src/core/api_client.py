@@ -1,23 +1,46 @@
+import asyncio
 import os
-import json
 import time
 import random
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 from tenacity import (
+    RetryError,
     retry,
     wait_exponential,
     stop_after_attempt,
     retry_if_exception_type,
 )
 
+from core.rate_limit import AdaptiveRateController, parse_retry_after
+from core.raw_cache import DEFAULT_CACHE_FORMAT, MonthFreshness, RawMonthCache
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger("SenadoAPI")
 
+# Simple rotation or standard header to prevent basic blocks
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept-Language": "es-CL,es;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Origin": "https://www.senado.cl",
+    "Referer": "https://www.senado.cl/",
+}
+
+# Global budget of the concurrent client (all endpoints and months together).
+# The rate is the starting point: it adapts between the two bounds.
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+DEFAULT_MAX_REQUESTS_PER_SECOND = 10.0
+DEFAULT_MAX_CONCURRENCY = 4
+
 
 class RateLimitError(Exception):
     """Exception thrown when a 429 Too Many Requests error occurs."""
@@ -31,29 +54,23 @@ class SenadoAPIClient:
     Includes rate limiting (delays), exponential retries, and disk caching.
     """
 
-    def __init__(self, base_cache_dir="data/raw/senado"):
+    def __init__(
+        self, base_cache_dir="data/raw/senado", cache_format=DEFAULT_CACHE_FORMAT
+    ):
         self.base_cache_dir = base_cache_dir
+        # Months are stored as compressed NDJSON by default (see core.raw_cache)
+        self.cache = RawMonthCache(base_cache_dir, cache_format)
         self.session = requests.Session()
-
-        # Simple rotation or standard header to prevent basic blocks
-        self.session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Language": "es-CL,es;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Origin": "https://www.senado.cl",
-                "Referer": "https://www.senado.cl/",
-            }
-        )
+        self.session.headers.update(HEADERS)
 
         # Create base directory if it doesn't exist
         os.makedirs(self.base_cache_dir, exist_ok=True)
 
     def _get_cache_path(self, endpoint_name, year, month):
         """Builds and creates (if necessary) the cache file path."""
-        dir_path = os.path.join(self.base_cache_dir, endpoint_name, str(year))
-        os.makedirs(dir_path, exist_ok=True)
-        return os.path.join(dir_path, f"{month:02d}.json")
+        cache_path = self.cache.path(endpoint_name, year, month)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        return cache_path
 
     @retry(
         wait=wait_exponential(
@@ -90,26 +107,22 @@ class SenadoAPIClient:
         :param force_refresh: If True, ignores cache and downloads again
         :return: Dictionary with the JSON response or None if it fails.
         """
-        cache_path = self._get_cache_path(endpoint_name, year, month)
-
-        # 1. Try to load from Cache
-        if not force_refresh and os.path.exists(cache_path):
-            logger.debug(f"Loaded from cache: {cache_path}")
-            try:
-                with open(cache_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.warning(
-                    f"Corrupted cache file in {cache_path}. Will download again."
-                )
+        # 1. Try to load from Cache (legacy JSON months are migrated on read)
+        if not force_refresh and self.cache.exists(endpoint_name, year, month):
+            data = self.cache.load(endpoint_name, year, month)
+            if data is not None:
+                logger.debug(f"Loaded from cache: {endpoint_name} {year}-{month:02d}")
+                return data
+            logger.warning(
+                f"Corrupted cache for {endpoint_name} ({year}-{month}). Will download again."
+            )
 
         # 2. Download if there is no cache or if it is corrupted/forced
         try:
             data = self._fetch_with_retry(url)
 
             # 3. Save to Cache
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.cache.save(endpoint_name, year, month, data)
 
             return data
 
@@ -118,3 +131,136 @@ class SenadoAPIClient:
                 f"Definitive error getting data for {endpoint_name} ({year}-{month}): {str(e)}"
             )
             return None
+
+
+class AsyncSenadoAPIClient:
+    """
+    Concurrent variant of SenadoAPIClient for backfills.
+    Requests share one adaptive rate (see AdaptiveRateController) instead of
+    sleeping before each call: it grows while the API answers quickly and
+    halves, pausing every worker, when it answers 429. At most
+    `max_concurrency` requests are in flight and they reuse a pool of
+    keep-alive connections. The learned rate is saved next to the cache.
+    The disk cache is the same RawMonthCache, so both clients read each
+    other's months.
+    """
+
+    def __init__(
+        self,
+        base_cache_dir="data/raw/senado",
+        cache_format=DEFAULT_CACHE_FORMAT,
+        requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        max_requests_per_second=DEFAULT_MAX_REQUESTS_PER_SECOND,
+        rate_state_path=None,
+        timeout=20,
+        endpoint_formats=None,
+    ):
+        self.base_cache_dir = base_cache_dir
+        self.cache = RawMonthCache(base_cache_dir, cache_format, endpoint_formats)
+        self.freshness = MonthFreshness(base_cache_dir)
+        # Outside the cache dir so it never looks like an endpoint or input
+        if rate_state_path is None:
+            rate_state_path = f"{os.path.normpath(base_cache_dir)}_rate.json"
+        self.rate = AdaptiveRateController(
+            requests_per_second,
+            max_rate=max(requests_per_second, max_requests_per_second),
+            state_path=rate_state_path,
+        )
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # requests is blocking: calls run on a pool sized to the concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._slots = None
+        self._loop = None
+
+        os.makedirs(self.base_cache_dir, exist_ok=True)
+
+    async def _get(self, url, headers=None):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        async with self._slots:
+            await self.rate.acquire()
+            sent_at = time.monotonic()
+            try:
+                response = await loop.run_in_executor(
+                    self._executor,
+                    lambda: self.session.get(
+                        url, headers=headers, timeout=self.timeout
+                    ),
+                )
+            except RequestException:
+                self.rate.on_error(sent_at)
+                raise
+
+        if response.status_code == 429:
+            self.rate.on_throttle(
+                parse_retry_after(response.headers.get("Retry-After")), sent_at
+            )
+        elif response.status_code >= 500:
+            self.rate.on_error(sent_at)
+        elif response.ok:
+            self.rate.on_success(time.monotonic() - sent_at)
+        return response
+
+    # Retry-After is honoured by the global pause in _get, so retries only
+    # add a short backoff of their own
+    @retry(
+        wait=wait_exponential(multiplier=1, min=1, max=30),
+        stop=stop_after_attempt(5),
+        retry=retry_if_exception_type((RequestException, RateLimitError)),
+    )
+    async def fetch_page(self, url, etag=None):
+        """GETs one page, conditionally if an ETag is given.
+
+        :return: (payload, etag). The payload is None on 304 Not Modified.
+        """
+        logger.debug(f"Downloading API: {url}")
+        headers = {"If-None-Match": etag} if etag else None
+        response = await self._get(url, headers=headers)
+
+        if response.status_code == 429:
+            raise RateLimitError("Rate limit exceeded on Senado.")
+        if response.status_code == 304:
+            return None, etag
+
+        response.raise_for_status()
+        return response.json(), response.headers.get("ETag")
+
+    async def fetch_json(self, url):
+        """Executes the HTTP request within the rate budget, with retries."""
+        payload, _ = await self.fetch_page(url)
+        return payload
+
+    async def get_data(self, endpoint_name, url, year, month, force_refresh=False):
+        """Same contract as SenadoAPIClient.get_data, as a coroutine."""
+        if not force_refresh and self.cache.exists(endpoint_name, year, month):
+            data = await asyncio.to_thread(self.cache.load, endpoint_name, year, month)
+            if data is not None:
+                return data
+            logger.warning(
+                f"Corrupted cache for {endpoint_name} ({year}-{month}). Will download again."
+            )
+
+        try:
+            data = await self.fetch_json(url)
+            await asyncio.to_thread(self.cache.save, endpoint_name, year, month, data)
+            return data
+        except (RetryError, RequestException, OSError, ValueError) as e:
+            logger.error(
+                f"Definitive error getting data for {endpoint_name} ({year}-{month}): {e}"
+            )
+            return None
+
+    def close(self):
+        self.rate.save()
+        self._executor.shutdown(wait=False)
+        self.session.close()
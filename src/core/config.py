@@ -62,3 +62,16 @@ MONTHS_MAP = {
     "Noviembre": 11,
     "Diciembre": 12,
 }
+
+
+def month_number_sql(col_expr):
+    """SQL to turn a Spanish month name ('Enero', 'setiembre') or a number into 1-12."""
+    if col_expr == "NULL":
+        return "NULL"
+    names = ", ".join(f"'{m.lower()}'" for m in MONTHS_MAP)
+    text = f"lower(trim({col_expr}::VARCHAR))"
+    number = (
+        f"COALESCE(TRY_CAST({col_expr} AS INTEGER), list_position([{names}], {text}), "
+        f"CASE WHEN {text} = 'setiembre' THEN 9 END)"
+    )
+    return f"CASE WHEN {number} BETWEEN 1 AND 12 THEN {number}::UTINYINT END"
@@ -1,12 +1,13 @@
 import streamlit as st
 import duckdb
+import functools
 import pandas as pd
 import os
 import time
 import json
 import requests
 import unicodedata
-from src.core.config import METADATA_FILE
+from src.core.config import METADATA_FILE, MONTHS_MAP, month_number_sql
 from src.core.logger import get_logger
 
 logger = get_logger()
@@ -22,6 +23,42 @@ def unaccent_lower_python(text: str) -> str:
     return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("utf-8")
 
 
+@functools.lru_cache(maxsize=256)
+def _parquet_columns(path, version):
+    described = duckdb.execute(
+        "DESCRIBE SELECT * FROM read_parquet(?)", [path]
+    ).fetchall()
+    return frozenset(row[0] for row in described)
+
+
+def parquet_columns(path) -> frozenset:
+    """Column names of a local or remote Parquet file, read from its footer.
+
+    Local files are probed again when their size or mtime changes; remote
+    ones once per process.
+    """
+    try:
+        stat = os.stat(path)
+        version = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        version = None
+    return _parquet_columns(path, version)
+
+
+def period_sql(columns) -> tuple:
+    """(periodo, mes_num) SQL expressions for a file with the given columns.
+
+    Files published before periodo and mes_num existed (or by a source that
+    has not been rebuilt since) get them derived from anyo and Mes.
+    """
+    mes_num = "mes_num" if "mes_num" in columns else month_number_sql('"Mes"')
+    if "periodo" in columns:
+        periodo = "periodo"
+    else:
+        periodo = f"(anyo * 100 + {mes_num})::INTEGER"
+    return periodo, mes_num
+
+
 def load_cache() -> dict:
     """Loads metadata from JSON if it exists locally, otherwise fetches from GitHub."""
     if os.path.exists(METADATA_FILE):
@@ -109,58 +146,70 @@ def quick_query(
             conditions.append("search_vector LIKE ?")
             query_params.append(f"%{word}%")
 
+    # A single month is filtered on the packed integer 'periodo' (YYYYMM);
+    # year ranges on 'anyo', so rows whose month did not parse (NULL periodo)
+    # are still found. Both are single range predicates the row-group stats prune.
+    mes_num = MONTHS_MAP.get(month) if month and month != "Todos" else None
+    years = None
     if start_year and end_year:
         try:
-            start = int(start_year)
-            end = int(end_year)
-            conditions.append("anyo BETWEEN ? AND ?")
-            query_params.extend([start, end])
+            years = (int(start_year), int(end_year))
         except Exception:
             pass
 
-    if month and month != "Todos":
-        conditions.append("Mes = ?")
-        query_params.append(month)
-
-    where_clause = " AND ".join(conditions) if conditions else "1=1"
-
-    selects = []
-    for source_name, source_path in paths_to_query:
-        columns = [
-            "organismo_nombre",
-            "anyo",
-            "Mes",
-            "estamento",
-            "Nombres",
-            "Paterno",
-            "Materno",
-            "cargo",
-            "remuliquida_mensual",
-            "remuneracionbruta_mensual",
-            "origen",
-        ]
-        cols_str = ", ".join(columns)
-
-        selects.append(f"""
-            SELECT {cols_str}
-            FROM read_parquet('{source_path}')
-            WHERE {where_clause}
-        """)
-
-    final_query = " UNION ALL ".join(selects)
-    final_query += f" LIMIT {limit}"
-
-    full_params = query_params * len(paths_to_query)
-
-    logger.info(
-        "fetching parquet chunks via duckdb httpfs",
-        extra={
-            "sources_count": len(paths_to_query),
-            "urls": [source_path for _, source_path in paths_to_query],
-        },
-    )
-
     try:
+        selects = []
+        full_params = []
+        for source_name, source_path in paths_to_query:
+            periodo_sql, mes_num_sql = period_sql(parquet_columns(source_path))
+            file_conditions = list(conditions)
+            file_params = list(query_params)
+            if years and mes_num and years[0] == years[1]:
+                file_conditions.append(f"{periodo_sql} = ?")
+                file_params.append(years[0] * 100 + mes_num)
+            else:
+                if years:
+                    file_conditions.append("anyo BETWEEN ? AND ?")
+                    file_params.extend(years)
+                if mes_num:
+                    file_conditions.append(f"{mes_num_sql} = ?")
+                    file_params.append(mes_num)
+            where_clause = " AND ".join(file_conditions) if file_conditions else "1=1"
+
+            columns = [
+                "organismo_nombre",
+                "anyo",
+                "Mes",
+                "estamento",
+                "Nombres",
+                "Paterno",
+                "Materno",
+                "cargo",
+                "remuliquida_mensual",
+                "remuneracionbruta_mensual",
+                "origen",
+                f"{mes_num_sql} AS mes_num",
+            ]
+            cols_str = ", ".join(columns)
+
+            selects.append(f"""
+                SELECT {cols_str}
+                FROM read_parquet('{source_path}')
+                WHERE {where_clause}
+            """)
+            full_params += file_params
+
+        final_query = " UNION ALL ".join(selects)
+        final_query += f" LIMIT {limit}"
+
+        logger.info(
+            "fetching parquet chunks via duckdb httpfs",
+            extra={
+                "sources_count": len(paths_to_query),
+                "urls": [source_path for _, source_path in paths_to_query],
+            },
+        )
+
         df = duckdb.query(final_query, params=full_params).to_df()
         duration = time.time() - start_time
         logger.info(
@@ -209,13 +258,17 @@ def get_last_record(paths_to_query, person_name):
 
         selects = []
         for source_name, path in paths_to_query:
+            periodo_sql, _ = period_sql(parquet_columns(path))
             selects.append(f"""
-            SELECT anyo, Mes, organismo_nombre, origen
+            SELECT anyo, Mes, {periodo_sql} AS periodo, organismo_nombre, origen
             FROM read_parquet('{path}')
             WHERE {where_name}
             """)
 
-        final_query = " UNION ALL ".join(selects) + " ORDER BY anyo DESC LIMIT 1"
+        final_query = (
+            " UNION ALL ".join(selects)
+            + " ORDER BY anyo DESC, periodo DESC NULLS LAST LIMIT 1"
+        )
         full_params = query_params * len(paths_to_query)
 
         logger.info(
@@ -0,0 +1,201 @@
+"""Request-rate limiting shared by the concurrent API clients."""
+
+import asyncio
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger("RateLimit")
+
+
+class TokenBucket:
+    """Asyncio token bucket: at most `rate` acquisitions per second on average.
+
+    `capacity` is the burst size; with the default of 1 requests are evenly
+    spaced. Waiters are served in arrival order, so a single bucket shared by
+    every task is a global budget no matter how many requests are in flight.
+    """
+
+    def __init__(self, rate, capacity=1.0):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def set_rate(self, rate):
+        """Changes the rate from now on (tokens accrued so far are kept)."""
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self._refill()
+        self.rate = float(rate)
+
+    async def acquire(self):
+        # Created lazily (and per loop) so the bucket outlives asyncio.run calls
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BlockingTokenBucket(TokenBucket):
+    """TokenBucket for worker threads: `acquire` blocks the calling thread."""
+
+    def __init__(self, rate, capacity=1.0):
+        super().__init__(rate, capacity)
+        self._thread_lock = threading.Lock()
+
+    def acquire(self):
+        with self._thread_lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                time.sleep((1 - self._tokens) / self.rate)
+
+
+def parse_retry_after(value, default=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(
+        0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    )
+
+
+class AdaptiveRateController:
+    """AIMD request rate shared by every worker of a client.
+
+    Healthy responses (fast 2xx) raise the rate additively, by about
+    `increase` requests/s per second of traffic. A 429 halves it and pauses
+    every worker until its Retry-After has passed; timeouts and 5xx halve it
+    without pausing. Failures of requests sent before the last cut belong to
+    the same congestion event and do not cut it again. The rate is saved to
+    `state_path` so the next run starts from the last rate the server
+    tolerated instead of probing from scratch.
+    """
+
+    def __init__(
+        self,
+        rate,
+        min_rate=0.2,
+        max_rate=10.0,
+        increase=0.2,
+        decrease=0.5,
+        slow_latency=5.0,
+        default_retry_after=10.0,
+        state_path=None,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_latency = slow_latency
+        self.default_retry_after = default_retry_after
+        self.state_path = state_path
+
+        saved = self._load_rate()
+        if saved is not None:
+            logger.info(f"Starting from the saved request rate: {saved:.2f} req/s")
+            rate = saved
+        self.bucket = TokenBucket(self._clamp(rate))
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def _clamp(self, rate):
+        return min(self.max_rate, max(self.min_rate, rate))
+
+    def _load_rate(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return float(json.load(f)["rate"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable rate state {self.state_path}: {e}")
+            return None
+
+    def save(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"rate": round(self.rate, 3), "updated_at": time.time()}, f, indent=2
+            )
+        os.replace(tmp_path, self.state_path)
+
+    async def acquire(self):
+        """Waits out any global pause, then for a token of the current rate."""
+        while (delay := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+        await self.bucket.acquire()
+
+    def on_success(self, latency):
+        if latency > self.slow_latency:
+            return
+        # +increase per second: each success adds increase / rate
+        self.bucket.set_rate(self._clamp(self.rate + self.increase / self.rate))
+
+    def _decrease(self, sent_at):
+        now = time.monotonic()
+        # Requests sent before the last cut belong to the same congestion event
+        if sent_at is not None and sent_at < self._last_decrease:
+            return
+        self._last_decrease = now
+        self.bucket.set_rate(self._clamp(self.rate * self.decrease))
+        self.save()
+
+    def on_throttle(self, retry_after=None, sent_at=None):
+        """A 429: cut the rate and pause every worker for Retry-After seconds.
+
+        :param sent_at: time.monotonic() when the failed request was sent.
+        """
+        if retry_after is None:
+            retry_after = self.default_retry_after
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        self._decrease(sent_at)
+        logger.warning(
+            f"Throttled: pausing {retry_after:.1f}s, rate now {self.rate:.2f} req/s"
+        )
+
+    def on_error(self, sent_at=None):
+        """A timeout or server error: cut the rate without pausing."""
+        self._decrease(sent_at)
@@ -0,0 +1,572 @@
+"""Month-level disk cache for the Senado API responses.
+
+Each month lives at <base>/<endpoint>/<year>/<mm><ext> in one of these formats:
+
+- json: the response as received, pretty-printed (the original layout).
+- ndjson: zstd-compressed, one record per line as received, preceded by a
+  header line with the response envelope. Lossless.
+- parquet: the records as typed columns (zstd), envelope in the schema
+  metadata. Values are recoverable, but keys missing from a record come back
+  as null, and a field typed inconsistently across records is kept as text.
+
+Legacy JSON months are rewritten into the configured format on access or by
+`migrate()`; readers accept any format. Endpoints can be pinned to a format
+of their own (`endpoint_formats`): the heavy staffing endpoints are always
+Parquet, written page by page with `StreamingMonthWriter` so a month never
+has to fit in memory.
+
+`MonthFreshness` keeps when each month was fetched and checked, its record
+count, a content hash and the ETag of every page, in <base>/freshness.json.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import shutil
+from glob import glob
+
+import pyarrow as pa
+import pyarrow.json as pa_json
+import pyarrow.parquet as pq
+
+logger = logging.getLogger("RawCache")
+
+CACHE_FORMATS = {"json": ".json", "ndjson": ".ndjson.zst", "parquet": ".parquet"}
+DEFAULT_CACHE_FORMAT = "ndjson"
+
+# Wrapped records ({"id": ..., "attributes": {...}}) keep their id here
+ID_COLUMN = "__id"
+_METADATA_KEY = b"senado_envelope"
+
+
+def cache_format_of(path):
+    for fmt, ext in CACHE_FORMATS.items():
+        if path.endswith(ext):
+            return fmt
+    raise ValueError(f"Unknown raw cache file: {path}")
+
+
+def split_payload(payload):
+    """Separates the record list from its envelope.
+
+    Returns (header, items). The header holds the envelope with the list
+    removed and where to put it back; `join_payload` reverses the split.
+    """
+    if isinstance(payload, list):
+        return {"envelope": None, "items_path": []}, payload
+    data = payload.get("data") if isinstance(payload, dict) else None
+    if isinstance(data, dict) and isinstance(data.get("data"), list):
+        # Strapi v4 paginated format
+        envelope = {**payload, "data": {**data, "data": None}}
+        return {"envelope": envelope, "items_path": ["data", "data"]}, data["data"]
+    if isinstance(data, list):
+        # Simple list
+        envelope = {**payload, "data": None}
+        return {"envelope": envelope, "items_path": ["data"]}, data
+    return {"envelope": payload, "items_path": None}, []
+
+
+def join_payload(header, items):
+    """Rebuilds the original response from `split_payload`'s output."""
+    path = header["items_path"]
+    if path is None:
+        return header["envelope"]
+    if not path:
+        return items
+    payload = json.loads(json.dumps(header["envelope"]))
+    target = payload
+    for key in path[:-1]:
+        target = target[key]
+    target[path[-1]] = items
+    return payload
+
+
+def _is_wrapped(items):
+    return bool(items) and all(
+        isinstance(item, dict) and "attributes" in item for item in items
+    )
+
+
+def records_table(records):
+    """Builds an Arrow table from dicts, column by column.
+
+    Keys are collected from every record (not just the first) and a column
+    whose values cannot share one Arrow type is stored as text.
+    """
+    keys = dict.fromkeys(key for record in records for key in record)
+    columns = {}
+    for key in keys:
+        values = [record.get(key) for record in records]
+        try:
+            columns[key] = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            columns[key] = pa.array(
+                [
+                    None
+                    if v is None
+                    else json.dumps(v, ensure_ascii=False)
+                    if isinstance(v, (dict, list))
+                    else str(v)
+                    for v in values
+                ],
+                pa.string(),
+            )
+    return pa.table(columns) if columns else pa.table({})
+
+
+def records_fingerprint(items):
+    """Content hash of a month's records, independent of the page envelopes."""
+    canonical = json.dumps(
+        items, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _unwrap_records(items):
+    if _is_wrapped(items):
+        return [{ID_COLUMN: item.get("id"), **item["attributes"]} for item in items]
+    return items
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_month(path, payload):
+    """Writes a response in the format given by the path's extension."""
+    fmt = cache_format_of(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if fmt == "json":
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, indent=2)
+
+    elif fmt == "ndjson":
+        header, items = split_payload(payload)
+
+        def write(tmp_path):
+            with pa.output_stream(tmp_path, compression="zstd") as out:
+                out.write(json.dumps(header, ensure_ascii=False).encode("utf-8"))
+                out.write(b"\n")
+                for item in items:
+                    out.write(json.dumps(item, ensure_ascii=False).encode("utf-8"))
+                    out.write(b"\n")
+
+    else:
+        header, items = split_payload(payload)
+        header["wrapped"] = _is_wrapped(items)
+        table = records_table(_unwrap_records(items))
+        table = table.replace_schema_metadata(
+            {_METADATA_KEY: json.dumps(header, ensure_ascii=False).encode("utf-8")}
+        )
+
+        def write(tmp_path):
+            pq.write_table(table, tmp_path, compression="zstd")
+
+    _write_atomic(path, write)
+
+
+def _read_ndjson(path):
+    body = pa.input_stream(path, compression="zstd").read()
+    first_newline = body.find(b"\n")
+    header = json.loads(body[:first_newline])
+    return header, body[first_newline + 1 :]
+
+
+def read_payload(path):
+    """Returns the response as originally received."""
+    fmt = cache_format_of(path)
+    if fmt == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    if fmt == "ndjson":
+        header, lines = _read_ndjson(path)
+        items = [json.loads(line) for line in lines.splitlines() if line]
+        return join_payload(header, items)
+
+    table = pq.read_table(path)
+    header = json.loads(table.schema.metadata[_METADATA_KEY])
+    records = table.to_pylist()
+    if header.pop("wrapped"):
+        records = [
+            {"id": record.pop(ID_COLUMN), "attributes": record} for record in records
+        ]
+    return join_payload(header, records)
+
+
+def read_records_table(path):
+    """Reads the (unwrapped) records of a compressed month into Arrow."""
+    fmt = cache_format_of(path)
+    if fmt == "parquet":
+        table = pq.read_table(path)
+        if ID_COLUMN in table.column_names:
+            table = table.drop_columns([ID_COLUMN])
+        return table.replace_schema_metadata(None)
+    if fmt != "ndjson":
+        raise ValueError(f"Not a compressed raw cache file: {path}")
+
+    _header, lines = _read_ndjson(path)
+    if not lines.strip():
+        return pa.table({})
+    try:
+        table = pa_json.read_json(
+            pa.BufferReader(lines),
+            read_options=pa_json.ReadOptions(block_size=len(lines) + 1),
+        )
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Inconsistent types across records
+        items = [json.loads(line) for line in lines.splitlines() if line]
+        table = records_table(_unwrap_records(items))
+        return (
+            table.drop_columns([ID_COLUMN])
+            if ID_COLUMN in table.column_names
+            else table
+        )
+
+    if "attributes" in table.column_names and pa.types.is_struct(
+        table.schema.field("attributes").type
+    ):
+        attributes = table.column("attributes").combine_chunks()
+        return pa.Table.from_struct_array(attributes)
+    return table
+
+
+def _unified_schema(schemas):
+    """One schema for every page of a month, typed like `records_table`.
+
+    A column keeps its type when all pages agree (null pages aside), integers
+    and floats widen to the largest numeric type, and anything else that
+    disagrees is stored as text.
+    """
+    types = {}
+    for schema in schemas:
+        for field in schema:
+            found = types.setdefault(field.name, [])
+            if not pa.types.is_null(field.type) and field.type not in found:
+                found.append(field.type)
+    fields = []
+    for name, found in types.items():
+        if not found:
+            field_type = pa.null()
+        elif len(found) == 1:
+            field_type = found[0]
+        elif all(pa.types.is_integer(t) for t in found):
+            field_type = pa.int64()
+        elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in found):
+            field_type = pa.float64()
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(name, field_type))
+    return pa.schema(fields)
+
+
+def _conform(table, schema):
+    """Casts a page to the month schema, adding the columns it lacks as nulls."""
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table.column(field.name)
+        if column.type == field.type:
+            columns.append(column)
+        elif pa.types.is_string(field.type) and not (
+            pa.types.is_primitive(column.type) or pa.types.is_null(column.type)
+        ):
+            # Nested values become JSON text, as in records_table
+            columns.append(
+                pa.array(
+                    [
+                        None if v is None else json.dumps(v, ensure_ascii=False)
+                        for v in column.to_pylist()
+                    ],
+                    pa.string(),
+                )
+            )
+        else:
+            columns.append(column.cast(field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+class StreamingMonthWriter:
+    """Writes a month to the Parquet cache one page at a time.
+
+    Each page is written to its own file in a scratch directory as it
+    arrives (in any order), so memory holds one page whatever the month's
+    size. `commit()` copies the pages, in page order and one row group each,
+    into the month file under a schema unified across pages; `discard()`
+    drops them. The month file is the same as `write_month` produces for a
+    consolidated response, so every reader of the cache accepts it; the
+    files in `replaces` (the month in other formats) are removed with it.
+
+    The fingerprint is a hash of the per-page `records_fingerprint`s in page
+    order: it changes with the content, but is not the hash of the whole
+    record list that `records_fingerprint` gives.
+    """
+
+    def __init__(self, path, replaces=()):
+        if cache_format_of(path) != "parquet":
+            raise ValueError(f"Streamed months are written as Parquet: {path}")
+        self.path = path
+        self.replaces = list(replaces)
+        self.parts_dir = f"{path}.parts"
+        # Pages of a run that died are not resumed
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        os.makedirs(self.parts_dir)
+        self.records = 0
+        self.wrapped = True
+        self._digests = {}
+
+    def _part(self, page):
+        return os.path.join(self.parts_dir, f"{page:06d}.parquet")
+
+    def add_page(self, page, items):
+        """Writes the records of page number `page` (1-based)."""
+        self._digests[page] = records_fingerprint(items)
+        self.records += len(items)
+        self.wrapped = self.wrapped and (not items or _is_wrapped(items))
+        pq.write_table(records_table(_unwrap_records(items)), self._part(page))
+
+    def fingerprint(self):
+        digest = hashlib.sha256()
+        for page in sorted(self._digests):
+            digest.update(self._digests[page].encode("ascii"))
+        return digest.hexdigest()
+
+    def commit(self):
+        """Assembles the pages into the month file. Returns its path."""
+        pages = sorted(self._digests)
+        schema = _unified_schema(pq.read_schema(self._part(page)) for page in pages)
+        header = {
+            "envelope": {
+                "data": {
+                    "data": None,
+                    "meta": {
+                        "pagination": {
+                            "page": 1,
+                            "pageSize": self.records,
+                            "pageCount": 1,
+                            "total": self.records,
+                        }
+                    },
+                }
+            },
+            "items_path": ["data", "data"],
+            "wrapped": self.wrapped and self.records > 0,
+        }
+        schema = schema.with_metadata(
+            {_METADATA_KEY: json.dumps(header, ensure_ascii=False).encode("utf-8")}
+        )
+
+        def write(tmp_path):
+            with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                for page in pages:
+                    table = pq.read_table(self._part(page))
+                    if table.num_rows:
+                        writer.write_table(_conform(table, schema))
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            _write_atomic(self.path, write)
+        finally:
+            self.discard()
+        for other in self.replaces:
+            if os.path.exists(other):
+                os.remove(other)
+        return self.path
+
+    def discard(self):
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+
+class RawMonthCache:
+    """Per-month cache of API responses in a configurable on-disk format.
+
+    :param endpoint_formats: Optional {endpoint: format} for endpoints stored
+        in a format other than `cache_format` (e.g. the streamed staffing
+        months, always Parquet). They are never migrated.
+    """
+
+    def __init__(
+        self, base_dir, cache_format=DEFAULT_CACHE_FORMAT, endpoint_formats=None
+    ):
+        self.endpoint_formats = dict(endpoint_formats or {})
+        for fmt in [cache_format, *self.endpoint_formats.values()]:
+            if fmt not in CACHE_FORMATS:
+                raise ValueError(
+                    f"Unknown cache format '{fmt}'. Options: {list(CACHE_FORMATS)}"
+                )
+        self.base_dir = base_dir
+        self.cache_format = cache_format
+
+    def format_of(self, endpoint_name):
+        """The format months of this endpoint are written in."""
+        return self.endpoint_formats.get(endpoint_name, self.cache_format)
+
+    def path(self, endpoint_name, year, month, cache_format=None):
+        ext = CACHE_FORMATS[cache_format or self.format_of(endpoint_name)]
+        return os.path.join(
+            self.base_dir, endpoint_name, str(year), f"{month:02d}{ext}"
+        )
+
+    def find(self, endpoint_name, year, month):
+        """Path of the cached month in any format (configured one first), or None."""
+        configured = self.format_of(endpoint_name)
+        formats = [configured] + [f for f in CACHE_FORMATS if f != configured]
+        for fmt in formats:
+            path = self.path(endpoint_name, year, month, fmt)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def exists(self, endpoint_name, year, month):
+        return self.find(endpoint_name, year, month) is not None
+
+    def load(self, endpoint_name, year, month):
+        """Returns the cached response, or None if missing or unreadable.
+
+        A month stored in another format is rewritten in the configured one.
+        """
+        path = self.find(endpoint_name, year, month)
+        if path is None:
+            return None
+        try:
+            payload = read_payload(path)
+        except (ValueError, OSError, KeyError, pa.ArrowException) as e:
+            logger.warning(f"Corrupted cache file in {path}: {e}")
+            return None
+        if cache_format_of(path) != self.format_of(endpoint_name):
+            self.save(endpoint_name, year, month, payload)
+        return payload
+
+    def save(self, endpoint_name, year, month, payload):
+        path = self.path(endpoint_name, year, month)
+        write_month(path, payload)
+        # Drop copies of the month in other formats
+        for fmt in CACHE_FORMATS:
+            other = self.path(endpoint_name, year, month, fmt)
+            if other != path and os.path.exists(other):
+                os.remove(other)
+        return path
+
+    def stream_writer(self, endpoint_name, year, month):
+        """A `StreamingMonthWriter` for the month, as Parquet.
+
+        Committing it replaces the month, including copies in other formats.
+        """
+        path = self.path(endpoint_name, year, month, "parquet")
+        copies = [
+            self.path(endpoint_name, year, month, fmt)
+            for fmt in CACHE_FORMATS
+            if fmt != "parquet"
+        ]
+        return StreamingMonthWriter(path, replaces=copies)
+
+    def month_files(self, endpoint_name):
+        """One file per cached month of an endpoint, sorted by year and month."""
+        by_month = {}
+        for path in glob(os.path.join(self.base_dir, endpoint_name, "*", "*")):
+            try:
+                fmt = cache_format_of(path)
+            except ValueError:
+                continue
+            key = (os.path.dirname(path), os.path.basename(path)[:2])
+            # The configured format wins over leftovers from an interrupted migration
+            if key not in by_month or fmt == self.format_of(endpoint_name):
+                by_month[key] = path
+        return [by_month[key] for key in sorted(by_month)]
+
+    def migrate(self, endpoint_name=None):
+        """Rewrites every month stored in another format. Returns the count."""
+        endpoints = (
+            [endpoint_name]
+            if endpoint_name
+            else sorted(
+                d
+                for d in os.listdir(self.base_dir)
+                if os.path.isdir(os.path.join(self.base_dir, d))
+            )
+            if os.path.isdir(self.base_dir)
+            else []
+        )
+        migrated = 0
+        for endpoint in endpoints:
+            if endpoint in self.endpoint_formats:
+                continue
+            for path in self.month_files(endpoint):
+                if cache_format_of(path) == self.cache_format:
+                    continue
+                year = int(os.path.basename(os.path.dirname(path)))
+                month = int(os.path.basename(path)[:2])
+                if self.load(endpoint, year, month) is not None:
+                    migrated += 1
+        if migrated:
+            logger.info(
+                f"Migrated {migrated} cached months to {self.cache_format} in {self.base_dir}"
+            )
+        return migrated
+
+
+class MonthFreshness:
+    """Fetch metadata of the cached months, stored as <base>/freshness.json.
+
+    Entries are keyed by endpoint/year/month and hold `fetched_at` (last
+    time the content changed), `checked_at` (last time it was compared with
+    the API), `records`, `sha256` (see `records_fingerprint`) and `etags`
+    (one per page, None where the API sent none).
+    """
+
+    FILENAME = "freshness.json"
+    VERSION = 1
+
+    def __init__(self, base_dir):
+        self.path = os.path.join(base_dir, self.FILENAME)
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    content = json.load(f)
+                if content.get("version") == self.VERSION:
+                    self.entries = content.get("months", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable freshness file {self.path}: {e}")
+
+    @staticmethod
+    def key(endpoint_name, year, month):
+        return f"{endpoint_name}/{year}/{month:02d}"
+
+    def get(self, endpoint_name, year, month):
+        return self.entries.get(self.key(endpoint_name, year, month))
+
+    def update(self, endpoint_name, year, month, **fields):
+        key = self.key(endpoint_name, year, month)
+        self.entries[key] = {**self.entries.get(key, {}), **fields}
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": self.VERSION, "months": self.entries},
+                    f,
+                    indent=2,
+                    sort_keys=True,
+                )
+
+        _write_atomic(self.path, write)
+
+
+def utc_now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
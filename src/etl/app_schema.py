@@ -0,0 +1,8 @@
+import pandas as pd
+
+
+def add_period_columns(df: pd.DataFrame, month_numbers) -> pd.DataFrame:
+    """Adds the integer month ('mes_num') and packed YYYYMM period ('periodo')."""
+    df["mes_num"] = pd.Series(month_numbers, index=df.index).astype("uint8")
+    df["periodo"] = (df["anyo"].astype("int32") * 100 + df["mes_num"]).astype("int32")
+    return df
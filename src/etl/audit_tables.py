@@ -0,0 +1,469 @@
+"""Audit tables precomputed from the published salary files.
+
+Each table keeps one `MonthPartitions` file per month and a `MonthManifest`
+with a content fingerprint of every source's month, so a run only
+aggregates the months that changed.
+
+- `MultiempleoHistory`: the people paid by more than one organismo in a
+  month, published as streaks of consecutive months. Only the streaks of
+  the people in the changed months are recomputed; the rest are carried
+  over.
+- `SalarySketches`: a mergeable quantile sketch of the salaries of every
+  organismo x estamento x month, from which the audits read the median,
+  MAD and p90/p99 of any month range without rescanning its rows.
+- `SurnameFrequencies`: people per paterno, materno and paterno+materno in
+  every organismo and in the whole country, the baseline the nepotism
+  audit compares organismos against.
+"""
+
+import logging
+import math
+import os
+
+import duckdb
+
+from etl.incremental import MonthManifest, MonthPartitions
+from etl.parquet_writer import PERSON_NAME_SQL, write_parquet
+
+logger = logging.getLogger("AuditTables")
+
+# One row per person and month with jobs in more than one organismo
+MULTIEMPLEO_MONTH_COLUMNS = {
+    "periodo": "INTEGER",
+    "persona_id": "UBIGINT",
+    "nombre": "VARCHAR",
+    "num_organismos": "INTEGER",
+    "sueldo_total": "BIGINT",
+    "organismos": "VARCHAR[]",
+    "origenes": "VARCHAR[]",
+}
+
+# One row per streak of consecutive multiempleo months (inicio/fin: YYYYMM)
+STREAK_COLUMNS = {
+    "persona_id": "UBIGINT",
+    "nombre": "VARCHAR",
+    "inicio": "INTEGER",
+    "fin": "INTEGER",
+    "meses": "INTEGER",
+    "max_organismos": "INTEGER",
+    "sueldo_total": "BIGINT",
+    "organismos": "VARCHAR[]",
+}
+STREAK_SORT = "meses DESC, sueldo_total DESC"
+
+# Per-month content fingerprint of a source: rows and an order-independent
+# sum of row hashes over the columns the audits read
+_MONTH_FINGERPRINT_SQL = """
+SELECT
+    periodo,
+    COUNT(*),
+    SUM(
+        CAST(
+            hash(persona_id, organismo_nombre, estamento, remuliquida_mensual, origen)
+            AS HUGEINT
+        )
+    )
+FROM read_parquet(?)
+WHERE periodo IS NOT NULL
+GROUP BY periodo
+"""
+
+_STREAKS_SQL = """
+WITH meses AS (
+    SELECT *, (periodo // 100) * 12 + periodo % 100 AS indice
+    FROM read_parquet(?)
+    {where}
+),
+islas AS (
+    -- Consecutive months share indice - row_number()
+    SELECT
+        *,
+        indice - row_number() OVER (PARTITION BY persona_id ORDER BY indice) AS isla
+    FROM meses
+)
+SELECT
+    persona_id,
+    arg_max(nombre, periodo) AS nombre,
+    MIN(periodo) AS inicio,
+    MAX(periodo) AS fin,
+    COUNT(*) AS meses,
+    MAX(num_organismos) AS max_organismos,
+    SUM(sueldo_total) AS sueldo_total,
+    list_sort(list_distinct(flatten(LIST(organismos)))) AS organismos
+FROM islas
+GROUP BY persona_id, isla
+"""
+
+# Log-bucketed histogram (DDSketch): a salary x falls in bucket
+# ceil(log_gamma(x)) and every quantile read back is within SKETCH_ALPHA
+# of the true value. Sketches merge by adding the counts of equal buckets.
+SKETCH_ALPHA = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+
+SKETCH_COLUMNS = {
+    "periodo": "INTEGER",
+    "organismo": "VARCHAR",
+    "estamento": "VARCHAR",
+    "bucket": "SMALLINT",
+    "n": "INTEGER",
+}
+SKETCH_SORT = "periodo, organismo, estamento, bucket"
+
+# People per surname; organismo NULL holds the national counts and tipo
+# 'total' (apellido NULL) the number of people. Surnames held by a single
+# person are dropped: they can never be a repeat.
+SURNAME_COLUMNS = {
+    "periodo": "INTEGER",
+    "organismo": "VARCHAR",
+    "tipo": "VARCHAR",
+    "apellido": "VARCHAR",
+    "n": "INTEGER",
+}
+SURNAME_SORT = "periodo, organismo NULLS FIRST, tipo, apellido"
+SURNAME_TYPES = ("paterno", "materno", "par")
+
+
+def source_month_fingerprints(conn, sources):
+    """{(source, year, month): fingerprint} of every month of every source."""
+    inputs = {}
+    for name, path in sources.items():
+        for periodo, rows, digest in conn.execute(
+            _MONTH_FINGERPRINT_SQL, [path]
+        ).fetchall():
+            inputs[(name, periodo // 100, periodo % 100)] = f"{rows}:{digest}"
+    return inputs
+
+
+class MonthlyAuditTable:
+    """An audit table rebuilt month by month from the app's salary files.
+
+    Subclasses provide `_month_query(periodo) -> (query, params)` and
+    `_publish(conn, full)`.
+
+    :param sources: {name: path} of the app's salary Parquet files.
+    :param work_dir: Where the monthly partitions and the manifest live.
+    :param out_path: Published file.
+    """
+
+    name = "audit table"
+    columns = None
+    order_by = None
+
+    def __init__(self, sources, work_dir, out_path):
+        self.sources = dict(sources)
+        self.out_path = out_path
+        self.manifest = MonthManifest(os.path.join(work_dir, "manifest.json"))
+        self.partitions = MonthPartitions(
+            os.path.join(work_dir, "meses"),
+            columns=self.columns,
+            order_by=self.order_by,
+        )
+
+    def _union(self, columns, periodo):
+        """UNION ALL of `columns` of every source for one month, and its params.
+
+        Every row also gets `fuente`, the name of its source.
+        """
+        selects = []
+        params = []
+        for name, path in self.sources.items():
+            selects.append(
+                f"SELECT ? AS fuente, {columns} FROM read_parquet(?) WHERE periodo = ?"
+            )
+            params += [name, path, periodo]
+        return " UNION ALL ".join(selects), params
+
+    def _rebuild_month(self, conn, year, month, present):
+        if (year, month) not in present:
+            self.partitions.remove([(year, month)])
+            return
+        query, params = self._month_query(year * 100 + month)
+        self.partitions.write_query(conn, query, year, month, params)
+
+    def _start(self, conn):
+        """Hook run before the changed months are rebuilt."""
+
+    def update(self, force=False):
+        """Aggregates the changed months and republishes the table.
+
+        :param force: Rebuild every month.
+        :return: Sorted list of the (year, month) that were aggregated.
+        """
+        if force:
+            self.manifest.reset()
+        conn = duckdb.connect()
+        try:
+            inputs = source_month_fingerprints(conn, self.sources)
+            changed = sorted(self.manifest.changed_months(inputs))
+            full = force or not os.path.exists(self.out_path)
+            if not changed and not full:
+                logger.info(f"{self.name}: up to date")
+                return changed
+
+            present = {(year, month) for _, year, month in inputs}
+            self._start(conn)
+            for year, month in changed:
+                self._rebuild_month(conn, year, month, present)
+
+            self._publish(conn, full)
+            self.manifest.commit()
+            logger.info(
+                f"{self.name}: {len(changed)} months aggregated, published {self.out_path}"
+            )
+            return changed
+        finally:
+            conn.close()
+
+
+class MultiempleoHistory(MonthlyAuditTable):
+    """Multiempleo streaks across the whole history, maintained incrementally."""
+
+    name = "Multiempleo"
+    columns = MULTIEMPLEO_MONTH_COLUMNS
+    order_by = "persona_id"
+
+    def _month_query(self, periodo):
+        """Multiempleo of one month: grouped on persona_id, names joined last."""
+        union, params = self._union(
+            "persona_id, organismo_nombre, remuliquida_mensual, origen, "
+            "Nombres, Paterno, Materno",
+            periodo,
+        )
+        query = f"""
+        WITH mes AS (
+            SELECT * REPLACE (COALESCE(origen, fuente) AS origen) FROM ({union})
+            WHERE persona_id IS NOT NULL
+        ),
+        multi AS (
+            SELECT
+                persona_id,
+                COUNT(DISTINCT organismo_nombre) AS num_organismos,
+                SUM(remuliquida_mensual) AS sueldo_total
+            FROM mes
+            GROUP BY persona_id
+            HAVING num_organismos > 1
+        )
+        SELECT
+            {periodo} AS periodo,
+            persona_id,
+            any_value({PERSON_NAME_SQL}) AS nombre,
+            num_organismos,
+            sueldo_total,
+            LIST(DISTINCT organismo_nombre ORDER BY organismo_nombre) AS organismos,
+            LIST(DISTINCT origen ORDER BY origen) AS origenes
+        FROM multi
+        JOIN mes USING (persona_id)
+        GROUP BY persona_id, num_organismos, sueldo_total
+        """
+        return query, params
+
+    def _mark_affected(self, conn, year, month):
+        path = self.partitions.path(year, month)
+        if os.path.exists(path):
+            conn.execute(
+                "INSERT INTO afectados SELECT persona_id FROM read_parquet(?)", [path]
+            )
+
+    def _start(self, conn):
+        conn.execute("CREATE TEMP TABLE afectados (persona_id UBIGINT)")
+
+    def _rebuild_month(self, conn, year, month, present):
+        # People in the month before and after the rebuild get new streaks
+        self._mark_affected(conn, year, month)
+        super()._rebuild_month(conn, year, month, present)
+        self._mark_affected(conn, year, month)
+
+    def _publish(self, conn, full):
+        files = self.partitions.files()
+        if not files:
+            # Nobody ever held two jobs: publish an empty table
+            query, params = "SELECT 1 AS persona_id WHERE false", None
+        elif full:
+            query, params = _STREAKS_SQL.format(where=""), [files]
+        else:
+            # Carry over the streaks of people not in the changed months
+            affected = "SELECT persona_id FROM afectados"
+            query = f"""
+            SELECT * FROM read_parquet(?) WHERE persona_id NOT IN ({affected})
+            UNION ALL BY NAME
+            SELECT * FROM (
+                {_STREAKS_SQL.format(where=f"WHERE persona_id IN ({affected})")}
+            )
+            """
+            params = [self.out_path, files]
+        write_parquet(
+            conn,
+            query,
+            self.out_path,
+            params=params,
+            columns=STREAK_COLUMNS,
+            order_by=STREAK_SORT,
+        )
+
+
+class SalarySketches(MonthlyAuditTable):
+    """Quantile sketches of remuliquida_mensual per organismo x estamento x month.
+
+    The published file has one row per non-empty bucket; `sketch_stats_sql`
+    merges any range of months and reads the statistics back.
+    """
+
+    name = "Salary sketches"
+    columns = SKETCH_COLUMNS
+    order_by = SKETCH_SORT
+
+    def _month_query(self, periodo):
+        union, params = self._union(
+            "organismo_nombre, estamento, remuliquida_mensual", periodo
+        )
+        query = f"""
+        SELECT
+            {periodo} AS periodo,
+            organismo_nombre AS organismo,
+            estamento,
+            CAST(ceil(ln(remuliquida_mensual) / {math.log(SKETCH_GAMMA)!r}) AS SMALLINT)
+                AS bucket,
+            COUNT(*) AS n
+        FROM ({union})
+        WHERE remuliquida_mensual > 0
+        GROUP BY ALL
+        """
+        return query, params
+
+    def _publish(self, conn, full):
+        self.partitions.publish(self.out_path)
+
+
+def sketch_stats_sql(sketch_source="read_parquet(?)", where=""):
+    """SQL with the merged statistics of every organismo x estamento.
+
+    Columns: organismo, estamento, personas, meses, mediana, mad, p90, p99.
+    The statistics are over every salary row of the months merged; personas
+    is the headcount of the busiest of those months, so one person paid for
+    a year counts once, not 12 times. Buckets are read back at their
+    midpoint 2 * gamma^i / (gamma + 1); the MAD is the weighted median of
+    the bucket distances to the median.
+
+    :param sketch_source: Table expression with the SKETCH_COLUMNS rows.
+    :param where: Optional filter on the sketch rows (e.g. a periodo range).
+    """
+    gamma = repr(SKETCH_GAMMA)
+    return f"""
+    WITH filas AS MATERIALIZED (
+        SELECT organismo, estamento, periodo, bucket, n
+        FROM {sketch_source}
+        {where}
+    ),
+    dotacion AS (
+        SELECT organismo, estamento, MAX(n) AS personas, COUNT(*) AS meses
+        FROM (SELECT organismo, estamento, periodo, SUM(n) AS n FROM filas GROUP BY ALL)
+        GROUP BY organismo, estamento
+    ),
+    h AS (
+        SELECT
+            organismo,
+            estamento,
+            2 * pow({gamma}, bucket) / ({gamma} + 1) AS valor,
+            SUM(n) AS n
+        FROM filas
+        GROUP BY organismo, estamento, bucket
+    ),
+    acumulado AS (
+        SELECT
+            *,
+            SUM(n) OVER (PARTITION BY organismo, estamento ORDER BY valor) AS hasta,
+            SUM(n) OVER (PARTITION BY organismo, estamento) AS total
+        FROM h
+    ),
+    cuantiles AS (
+        SELECT
+            organismo,
+            estamento,
+            any_value(total) AS total,
+            MIN(valor) FILTER (WHERE hasta > 0.5 * (total - 1)) AS mediana,
+            MIN(valor) FILTER (WHERE hasta > 0.9 * (total - 1)) AS p90,
+            MIN(valor) FILTER (WHERE hasta > 0.99 * (total - 1)) AS p99
+        FROM acumulado
+        GROUP BY organismo, estamento
+    ),
+    desvios AS (
+        SELECT
+            c.organismo,
+            c.estamento,
+            abs(h.valor - c.mediana) AS desvio,
+            SUM(h.n) OVER (
+                PARTITION BY c.organismo, c.estamento ORDER BY abs(h.valor - c.mediana)
+            ) AS hasta,
+            c.total
+        FROM h
+        JOIN cuantiles c
+            ON h.organismo IS NOT DISTINCT FROM c.organismo
+            AND h.estamento IS NOT DISTINCT FROM c.estamento
+    ),
+    mad AS (
+        SELECT
+            organismo,
+            estamento,
+            MIN(desvio) FILTER (WHERE hasta > 0.5 * (total - 1)) AS mad
+        FROM desvios
+        GROUP BY organismo, estamento
+    )
+    SELECT
+        c.organismo, c.estamento, d.personas, d.meses, c.mediana, m.mad, c.p90, c.p99
+    FROM cuantiles c
+    JOIN mad m
+        ON c.organismo IS NOT DISTINCT FROM m.organismo
+        AND c.estamento IS NOT DISTINCT FROM m.estamento
+    JOIN dotacion d
+        ON c.organismo IS NOT DISTINCT FROM d.organismo
+        AND c.estamento IS NOT DISTINCT FROM d.estamento
+    """
+
+
+class SurnameFrequencies(MonthlyAuditTable):
+    """Distinct people per surname, per organismo and nationally, every month."""
+
+    name = "Surname frequencies"
+    columns = SURNAME_COLUMNS
+    order_by = SURNAME_SORT
+
+    def _month_query(self, periodo):
+        union, params = self._union(
+            "persona_id, organismo_nombre, Paterno, Materno", periodo
+        )
+        query = f"""
+        WITH personas AS (
+            SELECT
+                persona_id,
+                organismo_nombre AS organismo,
+                strip_accents(upper(trim(Paterno))) AS paterno,
+                strip_accents(upper(trim(Materno))) AS materno
+            FROM ({union})
+            WHERE persona_id IS NOT NULL AND organismo_nombre IS NOT NULL
+        ),
+        apellidos AS (
+            SELECT persona_id, organismo, 'paterno' AS tipo, paterno AS apellido
+            FROM personas WHERE length(paterno) > 2
+            UNION ALL
+            SELECT persona_id, organismo, 'materno', materno
+            FROM personas WHERE length(materno) > 2
+            UNION ALL
+            SELECT persona_id, organismo, 'par', paterno || ' ' || materno
+            FROM personas WHERE length(paterno) > 2 AND length(materno) > 2
+            UNION ALL
+            SELECT persona_id, organismo, 'total', NULL FROM personas
+        )
+        SELECT
+            {periodo} AS periodo,
+            organismo,
+            tipo,
+            apellido,
+            COUNT(DISTINCT persona_id) AS n
+        FROM apellidos
+        GROUP BY GROUPING SETS ((organismo, tipo, apellido), (tipo, apellido))
+        HAVING COUNT(DISTINCT persona_id) > 1 OR tipo = 'total'
+        """
+        return query, params
+
+    def _publish(self, conn, full):
+        self.partitions.publish(self.out_path)
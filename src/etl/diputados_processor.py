@@ -1,11 +1,34 @@
 import os
 import glob
+import hashlib
 import logging
 import pandas as pd
-import unicodedata
+
+from etl.app_schema import add_period_columns
+from etl.gastos_store import GastosStore
+from etl.incremental import MonthManifest, MonthPartitions, group_by_month
+from etl.parquet_writer import APP_COLUMNS, APP_SORT, GASTOS_COLUMNS, GASTOS_SORT
+from etl.normalize import search_vectors
 
 logger = logging.getLogger("DiputadosProcessor")
 
+# Raw CSV folders that feed the consolidated outputs
+CATEGORIES = [
+    "personal_apoyo",
+    "personal_planta",
+    "personal_contrata",
+    "personal_honorarios",
+    "diputados_dieta",
+]
+
+
+def _csv_month(path):
+    """(year, month) of a raw CSV named <year>_<mm>.csv"""
+    parts = os.path.basename(path).replace(".csv", "").split("_")
+    if len(parts) == 2 and all(p.isdigit() for p in parts):
+        return int(parts[0]), int(parts[1])
+    return None
+
 
 class DiputadosProcessor:
     def __init__(
@@ -19,6 +42,25 @@ class DiputadosProcessor:
         self.processed_dir = processed_dir
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(self.processed_dir, exist_ok=True)
+        self.gastos_store = GastosStore(
+            os.path.join(self.raw_dir, "gastos_operacionales.duckdb")
+        )
+
+        # Month partitions of every output, rebuilt only when their inputs change
+        self.manifest_path = os.path.join(self.processed_dir, "manifest.json")
+        partitions_dir = os.path.join(self.processed_dir, "partitions")
+        self.partitions = {
+            "consolidado": MonthPartitions(
+                os.path.join(partitions_dir, "consolidado"),
+                columns=APP_COLUMNS,
+                order_by=APP_SORT,
+            ),
+            "gastos_detalle": MonthPartitions(
+                os.path.join(partitions_dir, "gastos_detalle"),
+                columns=GASTOS_COLUMNS,
+                order_by=GASTOS_SORT,
+            ),
+        }
 
         self.meses_map = {
             1: "Enero",
@@ -35,17 +77,6 @@ class DiputadosProcessor:
             12: "Diciembre",
         }
 
-    def _unaccent_lower(self, text):
-        if pd.isna(text) or not str(text).strip():
-            return ""
-        text = str(text).lower()
-        return (
-            unicodedata.normalize("NFKD", text)
-            .encode("ascii", "ignore")
-            .decode("utf-8")
-            .strip()
-        )
-
     def _clean_money(self, series):
         """Converts strings like '1.234.567' to integers."""
         if series is None:
@@ -53,48 +84,60 @@ class DiputadosProcessor:
         s = series.astype(str).str.replace(r"[^\d]", "", regex=True)
         return pd.to_numeric(s, errors="coerce").fillna(0).astype(int)
 
-    def process_gastos_operacionales(self):
-        """Process Gastos Operacionales into a parquet file."""
-        logger.info("Processing Gastos Operacionales...")
-        files = glob.glob(os.path.join(self.raw_dir, "gastos_operacionales", "*.csv"))
-
-        # We need mapping from ID_Diputado to Name.
-        dieta_files = glob.glob(os.path.join(self.raw_dir, "diputados_dieta", "*.csv"))
-        id_to_name = {}
-        for f in dieta_files:
+    def _files(self, subdir, months=None):
+        """Raw CSVs of a folder, optionally only those of the given months."""
+        files = glob.glob(os.path.join(self.raw_dir, subdir, "*.csv"))
+        if months is not None:
+            files = [f for f in files if _csv_month(f) in months]
+        return files
+
+    def _deputy_names(self):
+        """ID_Diputado -> upper-case name, from every dieta CSV (latest file wins)."""
+        frames = []
+        for f in sorted(self._files("diputados_dieta")):
             try:
-                df_d = pd.read_csv(f)
-                if not df_d.empty:
-                    for _, r in df_d.iterrows():
-                        id_to_name[r["ID_Diputado"]] = r["Nombre"].upper()
+                frames.append(pd.read_csv(f, usecols=["ID_Diputado", "Nombre"]))
+            except (ValueError, pd.errors.EmptyDataError):
+                continue
             except Exception as e:
                 logger.error(f"Failed to read dietas file {f}: {e}")
+        if not frames:
+            return pd.Series(dtype=object)
+        names = pd.concat(frames, ignore_index=True).drop_duplicates(
+            "ID_Diputado", keep="last"
+        )
+        return names.set_index("ID_Diputado")["Nombre"].str.upper()
 
-        all_gastos = []
-        for f in files:
-            try:
-                parts = os.path.basename(f).replace(".csv", "").split("_")
-                if len(parts) == 3:
-                    pid, year, month = parts
-                    df = pd.read_csv(f)
-                    if (
-                        not df.empty
-                        and "Concepto" in df.columns
-                        and "Monto" in df.columns
-                    ):
-                        df["anyo"] = int(year)
-                        df["Mes"] = int(month)
-                        df["ID_Diputado"] = int(pid)
-                        all_gastos.append(df)
-            except Exception as e:
-                logger.error(f"Error processing gasto file {f}: {e}")
+    @staticmethod
+    def _names_fingerprint(names):
+        """Content hash of the ID_Diputado -> name map."""
+        digest = hashlib.sha256()
+        for pid, name in sorted(names.items(), key=lambda item: str(item[0])):
+            digest.update(f"{pid}|{name}\n".encode())
+        return digest.hexdigest()
+
+    def process_gastos_operacionales(self, months=None, names=None):
+        """Process Gastos Operacionales of the given months (default: all) into partitions.
+
+        :param names: ID_Diputado -> name map (default: read from the dieta CSVs).
+        """
+        logger.info("Processing Gastos Operacionales...")
+        # Files left by older scrapers are moved into the store first
+        self.gastos_store.import_csv_dir(
+            os.path.join(self.raw_dir, "gastos_operacionales")
+        )
+        if months is None:
+            months = self.gastos_store.months()
 
-        if not all_gastos:
+        df_gastos = self.gastos_store.read(months)
+        if df_gastos.empty:
             logger.warning("No Gastos Operacionales found to process.")
+            self.partitions["gastos_detalle"].remove(months)
             return
 
-        df_gastos = pd.concat(all_gastos, ignore_index=True)
-        df_gastos["llave_senador"] = df_gastos["ID_Diputado"].map(id_to_name)
+        if names is None:
+            names = self._deputy_names()
+        df_gastos["llave_senador"] = df_gastos["ID_Diputado"].map(names)
         df_gastos["gastos_operacionales"] = df_gastos["Concepto"]
         df_gastos["monto"] = self._clean_money(df_gastos["Monto"])
         df_gastos["organismo_nombre"] = "Cámara de Diputadas y Diputados"
@@ -110,18 +153,80 @@ class DiputadosProcessor:
                 "organismo_nombre",
             ]
         ].copy()
+        df_gastos_pq["periodo"] = (
+            df_gastos_pq["anyo"] * 100 + df_gastos_pq["Mes"]
+        ).astype("int32")
 
-        gastos_path = os.path.join(self.output_dir, "diputados_gastos_detalle.parquet")
-        df_gastos_pq.to_parquet(gastos_path, engine="pyarrow", compression="zstd")
-        logger.info(f"Parquet file generated for Gastos: {gastos_path}")
+        self.partitions["gastos_detalle"].replace(
+            df_gastos_pq, months, df_gastos_pq["periodo"]
+        )
+
+    def process_all(self, full_refresh=False):
+        """Reprocesses the months whose raw CSVs changed and republishes the outputs.
 
-    def process_all(self):
+        :param full_refresh: If True, ignores the manifest and rebuilds every month.
+        """
         logger.info("== Starting Data Processing for Camara de Diputados ==")
 
+        self.gastos_store.import_csv_dir(
+            os.path.join(self.raw_dir, "gastos_operacionales")
+        )
+        files = {
+            subdir: group_by_month(self._files(subdir), _csv_month)
+            for subdir in CATEGORIES
+        }
+        gastos_fingerprints = self.gastos_store.month_fingerprints()
+        # Gastos rows are named from every dieta file, so a name that shows up
+        # (or changes) in any month rebuilds all the gastos months
+        names = self._deputy_names()
+        names_fingerprint = self._names_fingerprint(names)
+
+        manifest = MonthManifest(self.manifest_path)
+        if full_refresh:
+            manifest.reset()
+        inputs = {
+            (subdir, year, month): paths
+            for subdir, by_month in files.items()
+            for (year, month), paths in by_month.items()
+        }
+        inputs.update(
+            {
+                (
+                    "gastos_operacionales",
+                    year,
+                    month,
+                ): f"{fingerprint}|{names_fingerprint}"
+                for (year, month), fingerprint in gastos_fingerprints.items()
+            }
+        )
+        changed = manifest.changed_months(inputs)
+        staff_months = set().union(*files.values())
+        gastos_months = set(gastos_fingerprints)
+        # Partitions removed by hand are rebuilt as well
+        changed |= staff_months - self.partitions["consolidado"].months()
+        changed |= gastos_months - self.partitions["gastos_detalle"].months()
+
+        parquet_path = os.path.join(self.output_dir, "diputados_consolidado.parquet")
+        if not changed and os.path.exists(parquet_path):
+            logger.info("Raw CSVs unchanged since the last run. Nothing to do.")
+            return
+
+        months = changed & (staff_months | gastos_months)
+        logger.info(
+            f"Reprocessing {len(months)} of {len(staff_months | gastos_months)} months"
+        )
+        self._process_staff(changed)
+        self.process_gastos_operacionales(changed, names)
+
+        self._publish()
+        manifest.commit()
+
+    def _process_staff(self, months):
+        """Rebuilds the consolidated partitions of the given months."""
         all_dfs = []
 
         # 1. Process Personal de Apoyo
-        apoyo_files = glob.glob(os.path.join(self.raw_dir, "personal_apoyo", "*.csv"))
+        apoyo_files = self._files("personal_apoyo", months)
         for f in apoyo_files:
             try:
                 year, month = os.path.basename(f).replace(".csv", "").split("_")
@@ -153,7 +258,7 @@ class DiputadosProcessor:
             "personal_honorarios": "Personal a Honorarios",
         }
         for subdir, estamento_name in staff_types.items():
-            files = glob.glob(os.path.join(self.raw_dir, subdir, "*.csv"))
+            files = self._files(subdir, months)
             for f in files:
                 try:
                     year, month = os.path.basename(f).replace(".csv", "").split("_")
@@ -198,7 +303,7 @@ class DiputadosProcessor:
                     logger.error(f"Error processing {f}: {e}")
 
         # 3. Process Diputados (Base Salary)
-        dieta_files = glob.glob(os.path.join(self.raw_dir, "diputados_dieta", "*.csv"))
+        dieta_files = self._files("diputados_dieta", months)
         for f in dieta_files:
             try:
                 year, month = os.path.basename(f).replace(".csv", "").split("_")
@@ -217,6 +322,7 @@ class DiputadosProcessor:
 
         if not all_dfs:
             logger.warning("No Camara data found to process.")
+            self.partitions["consolidado"].remove(months)
             return
 
         # Combine all
@@ -245,8 +351,9 @@ class DiputadosProcessor:
 
         # Mapping for the final output
         df_app = pd.DataFrame()
-        df_app["organismo_nombre"] = "Cámara de Diputadas y Diputados"
         df_app["anyo"] = df_final["anyo"]
+        # Assigned after 'anyo' so the scalar broadcasts over the existing rows
+        df_app.insert(0, "organismo_nombre", "Cámara de Diputadas y Diputados")
         df_app["Mes"] = df_final["Mes_id"].map(self.meses_map)
         df_app["estamento"] = df_final["estamento"]
         df_app["Nombres"] = df_final["Nombres"].astype(str)
@@ -256,25 +363,26 @@ class DiputadosProcessor:
         df_app["remuliquida_mensual"] = df_final["remuliquida_mensual"]
         df_app["remuneracionbruta_mensual"] = df_final["remuneracionbruta_mensual"]
         df_app["origen"] = "Cámara de Diputados"
+        add_period_columns(df_app, df_final["Mes_id"])
 
-        df_app["search_vector"] = df_app.apply(
-            lambda x: self._unaccent_lower(
-                f"{x['Nombres']} {x['Paterno']} {x['Materno']}"
-            ),
-            axis=1,
-        )
+        df_app["search_vector"] = search_vectors(df_app)
 
         # Drop completely empty rows where there is no name
         df_app = df_app[df_app["Nombres"].str.strip() != ""]
 
+        self.partitions["consolidado"].replace(df_app, months, df_app["periodo"])
+
+    def _publish(self):
+        """Assembles the month partitions into the files read by the app."""
         # Export to CSV for Analysts
         csv_path = os.path.join(self.processed_dir, "diputados_consolidado.csv")
-        df_app.to_csv(csv_path, index=False)
+        self.partitions["consolidado"].publish(csv_path, file_format="csv")
 
         # Export to Parquet for Web App
         parquet_path = os.path.join(self.output_dir, "diputados_consolidado.parquet")
-        df_app.to_parquet(parquet_path, engine="pyarrow", compression="zstd")
+        if self.partitions["consolidado"].publish(parquet_path):
+            logger.info(f"🎉 Parquet file generated for Web App: {parquet_path}")
 
-        self.process_gastos_operacionales()
-
-        logger.info(f"🎉 Parquet file generated for Web App: {parquet_path}")
+        gastos_path = os.path.join(self.output_dir, "diputados_gastos_detalle.parquet")
+        if self.partitions["gastos_detalle"].publish(gastos_path):
+            logger.info(f"Parquet file generated for Gastos: {gastos_path}")
@@ -1,20 +1,232 @@
+import datetime
+import html
+import json
 import os
+import queue
+import threading
 import time
 import logging
 import requests
 import re
-from bs4 import BeautifulSoup
 import pandas as pd
 from tqdm import tqdm
 
+from core.rate_limit import BlockingTokenBucket
+from etl.gastos_store import GastosStore
+from etl.html_extract import extract_page
+from etl.job_journal import JobJournal
+
 logger = logging.getLogger("DiputadosScraper")
 
+# Overridable with CAMARA_BASE_URL (e.g. a local mock for benchmarks)
+BASE_URL = "https://www.camara.cl"
+GASTOS_PATH = "/diputados/detalle/gastosoperacionales.aspx?prmId=1096"
+DEPUTIES_PATH = "/diputados/diputados.aspx"
+PROFILE_PATH = "/diputados/detalle/mociones.aspx?prmID={pid}"
+# (category, form page) of the staff tables downloaded by run_all
+STAFF_TABLES = [
+    ("personal_apoyo", "/transparencia/personalapoyogral.aspx"),
+    ("personal_planta", "/transparencia/funcionariosplanta.aspx"),
+    ("personal_contrata", "/transparencia/funcionarios.aspx"),
+    ("personal_honorarios", "/transparencia/honorarios.aspx"),
+]
+PROFILE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+    "Accept-Language": "es-CL,es;q=0.9,en;q=0.8",
+}
+# The listing is re-read after ROSTER_TTL; a profile name after PROFILE_TTL
+ROSTER_TTL = datetime.timedelta(days=1)
+PROFILE_TTL = datetime.timedelta(days=180)
+
+# Politeness limits of the gastos worker pool: parallel sessions, and the
+# requests per second they share
+GASTOS_WORKERS = 4
+GASTOS_REQUESTS_PER_SECOND = 2.0
+
+_PREFIX = "ctl00$ctl00$ctl00$ContentPlaceHolder1$ContentPlaceHolder1$"
+_DDL_MES = f"{_PREFIX}DetallePlaceHolder$ddlMes"
+_FORM_FIELDS = ("__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION")
+
+
+class DeputyRoster:
+    """Deputies seen on the Cámara listing, persisted as JSON.
+
+    Each deputy keeps its profile name, when the name was fetched and the
+    first and last day it appeared on the listing (its observed period of
+    service). Deputies who leave stay in the roster but are no longer active.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, ttl=ROSTER_TTL, profile_ttl=PROFILE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.profile_ttl = profile_ttl
+        self.listing_checked_at = None
+        self.active = []
+        self.deputies = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    content = json.load(f)
+                if content.get("version") == self.VERSION:
+                    self.listing_checked_at = content.get("listing_checked_at")
+                    self.active = content.get("active", [])
+                    self.deputies = content.get("deputies", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable roster {path}: {e}")
+
+    @staticmethod
+    def _now():
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    def _expired(self, timestamp, ttl):
+        if not timestamp:
+            return True
+        return self._now() - datetime.datetime.fromisoformat(timestamp) > ttl
+
+    def listing_expired(self):
+        return self._expired(self.listing_checked_at, self.ttl)
+
+    def mark_active(self, ids):
+        """Records the IDs of a fresh listing."""
+        now = self._now()
+        today = now.date().isoformat()
+        self.listing_checked_at = now.isoformat(timespec="seconds")
+        self.active = sorted(ids)
+        for pid in self.active:
+            entry = self.deputies.setdefault(pid, {"first_seen": today})
+            entry["last_seen"] = today
+
+    def stale_profiles(self):
+        """Active IDs whose name is missing or older than the profile TTL."""
+        return [
+            pid
+            for pid in self.active
+            if not self.deputies.get(pid, {}).get("name")
+            or self._expired(self.deputies[pid].get("fetched_at"), self.profile_ttl)
+        ]
+
+    def set_name(self, pid, name):
+        entry = self.deputies.setdefault(pid, {})
+        entry["name"] = name
+        entry["fetched_at"] = self._now().isoformat(timespec="seconds")
+
+    def active_names(self):
+        return {
+            pid: self.deputies[pid]["name"]
+            for pid in self.active
+            if self.deputies.get(pid, {}).get("name")
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.VERSION,
+                    "listing_checked_at": self.listing_checked_at,
+                    "active": self.active,
+                    "deputies": self.deputies,
+                },
+                f,
+                indent=2,
+                ensure_ascii=False,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+
+class _GastosWorker:
+    """One thread's session and form state on the gastos page.
+
+    The form state is loaded once and then follows the partial postbacks,
+    as a browser would; it is reloaded only after a failed request.
+    """
+
+    def __init__(self, url, bucket, journal, category):
+        self.url = url
+        self.bucket = bucket
+        self.journal = journal
+        self.category = category
+        self.session = requests.Session()
+        self.session.headers.update(
+            {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+        )
+        self.state = None
+
+    def _load_state(self):
+        self.bucket.acquire()
+        res = self.session.get(self.url, timeout=30)
+        res.raise_for_status()
+        self.state = extract_page(res.text).hidden
+
+    def fetch(self, year, month, pid):
+        """Expense table of a deputy-month (empty if none), or None on failure."""
+        try:
+            if self.state is None:
+                self._load_state()
+            payload = {
+                "ctl00$ctl00$ctl00$ScriptManager2": f"{_PREFIX}DetallePlaceHolder$UpdatePanel1|{_DDL_MES}",
+                "__EVENTTARGET": _DDL_MES,
+                "__EVENTARGUMENT": "",
+                **self.state,
+                f"{_PREFIX}ddlDiputados": str(pid),
+                _DDL_MES: str(month),
+                f"{_PREFIX}DetallePlaceHolder$ddlAno": str(year),
+            }
+            headers = {
+                "X-Requested-With": "XMLHttpRequest",
+                "X-MicrosoftAjax": "Delta=true",
+            }
+            self.bucket.acquire()
+            post_res = self.session.post(
+                self.url, data=payload, headers=headers, timeout=30
+            )
+            post_res.raise_for_status()
+            page = extract_page(post_res.text)
+            self.state.update(page.hidden)
+            # Chilean amounts use '.' for thousands ('61.130')
+            df = page.table(thousands=".", decimal=",")
+            return pd.DataFrame() if df is None else df
+        except Exception as e:
+            logger.warning(f"Gastos {month}/{year} for deputy {pid} failed: {e}")
+            self.state = None
+            return None
+
+    def run(self, tasks, results):
+        """Takes (year, month, pid) tasks until a None sentinel.
+
+        Each task is journaled as running before its request is sent, so a
+        stuck request shows up in the journal. Puts (year, month, pid, df)
+        results.
+        """
+        while (task := tasks.get()) is not None:
+            self.journal.start("camara", self.category, *task)
+            results.put((*task, self.fetch(*task)))
+
 
 class DiputadosScraper:
-    def __init__(self, start_year=2024, end_year=2024, force_refresh=False):
+    def __init__(
+        self,
+        start_year=2024,
+        end_year=2024,
+        force_refresh=False,
+        workers=GASTOS_WORKERS,
+        requests_per_second=GASTOS_REQUESTS_PER_SECOND,
+        journal=None,
+        base_url=None,
+    ):
         self.start_year = start_year
         self.end_year = end_year
         self.force_refresh = force_refresh
+        self.workers = workers
+        self.requests_per_second = requests_per_second
+        self.base_url = (
+            base_url or os.environ.get("CAMARA_BASE_URL") or BASE_URL
+        ).rstrip("/")
         self.base_dir = os.path.join("data", "raw", "diputados")
         os.makedirs(self.base_dir, exist_ok=True)
         self.session = requests.Session()
@@ -22,130 +234,154 @@ class DiputadosScraper:
             {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
         )
         self.cached_deputies = None
+        self.journal = journal or JobJournal()
+        self.roster = DeputyRoster(os.path.join(self.base_dir, "roster.json"))
+        # Expense rows of every deputy and month, in one local DuckDB table
+        self.gastos_store = GastosStore(
+            os.path.join(self.base_dir, "gastos_operacionales.duckdb")
+        )
+        self.gastos_store.import_csv_dir(
+            os.path.join(self.base_dir, "gastos_operacionales")
+        )
 
     def _get_form_state(self, url):
         res = self.session.get(url)
-        soup = BeautifulSoup(res.text, "html.parser")
-        state = {}
-        for hidden in ["__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION"]:
-            el = soup.find("input", {"id": hidden})
-            if el:
-                state[hidden] = el.get("value", "")
-
-        selects = soup.find_all("select")
-        state["year_field"] = next(
-            (s.get("name") for s in selects if "ddlAno" in s.get("name", "")), None
-        )
-        state["month_field"] = next(
-            (s.get("name") for s in selects if "ddlMes" in s.get("name", "")), None
-        )
+        page = extract_page(res.text)
+        state = {k: v for k, v in page.hidden.items() if k in _FORM_FIELDS}
+        state["year_field"] = page.select_name("ddlAno")
+        state["month_field"] = page.select_name("ddlMes")
         return state
 
     def fetch_table(self, category_name: str, url: str):
         logger.info(f"== Starting extraction for {category_name} ==")
         category_dir = os.path.join(self.base_dir, category_name)
         os.makedirs(category_dir, exist_ok=True)
-        total_months = (self.end_year - self.start_year + 1) * 12
-        pbar = tqdm(total=total_months, desc=category_name)
+
+        def csv_path(year, month):
+            return os.path.join(category_dir, f"{year}_{month:02d}.csv")
+
+        wanted = [
+            (year, month, "")
+            for year in range(self.start_year, self.end_year + 1)
+            for month in range(1, 13)
+            if self.force_refresh or not os.path.exists(csv_path(year, month))
+        ]
+        self.journal.submit("camara", category_name, wanted, reset=self.force_refresh)
+        months = self.journal.due("camara", category_name, keys=wanted)
+        if len(months) < len(wanted):
+            logger.info(
+                f"{category_name}: {len(wanted) - len(months)} failed months wait for a retry"
+            )
+        if not months:
+            return
         state = self._get_form_state(url)
         if not state.get("year_field") or not state.get("month_field"):
             logger.error(f"Could not find year/month dropdowns for {url}")
             return
 
-        for year in range(self.start_year, self.end_year + 1):
-            for month in range(1, 13):
-                pbar.set_postfix({"Year": year, "Month": f"{month:02d}"})
-                csv_path = os.path.join(category_dir, f"{year}_{month:02d}.csv")
-                if not self.force_refresh and os.path.exists(csv_path):
-                    pbar.update(1)
-                    continue
-
-                payload = {
-                    "__VIEWSTATE": state.get("__VIEWSTATE", ""),
-                    "__VIEWSTATEGENERATOR": state.get("__VIEWSTATEGENERATOR", ""),
-                    "__EVENTVALIDATION": state.get("__EVENTVALIDATION", ""),
-                    state["year_field"]: str(year),
-                    state["month_field"]: str(month),
-                    "__EVENTTARGET": state["month_field"],
-                    "__EVENTARGUMENT": "",
-                }
+        pbar = tqdm(total=len(months), desc=category_name)
+        for year, month, _ in months:
+            pbar.set_postfix({"Year": year, "Month": f"{month:02d}"})
+            payload = {
+                "__VIEWSTATE": state.get("__VIEWSTATE", ""),
+                "__VIEWSTATEGENERATOR": state.get("__VIEWSTATEGENERATOR", ""),
+                "__EVENTVALIDATION": state.get("__EVENTVALIDATION", ""),
+                state["year_field"]: str(year),
+                state["month_field"]: str(month),
+                "__EVENTTARGET": state["month_field"],
+                "__EVENTARGUMENT": "",
+            }
 
-                try:
-                    res = self.session.post(url, data=payload)
-                    soup = BeautifulSoup(res.text, "html.parser")
-                    for hidden in [
-                        "__VIEWSTATE",
-                        "__VIEWSTATEGENERATOR",
-                        "__EVENTVALIDATION",
-                    ]:
-                        el = soup.find("input", {"id": hidden})
-                        if el:
-                            state[hidden] = el.get("value", "")
-
-                    tables = soup.find_all("table")
-                    if tables:
-                        df = pd.read_html(str(tables[0]))[0]
-                        df.columns = [
-                            str(c).strip().replace("\n", " ") for c in df.columns
-                        ]
-                        df.to_csv(csv_path, index=False)
-                    else:
-                        pd.DataFrame().to_csv(csv_path, index=False)
-                except Exception as e:
-                    logger.error(
-                        f"Error extracting {category_name} for {month}/{year}: {e}"
-                    )
+            self.journal.start("camara", category_name, year, month)
+            try:
+                res = self.session.post(url, data=payload, timeout=60)
+                res.raise_for_status()
+                # One parse for the next form state and the month's table
+                page = extract_page(res.text)
+                state.update(
+                    (k, v) for k, v in page.hidden.items() if k in _FORM_FIELDS
+                )
+                df = page.table()
+                if df is None:
+                    df = pd.DataFrame()
+                df.to_csv(csv_path(year, month), index=False)
+                self.journal.finish(
+                    "camara", category_name, year, month, records=len(df)
+                )
+            except Exception as e:
+                logger.error(
+                    f"Error extracting {category_name} for {month}/{year}: {e}"
+                )
+                self.journal.fail("camara", category_name, year, month, error=e)
 
-                time.sleep(1)
-                pbar.update(1)
+            time.sleep(1)
+            pbar.update(1)
         pbar.close()
 
-    def _cache_active_deputies(self):
-        if self.cached_deputies is not None:
-            return self.cached_deputies
-        logger.info("Caching active Deputies names to avoid rate limiting...")
-        url = "https://www.camara.cl/diputados/diputados.aspx"
+    def _fetch_listing(self):
+        """IDs on the current deputies listing, or None if it failed."""
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-                "Accept-Language": "es-CL,es;q=0.9,en;q=0.8",
-            }
-            res = requests.get(url, headers=headers)
+            res = requests.get(
+                self.base_url + DEPUTIES_PATH, headers=PROFILE_HEADERS, timeout=30
+            )
             res.raise_for_status()
         except Exception as e:
             logger.error(f"Failed to fetch initial deputies list: {e}")
-            self.cached_deputies = {}
-            return self.cached_deputies
-
+            return None
         matches = re.findall(
             r'href="detalle/mociones\.aspx\?prmID=(\d+)"[^>]*>([^<]*)<', res.text
         )
-        ids = list(set([pid for pid, name in matches if name.strip()]))
-        logger.info(
-            f"Found {len(ids)} deputies. Fetching individual profiles politely..."
-        )
-        real_names = {}
-        for pid in tqdm(ids, desc="Fetching profiles"):
-            try:
-                prof_url = (
-                    f"https://www.camara.cl/diputados/detalle/mociones.aspx?prmID={pid}"
-                )
-                prof_res = requests.get(prof_url, headers=headers)
-                if prof_res.status_code != 200:
-                    time.sleep(2)
-                    continue
-                soup = BeautifulSoup(prof_res.text, "html.parser")
-                h2 = soup.find("h2")
-                if h2:
-                    name = h2.text.strip()
-                    name = re.sub(r"^[Dd]iputad[oa]\s+", "", name)
-                    real_names[pid] = name
-            except Exception:
-                pass
+        return sorted({pid for pid, name in matches if name.strip()})
+
+    def _fetch_profile_name(self, pid):
+        """Name on a deputy's profile page, or None."""
+        try:
+            prof_res = requests.get(
+                self.base_url + PROFILE_PATH.format(pid=pid),
+                headers=PROFILE_HEADERS,
+                timeout=30,
+            )
+            if prof_res.status_code != 200:
+                time.sleep(2)
+                return None
+            h2 = re.search(
+                r"<h2[^>]*>(.*?)</h2>", prof_res.text, re.IGNORECASE | re.DOTALL
+            )
+            if h2:
+                text = html.unescape(re.sub(r"<[^>]+>", "", h2.group(1)))
+                return re.sub(r"^[Dd]iputad[oa]\s+", "", " ".join(text.split()))
+        except Exception:
+            pass
+        return None
+
+    def _cache_active_deputies(self):
+        """{id: name} of the deputies on the current listing.
+
+        Backed by the roster on disk: the listing is re-read once its TTL
+        expires, and only profiles that are new (or older than the profile
+        TTL) are fetched, so a weekly run normally makes no profile requests.
+        """
+        if self.cached_deputies is not None:
+            return self.cached_deputies
+
+        if self.force_refresh or self.roster.listing_expired():
+            ids = self._fetch_listing()
+            if ids is not None:
+                self.roster.mark_active(ids)
+        to_fetch = self.roster.stale_profiles()
+        if to_fetch:
+            logger.info(
+                f"Fetching {len(to_fetch)} new or stale deputy profiles politely..."
+            )
+        for pid in tqdm(to_fetch, desc="Fetching profiles", disable=not to_fetch):
+            name = self._fetch_profile_name(pid)
+            if name:
+                self.roster.set_name(pid, name)
             time.sleep(0.5)
+        self.roster.save()
 
-        self.cached_deputies = real_names
+        self.cached_deputies = self.roster.active_names()
+        logger.info(f"{len(self.cached_deputies)} active deputies in the roster")
         return self.cached_deputies
 
     def fetch_diputados_activos(self, year, month):
@@ -172,91 +408,106 @@ class DiputadosScraper:
             )
         pd.DataFrame(data).to_csv(csv_path, index=False)
 
-    def fetch_gastos_operacionales(self, year, month):
-        logger.info(f"Fetching Gastos Operacionales for {month}/{year}...")
-        out_dir = os.path.join(self.base_dir, "gastos_operacionales")
-        os.makedirs(out_dir, exist_ok=True)
+    def fetch_gastos(self, months):
+        """Downloads the operational expenses of every deputy for `months`.
+
+        (month, deputy) tasks go to a pool of `workers` threads, each with its
+        own session and ASP.NET form state, sharing one politeness budget of
+        `requests_per_second`. The store's `fetched` table is the checkpoint:
+        deputies already fetched are skipped, so an interrupted backfill
+        resumes where it stopped. Failed requests are journaled and retried
+        on a later run, once their backoff has passed.
+        """
         real_names = self._cache_active_deputies()
         if not real_names:
             return
-        url = "https://www.camara.cl/diputados/detalle/gastosoperacionales.aspx?prmId=1096"
-        try:
-            res = self.session.get(url)
-            soup = BeautifulSoup(res.text, "html.parser")
-            state = {
-                i.get("id"): i.get("value", "")
-                for i in soup.find_all("input", id=True)
-                if i.get("id").startswith("__")
-            }
-        except Exception:
+
+        wanted = []
+        for year, month in months:
+            done = (
+                set()
+                if self.force_refresh
+                else self.gastos_store.fetched_ids(year, month)
+            )
+            wanted += [(year, month, pid) for pid in real_names if int(pid) not in done]
+        category = "gastos_operacionales"
+        self.journal.submit("camara", category, wanted, reset=self.force_refresh)
+        due = self.journal.due("camara", category, keys=wanted)
+        if len(due) < len(wanted):
+            logger.info(
+                f"Gastos: {len(wanted) - len(due)} failed deputy-months wait for a retry"
+            )
+        total = len(due)
+        if not total:
             return
+        tasks = queue.Queue()
+        for task in due:
+            tasks.put(task)
+        logger.info(
+            f"Fetching Gastos Operacionales: {total} deputy-months with {self.workers} workers"
+        )
 
-        pbar = tqdm(total=len(real_names), desc=f"Gastos {month}/{year}")
-        for pid, name in real_names.items():
-            csv_path = os.path.join(out_dir, f"{pid}_{year}_{month:02d}.csv")
-            if not self.force_refresh and os.path.exists(csv_path):
-                pbar.update(1)
-                continue
+        bucket = BlockingTokenBucket(self.requests_per_second)
+        results = queue.Queue()
+        threads = [
+            threading.Thread(
+                target=_GastosWorker(
+                    self.base_url + GASTOS_PATH, bucket, self.journal, category
+                ).run,
+                args=(tasks, results),
+                daemon=True,
+            )
+            for _ in range(min(self.workers, total))
+        ]
+        for thread in threads:
+            tasks.put(None)
+            thread.start()
 
-            payload = {
-                "ctl00$ctl00$ctl00$ScriptManager2": "ctl00$ctl00$ctl00$ContentPlaceHolder1$ContentPlaceHolder1$DetallePlaceHolder$UpdatePanel1|ctl00$ctl00$ctl00$ContentPlaceHolder1$ContentPlaceHolder1$DetallePlaceHolder$ddlMes",
-                "__EVENTTARGET": "ctl00$ctl00$ctl00$ContentPlaceHolder1$ContentPlaceHolder1$DetallePlaceHolder$ddlMes",
-                "__EVENTARGUMENT": "",
-                **state,
-                "ctl00$ctl00$ctl00$ContentPlaceHolder1$ContentPlaceHolder1$ddlDiputados": str(
-                    pid
-                ),
-                "ctl00$ctl00$ctl00$ContentPlaceHolder1$ContentPlaceHolder1$DetallePlaceHolder$ddlMes": str(
-                    month
-                ),
-                "ctl00$ctl00$ctl00$ContentPlaceHolder1$ContentPlaceHolder1$DetallePlaceHolder$ddlAno": str(
-                    year
-                ),
-            }
-            headers = {
-                "X-Requested-With": "XMLHttpRequest",
-                "X-MicrosoftAjax": "Delta=true",
-            }
-            try:
-                post_res = self.session.post(url, data=payload, headers=headers)
-                html_match = re.search(
-                    r"<table.*?>.*?</table>", post_res.text, re.IGNORECASE | re.DOTALL
-                )
-                if html_match:
-                    df = pd.read_html(html_match.group(0))[0]
-                    df.columns = [str(c).strip().replace("\n", " ") for c in df.columns]
-                    df["ID_Diputado"] = pid
-                    df.to_csv(csv_path, index=False)
+        # Rows are written to the store from this thread, in batches per month
+        pending = {}
+        pbar = tqdm(total=total, desc="Gastos")
+        try:
+            for _ in range(total):
+                year, month, pid, df = results.get()
+                if df is None:
+                    self.journal.fail(
+                        "camara", category, year, month, pid, error="request failed"
+                    )
                 else:
-                    pd.DataFrame().to_csv(csv_path, index=False)
-            except Exception:
-                pass
-            time.sleep(0.5)
-            pbar.update(1)
-        pbar.close()
+                    self.journal.finish(
+                        "camara", category, year, month, pid, records=len(df)
+                    )
+                    batch = pending.setdefault((year, month), {})
+                    batch[pid] = df
+                    if len(batch) >= 20:
+                        self.gastos_store.upsert_many(
+                            year, month, pending.pop((year, month))
+                        )
+                pbar.update(1)
+        finally:
+            for (year, month), batch in pending.items():
+                self.gastos_store.upsert_many(year, month, batch)
+            pbar.close()
+        for thread in threads:
+            thread.join()
+
+    def fetch_gastos_operacionales(self, year, month):
+        self.fetch_gastos([(year, month)])
 
     def run_all(self):
-        self.fetch_table(
-            "personal_apoyo",
-            "https://www.camara.cl/transparencia/personalapoyogral.aspx",
-        )
-        self.fetch_table(
-            "personal_planta",
-            "https://www.camara.cl/transparencia/funcionariosplanta.aspx",
-        )
-        self.fetch_table(
-            "personal_contrata", "https://www.camara.cl/transparencia/funcionarios.aspx"
-        )
-        self.fetch_table(
-            "personal_honorarios", "https://www.camara.cl/transparencia/honorarios.aspx"
-        )
+        for category_name, path in STAFF_TABLES:
+            self.fetch_table(category_name, self.base_url + path)
 
         logger.info("Pre-fetching all active deputy names...")
         self._cache_active_deputies()
 
         logger.info("Generating Dieta and Gastos per month...")
-        for year in range(self.start_year, self.end_year + 1):
-            for month in range(1, 13):
-                self.fetch_diputados_activos(year, month)
-                self.fetch_gastos_operacionales(year, month)
+        months = [
+            (year, month)
+            for year in range(self.start_year, self.end_year + 1)
+            for month in range(1, 13)
+        ]
+        for year, month in months:
+            self.fetch_diputados_activos(year, month)
+        self.fetch_gastos(months)
         logger.info("== Extraction successfully completed ==")
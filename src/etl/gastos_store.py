@@ -0,0 +1,191 @@
+"""Consolidated store for the Cámara operational expenses (gastos operacionales).
+
+The scraper used to write one CSV per deputy per month. Rows now go to a
+single local DuckDB table, replaced per (year, month, deputy) so re-fetching
+a deputy is idempotent. A second table records every fetch, including those
+that returned no rows, which is what the scraper uses to skip work.
+"""
+
+import glob
+import logging
+import os
+
+import duckdb
+import pandas as pd
+
+logger = logging.getLogger("GastosStore")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS gastos (
+    anyo SMALLINT NOT NULL,
+    mes UTINYINT NOT NULL,
+    id_diputado INTEGER NOT NULL,
+    fila INTEGER NOT NULL,
+    concepto VARCHAR,
+    monto VARCHAR,
+    PRIMARY KEY (anyo, mes, id_diputado, fila)
+);
+CREATE TABLE IF NOT EXISTS fetched (
+    anyo SMALLINT NOT NULL,
+    mes UTINYINT NOT NULL,
+    id_diputado INTEGER NOT NULL,
+    filas INTEGER NOT NULL,
+    fetched_at TIMESTAMP NOT NULL DEFAULT current_timestamp,
+    PRIMARY KEY (anyo, mes, id_diputado)
+);
+"""
+
+
+class GastosStore:
+    """DuckDB-backed table of expense rows keyed by (year, month, deputy)."""
+
+    def __init__(self, path="data/raw/diputados/gastos_operacionales.duckdb"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(SCHEMA)
+
+    def _connect(self):
+        return duckdb.connect(self.path)
+
+    def fetched_ids(self, year, month):
+        """Deputies already fetched for a month (with or without rows)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id_diputado FROM fetched WHERE anyo = ? AND mes = ?",
+                [year, month],
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def upsert(self, year, month, pid, df):
+        """Replaces the rows of a deputy-month with df (Concepto/Monto columns)."""
+        self.upsert_many(year, month, {pid: df})
+
+    def upsert_many(self, year, month, frames):
+        """Replaces several deputy-months of one month in a single transaction."""
+        if not frames:
+            return
+        batches = []
+        for pid, df in frames.items():
+            if df is None or df.empty or "Concepto" not in df.columns:
+                continue
+            batches.append(
+                pd.DataFrame(
+                    {
+                        "anyo": year,
+                        "mes": month,
+                        "id_diputado": int(pid),
+                        "fila": range(len(df)),
+                        "concepto": df["Concepto"].astype("string").to_numpy(),
+                        "monto": df["Monto"].astype("string").to_numpy()
+                        if "Monto" in df.columns
+                        else None,
+                    }
+                )
+            )
+        rows = pd.concat(batches, ignore_index=True) if batches else None
+        fetched = pd.DataFrame(
+            {
+                "anyo": year,
+                "mes": month,
+                "id_diputado": [int(pid) for pid in frames],
+                "filas": [
+                    0 if df is None or "Concepto" not in df.columns else len(df)
+                    for df in frames.values()
+                ],
+            }
+        )
+
+        with self._connect() as conn:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.register("fetched_df", fetched)
+                conn.execute(
+                    """
+                    DELETE FROM gastos WHERE anyo = ? AND mes = ?
+                    AND id_diputado IN (SELECT id_diputado FROM fetched_df)
+                    """,
+                    [year, month],
+                )
+                if rows is not None:
+                    conn.register("rows_df", rows)
+                    conn.execute("INSERT INTO gastos SELECT * FROM rows_df")
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO fetched (anyo, mes, id_diputado, filas)
+                    SELECT anyo, mes, id_diputado, filas FROM fetched_df
+                    """
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def months(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT anyo, mes FROM fetched").fetchall()
+        return {(int(y), int(m)) for y, m in rows}
+
+    def month_fingerprints(self):
+        """{(year, month): content hash} of the stored rows, for the month manifest."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT f.anyo, f.mes, md5(coalesce(string_agg(
+                    concat_ws('|', g.id_diputado, g.fila, g.concepto, g.monto), chr(10)
+                    ORDER BY g.id_diputado, g.fila
+                ), '')) AS fingerprint
+                FROM (SELECT DISTINCT anyo, mes FROM fetched) f
+                LEFT JOIN gastos g USING (anyo, mes)
+                GROUP BY f.anyo, f.mes
+                """
+            ).fetchall()
+        return {(int(y), int(m)): fp for y, m, fp in rows}
+
+    def read(self, months=None):
+        """Rows of the given months (default: all) as a DataFrame."""
+        query = """
+            SELECT anyo::INTEGER AS anyo, mes::INTEGER AS Mes, id_diputado AS ID_Diputado,
+                   concepto AS Concepto, monto AS Monto
+            FROM gastos
+        """
+        params = []
+        if months is not None:
+            periodos = sorted(year * 100 + month for year, month in months)
+            if not periodos:
+                query += " WHERE false"
+            else:
+                query += " WHERE anyo::INTEGER * 100 + mes IN (SELECT unnest(?))"
+                params = [periodos]
+        query += " ORDER BY anyo, mes, id_diputado, fila"
+        with self._connect() as conn:
+            return conn.execute(query, params).df()
+
+    def import_csv_dir(self, csv_dir):
+        """Moves legacy {pid}_{year}_{mm}.csv files into the store.
+
+        Each file is upserted and then deleted. Returns the number imported.
+        """
+        files = sorted(glob.glob(os.path.join(csv_dir, "*.csv")))
+        by_month = {}
+        for f in files:
+            parts = os.path.basename(f).replace(".csv", "").split("_")
+            if len(parts) != 3 or not all(p.isdigit() for p in parts):
+                continue
+            pid, year, month = (int(p) for p in parts)
+            try:
+                # As text: '61.130' must not become the float 61.13
+                df = pd.read_csv(f, dtype=str)
+            except pd.errors.EmptyDataError:
+                df = pd.DataFrame()
+            by_month.setdefault((year, month), {})[pid] = (f, df)
+
+        for (year, month), entries in sorted(by_month.items()):
+            self.upsert_many(year, month, {pid: df for pid, (_, df) in entries.items()})
+            for f, _ in entries.values():
+                os.remove(f)
+
+        imported = sum(len(entries) for entries in by_month.values())
+        if imported:
+            logger.info(f"Imported {imported} legacy gastos CSVs into {self.path}")
+        return imported
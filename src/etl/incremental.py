@@ -0,0 +1,212 @@
+"""Month-level incremental processing helpers.
+
+A `MonthManifest` stores a fingerprint of the raw inputs of every
+(category, year, month). Processors only rebuild the months whose inputs
+changed, write them as one replaceable Parquet partition per month
+(`MonthPartitions`) and then assemble the published files from the
+partitions, which is cheap compared to re-parsing the raw history.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+import duckdb
+
+from etl.parquet_writer import write_dataframe, write_parquet
+
+logger = logging.getLogger("Incremental")
+
+MANIFEST_VERSION = 1
+
+
+def file_fingerprint(path, chunk_size=1024 * 1024):
+    """Content hash of a file (re-downloading identical data is not a change)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def inputs_fingerprint(paths):
+    """Fingerprint of a set of files, independent of their order."""
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode("utf-8"))
+        digest.update(file_fingerprint(path).encode("ascii"))
+    return digest.hexdigest()
+
+
+def group_by_month(paths, parse_month):
+    """{(year, month): [paths]} using parse_month(path) -> (year, month) or None."""
+    months = {}
+    for path in paths:
+        month = parse_month(path)
+        if month is not None:
+            months.setdefault(month, []).append(path)
+    return months
+
+
+class MonthManifest:
+    """Fingerprints of the raw inputs per (category, year, month), kept as JSON."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._pending = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    content = json.load(f)
+                if content.get("version") == MANIFEST_VERSION:
+                    self.entries = content.get("months", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+
+    @staticmethod
+    def key(category, year, month):
+        return f"{category}/{year}/{month:02d}"
+
+    @staticmethod
+    def _month_of(key):
+        _, year, month = key.rsplit("/", 2)
+        return int(year), int(month)
+
+    def changed_months(self, inputs):
+        """Months whose inputs differ from the manifest.
+
+        `inputs` maps (category, year, month) to the raw files of that month,
+        or to a precomputed fingerprint string for inputs that are not files.
+        A month also counts as changed when a category it had disappeared.
+        The new fingerprints are kept until `commit()`.
+        """
+        self._pending = {
+            self.key(category, year, month): paths
+            if isinstance(paths, str)
+            else inputs_fingerprint(paths)
+            for (category, year, month), paths in inputs.items()
+        }
+        changed = {
+            self._month_of(key)
+            for key, fingerprint in self._pending.items()
+            if self.entries.get(key) != fingerprint
+        }
+        changed |= {
+            self._month_of(key) for key in self.entries if key not in self._pending
+        }
+        return changed
+
+    def commit(self):
+        """Records the fingerprints of the last `changed_months` call and saves."""
+        self.entries = self._pending
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": MANIFEST_VERSION, "months": self.entries},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        """Forgets every fingerprint (next run reprocesses everything)."""
+        self.entries = {}
+
+
+class MonthPartitions:
+    """One Parquet file per month (<root>/<YYYYMM>.parquet), replaced as a unit.
+
+    `columns` and `order_by` are passed to the shared Parquet writer for both
+    the partitions and the published file.
+    """
+
+    def __init__(self, root, columns=None, order_by=None):
+        self.root = root
+        self.columns = columns
+        self.order_by = order_by
+
+    def path(self, year, month):
+        return os.path.join(self.root, f"{year}{month:02d}.parquet")
+
+    def months(self):
+        if not os.path.isdir(self.root):
+            return set()
+        return {
+            (int(name[:4]), int(name[4:6]))
+            for name in os.listdir(self.root)
+            if name.endswith(".parquet") and name[:6].isdigit()
+        }
+
+    def replace(self, df, months, periodos):
+        """Rewrites the partitions of `months` with the matching rows of df.
+
+        `periodos` holds the YYYYMM period of every row. Months without rows
+        lose their partition.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        for year, month in sorted(months):
+            path = self.path(year, month)
+            rows = df[periodos == year * 100 + month]
+            if rows.empty:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            write_dataframe(rows, path, columns=self.columns, order_by=self.order_by)
+
+    def write_query(self, conn, query, year, month, params=None):
+        """Rewrites one month's partition with the result of a DuckDB query."""
+        os.makedirs(self.root, exist_ok=True)
+        write_parquet(
+            conn,
+            query,
+            self.path(year, month),
+            params=params,
+            columns=self.columns,
+            order_by=self.order_by,
+        )
+
+    def remove(self, months):
+        for year, month in months:
+            path = self.path(year, month)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def files(self):
+        return [self.path(year, month) for year, month in sorted(self.months())]
+
+    def publish(self, out_path, file_format="parquet", extra=()):
+        """Assembles every partition into a single file. Returns False if empty.
+
+        :param extra: Other MonthPartitions with the same columns whose
+            partitions go into the file as well.
+        """
+        files = self.files() + [path for other in extra for path in other.files()]
+        if not files:
+            return False
+        conn = duckdb.connect()
+        try:
+            query = "SELECT * FROM read_parquet(?, union_by_name = true)"
+            if file_format == "csv":
+                tmp_path = f"{out_path}.tmp"
+                order = f" ORDER BY {self.order_by}" if self.order_by else ""
+                conn.execute(
+                    f"COPY ({query}{order}) TO '{tmp_path}' (FORMAT csv, HEADER true)",
+                    [files],
+                )
+                os.replace(tmp_path, out_path)
+            else:
+                write_parquet(
+                    conn,
+                    query,
+                    out_path,
+                    params=[files],
+                    columns=self.columns,
+                    order_by=self.order_by,
+                )
+        finally:
+            conn.close()
+        return True
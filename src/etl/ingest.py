@@ -1,8 +1,20 @@
 import duckdb
 import os
+import sys
 import glob
 import logging
 
+# Allow running as a script (uv run src/etl/ingest.py) as well as a module
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.config import MONTHS_MAP, month_number_sql
+from etl.parquet_writer import (
+    APP_COLUMNS,
+    APP_SORT,
+    PARQUET_COMPRESSIONS,
+    write_parquet,
+)
+
 # Configure basic logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -76,16 +88,26 @@ def unaccent_lower_sql(col_expr):
     return expr
 
 
-def process_csv_to_parquet(csv_path: str):
-    """Converts a raw CSV to a standardized Parquet file."""
+def process_csv_to_parquet(
+    csv_path: str, parquet_dir=None, compression="zstd", overwrite=False
+):
+    """Converts a raw CSV to a standardized Parquet file.
+
+    :param overwrite: Rebuild the Parquet file even if it already exists
+        (e.g. when the CSV was downloaded again).
+    Returns the Parquet path on success (or if it already existed), None on failure.
+    """
+    if compression.lower() not in PARQUET_COMPRESSIONS:
+        raise ValueError(f"Unsupported Parquet compression: {compression}")
+
     base_name = os.path.basename(csv_path)
-    parquet_dir = os.path.join(DATA_DIR, "parquet")
+    parquet_dir = parquet_dir or os.path.join(DATA_DIR, "parquet")
     os.makedirs(parquet_dir, exist_ok=True)
     parquet_path = os.path.join(parquet_dir, base_name.replace(".csv", ".parquet"))
 
-    if os.path.exists(parquet_path):
+    if os.path.exists(parquet_path) and not overwrite:
         logging.info(f"Parquet file {parquet_path} already exists. Skipping.")
-        return
+        return parquet_path
 
     logging.info(f"Processing {csv_path}...")
     conn = duckdb.connect()
@@ -101,6 +123,7 @@ def process_csv_to_parquet(csv_path: str):
         found_paterno = "NULL"
         found_materno = "NULL"
         found_anyo = "NULL"
+        found_mes = "NULL"
 
         for target_col, candidates in CONCEPT_MAPPING.items():
             found_col = "NULL"
@@ -118,6 +141,8 @@ def process_csv_to_parquet(csv_path: str):
                 found_materno = found_col
             elif target_col == "anyo":
                 found_anyo = found_col
+            elif target_col == "Mes":
+                found_mes = found_col
 
             # Handle special cleaning for money columns
             if (
@@ -149,25 +174,42 @@ def process_csv_to_parquet(csv_path: str):
         else:
             origen = "'Desconocido'"
         select_clauses.append(f"{origen} AS origen")
+        select_clauses.append(f"{month_number_sql(found_mes)} AS mes_num")
 
         select_sql = ",\n            ".join(select_clauses)
 
-        # Build the final COPY query
-        copy_query = f"""
-        COPY (
+        month_names = ", ".join(f"'{m}'" for m in MONTHS_MAP)
+
+        # Build the final query. Mes is rewritten to its canonical name and
+        # 'periodo' packs year and month (YYYYMM) so cross-year ranges become a
+        # single integer predicate.
+        query = f"""
             SELECT
-                {select_sql}
-            FROM read_csv('{csv_path}', delim=';', encoding='latin-1', ignore_errors=true, null_padding=true)
-            WHERE TRY_CAST({found_anyo} AS INTEGER) BETWEEN 2000 AND 2050
-        ) TO '{parquet_path}' (FORMAT PARQUET, COMPRESSION ZSTD)
+                * REPLACE ([{month_names}][mes_num] AS Mes),
+                (anyo * 100 + mes_num)::INTEGER AS periodo
+            FROM (
+                SELECT
+                    {select_sql}
+                FROM read_csv('{csv_path}', delim=';', encoding='latin-1', ignore_errors=true, null_padding=true)
+                WHERE TRY_CAST({found_anyo} AS INTEGER) BETWEEN 2000 AND 2050
+            )
         """
 
         logging.info(f"Executing conversion for {base_name}...")
-        conn.execute(copy_query)
+        write_parquet(
+            conn,
+            query,
+            parquet_path,
+            columns=APP_COLUMNS,
+            order_by=APP_SORT,
+            compression=compression,
+        )
         logging.info(f"Successfully created {parquet_path}")
+        return parquet_path
 
     except Exception as e:
         logging.error(f"Failed to process {csv_path}: {e}")
+        return None
     finally:
         conn.close()
 
@@ -212,6 +254,13 @@ def generate_metadata_cache():
 
         logging.info(f"Caching metadata for {base_name}...")
         try:
+            columns = set(
+                conn.execute(f"SELECT * FROM read_parquet('{pq_path}') LIMIT 0").df()
+            )
+            if not {"anyo", "organismo_nombre"} <= columns:
+                # Derived tables (e.g. multiempleo_rachas) are not browsable
+                continue
+
             # Get years
             years_df = conn.execute(
                 f"SELECT DISTINCT anyo FROM read_parquet('{pq_path}') WHERE anyo IS NOT NULL ORDER BY anyo DESC"
@@ -0,0 +1,267 @@
+"""Durable journal of scraper work items, in a local SQLite file.
+
+A work item is one unit a scraper downloads: a month of a Senado endpoint,
+a month of a Cámara staff table or a deputy-month of Cámara expenses. Each
+item has a state (pending, running, done or failed), its attempts, timings
+and last error. Scrapers submit the items their freshness policy wants,
+then pull the ones that are due. An interrupted run leaves its items
+pending (or running), so the next run resumes them. A failed item is
+retried on a later run once its backoff has passed; the backoff doubles
+with every failed attempt.
+
+`summary` and `failures` answer "how far along is the backfill and how fast
+is it going" without reading any scraper log (see scripts/job_status.py).
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+logger = logging.getLogger("JobJournal")
+
+DEFAULT_PATH = os.path.join("data", "raw", "jobs.sqlite")
+
+# Delay before retrying an item after its first failure; doubled after each
+# further failure, up to MAX_BACKOFF
+BACKOFF = 15 * 60
+MAX_BACKOFF = 24 * 3600
+
+STATES = ("pending", "running", "done", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    source TEXT NOT NULL,
+    category TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    item TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    submitted_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    seconds REAL,
+    records INTEGER,
+    last_error TEXT,
+    PRIMARY KEY (source, category, year, month, item)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (source, category, state);
+"""
+
+
+class JobJournal:
+    """SQLite-backed queue of (source, category, year, month, item) jobs.
+
+    Every call opens its own connection, so scraper threads (and the Senado
+    and Cámara scrapers running side by side in the pipeline) can share a
+    journal file.
+
+    :param backoff: Seconds before the first retry of a failed item.
+    :param max_backoff: Cap of the doubling backoff.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, backoff=BACKOFF, max_backoff=MAX_BACKOFF):
+        self.path = path
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _execute(self, sql, params=()):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(sql, params).rowcount
+
+    def submit(self, source, category, keys, reset=False, now=None):
+        """Queues (year, month, item) keys; returns how many became pending.
+
+        New keys and keys done in an earlier run become pending, as do keys
+        left running by a run that died. Failed keys keep their attempts and
+        backoff unless `reset` is set (e.g. on a forced refresh).
+        """
+        now = time.time() if now is None else now
+        rows = [
+            (source, category, year, month, str(item), now)
+            for year, month, item in keys
+        ]
+        if not rows:
+            return 0
+        requeue = "('done', 'running', 'failed')" if reset else "('done', 'running')"
+        with closing(self._connect()) as conn, conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"""
+                INSERT INTO jobs (source, category, year, month, item, submitted_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source, category, year, month, item) DO UPDATE SET
+                    state = 'pending',
+                    submitted_at = excluded.submitted_at,
+                    attempts = CASE WHEN jobs.state = 'running' THEN jobs.attempts
+                        ELSE 0 END,
+                    next_attempt_at = 0
+                WHERE jobs.state IN {requeue}
+                """,
+                rows,
+            )
+            return conn.total_changes - before
+
+    def due(self, source, category, keys=None, now=None):
+        """(year, month, item) keys that can run now, oldest first.
+
+        Pending keys, plus failed keys whose backoff has passed. With `keys`,
+        only those among them.
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT year, month, item FROM jobs
+                WHERE source = ? AND category = ?
+                  AND (state = 'pending' OR (state = 'failed' AND next_attempt_at <= ?))
+                ORDER BY year, month, item
+                """,
+                (source, category, now),
+            ).fetchall()
+        if keys is not None:
+            wanted = {(year, month, str(item)) for year, month, item in keys}
+            rows = [row for row in rows if row in wanted]
+        return rows
+
+    def start(self, source, category, year, month, item="", now=None):
+        now = time.time() if now is None else now
+        self._execute(
+            """
+            UPDATE jobs SET state = 'running', attempts = attempts + 1,
+                started_at = ?, finished_at = NULL
+            WHERE source = ? AND category = ? AND year = ? AND month = ? AND item = ?
+            """,
+            (now, source, category, year, month, str(item)),
+        )
+
+    def finish(self, source, category, year, month, item="", records=None, now=None):
+        now = time.time() if now is None else now
+        self._execute(
+            """
+            UPDATE jobs SET state = 'done', finished_at = ?,
+                seconds = ? - coalesce(started_at, ?), records = ?, last_error = NULL
+            WHERE source = ? AND category = ? AND year = ? AND month = ? AND item = ?
+            """,
+            (now, now, now, records, source, category, year, month, str(item)),
+        )
+
+    def fail(self, source, category, year, month, item="", error=None, now=None):
+        """Marks a key failed and schedules its retry. Returns the backoff."""
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                """
+                SELECT attempts FROM jobs
+                WHERE source = ? AND category = ? AND year = ? AND month = ? AND item = ?
+                """,
+                (source, category, year, month, str(item)),
+            ).fetchone()
+            attempts = max(1, row[0] if row else 1)
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+            conn.execute(
+                """
+                UPDATE jobs SET state = 'failed', finished_at = ?,
+                    seconds = ? - coalesce(started_at, ?), next_attempt_at = ?,
+                    last_error = ?
+                WHERE source = ? AND category = ? AND year = ? AND month = ? AND item = ?
+                """,
+                (
+                    now,
+                    now,
+                    now,
+                    now + delay,
+                    None if error is None else str(error)[:500],
+                    source,
+                    category,
+                    year,
+                    month,
+                    str(item),
+                ),
+            )
+        return delay
+
+    def summary(self, source=None, since=None):
+        """Progress and throughput per (source, category).
+
+        :param since: Epoch seconds; throughput only counts items finished
+            after it (default: all of them).
+        :return: One dict per category with a count per state, attempts,
+            records, the mean seconds per item and items per minute.
+        """
+        since = 0 if since is None else since
+        query = f"""
+            SELECT source, category,
+                {", ".join(f"sum(state = '{s}')" for s in STATES)},
+                sum(attempts),
+                sum(coalesce(records, 0)),
+                avg(CASE WHEN state = 'done' THEN seconds END),
+                sum(state = 'done' AND finished_at >= ?),
+                min(CASE WHEN state = 'done' AND finished_at >= ? THEN started_at END),
+                max(CASE WHEN state = 'done' AND finished_at >= ? THEN finished_at END)
+            FROM jobs
+            {"WHERE source = ?" if source else ""}
+            GROUP BY source, category
+            ORDER BY source, category
+        """
+        params = (since, since, since) + ((source,) if source else ())
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        result = []
+        for row in rows:
+            src, category, *counts = row[:6]
+            attempts, records, mean_seconds, recent, first, last = row[6:]
+            span = (last - first) if first is not None and last is not None else 0
+            result.append(
+                {
+                    "source": src,
+                    "category": category,
+                    **dict(zip(STATES, counts)),
+                    "attempts": attempts,
+                    "records": records,
+                    "mean_seconds": None
+                    if mean_seconds is None
+                    else round(mean_seconds, 3),
+                    "items_per_minute": round(recent * 60 / span, 1) if span else None,
+                }
+            )
+        return result
+
+    def failures(self, source=None):
+        """Failed keys with their attempts, last error and next retry time."""
+        query = """
+            SELECT source, category, year, month, item, attempts, next_attempt_at,
+                last_error
+            FROM jobs WHERE state = 'failed'
+        """
+        params = ()
+        if source:
+            query += " AND source = ?"
+            params = (source,)
+        query += " ORDER BY source, category, year, month, item"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+        columns = (
+            "source",
+            "category",
+            "year",
+            "month",
+            "item",
+            "attempts",
+            "next_attempt_at",
+            "last_error",
+        )
+        return [dict(zip(columns, row)) for row in rows]
@@ -0,0 +1,84 @@
+"""Name normalization shared by the Senado and Cámara processors.
+
+The per-value functions are applied once per distinct value and mapped back,
+so the cost grows with the number of distinct names instead of rows.
+"""
+
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_name(nombre, appaterno, apmaterno=None):
+    """Builds the uppercase 'NOMBRE PATERNO MATERNO' key, skipping empty parts."""
+    parts = []
+    if pd.notna(nombre) and str(nombre).strip():
+        parts.append(str(nombre).strip().upper())
+    if pd.notna(appaterno) and str(appaterno).strip():
+        parts.append(str(appaterno).strip().upper())
+    if pd.notna(apmaterno) and str(apmaterno).strip():
+        parts.append(str(apmaterno).strip().upper())
+
+    return " ".join(parts).replace("  ", " ").strip()
+
+
+def unaccent_lower(text):
+    """Lowercases and strips accents (NFKD), matching `unaccent_lower_python`."""
+    if pd.isna(text) or not str(text).strip():
+        return ""
+    text = str(text).lower()
+    return (
+        unicodedata.normalize("NFKD", text)
+        .encode("ascii", "ignore")
+        .decode("utf-8")
+        .strip()
+    )
+
+
+def map_unique(series: pd.Series, func) -> pd.Series:
+    """Applies func to each distinct value of series and broadcasts the results."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    mapped = np.array([func(value) for value in uniques], dtype=object)
+    return pd.Series(mapped[codes], index=series.index, dtype=object)
+
+
+def _column(df: pd.DataFrame, name):
+    if name in df.columns:
+        return df[name]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def person_keys(
+    df: pd.DataFrame, nombre="nombre", paterno="appaterno", materno="apmaterno"
+):
+    """Vectorized `normalize_name` over three name columns (missing columns count as empty)."""
+    names = pd.DataFrame(
+        {
+            "n": _column(df, nombre),
+            "p": _column(df, paterno),
+            "m": _column(df, materno),
+        }
+    )
+    # Group numbers follow first appearance, as does drop_duplicates
+    codes = names.groupby(["n", "p", "m"], dropna=False, sort=False).ngroup().to_numpy()
+    uniques = names.drop_duplicates()
+    keys = np.array(
+        [normalize_name(n, p, m) for n, p, m in uniques.itertuples(index=False)],
+        dtype=object,
+    )
+    return pd.Series(keys[codes], index=df.index, dtype=object)
+
+
+def search_vectors(
+    df: pd.DataFrame, nombres="Nombres", paterno="Paterno", materno="Materno"
+):
+    """Vectorized search vector: unaccented lowercase of 'Nombres Paterno Materno'."""
+    full_names = (
+        df[nombres].astype(str)
+        + " "
+        + df[paterno].astype(str)
+        + " "
+        + df[materno].astype(str)
+    )
+    return map_unique(full_names, unaccent_lower)
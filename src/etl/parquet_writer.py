@@ -0,0 +1,170 @@
+"""Shared Parquet writer for the CPLT, Senado and Cámara outputs.
+
+Every published file goes through DuckDB's COPY with the same column types,
+sort order, row-group size and compression, so row-group statistics prune the
+same way in `quick_query` whatever source a file comes from. Files are
+written to a temporary path and moved into place, so readers never see a
+partial file.
+"""
+
+import os
+
+import duckdb
+
+# Parquet codecs accepted by DuckDB's COPY ... (FORMAT PARQUET, COMPRESSION ...)
+PARQUET_COMPRESSIONS = ("zstd", "snappy", "gzip", "lz4", "brotli", "uncompressed")
+
+COMPRESSION = "zstd"
+COMPRESSION_LEVEL = 3
+# Rows per row group; smaller groups prune finer at a small metadata cost
+ROW_GROUP_SIZE = 100_000
+
+# Column order and types of the salary files read by the app. Low-cardinality
+# strings (Mes, origen, organismo_nombre, estamento) stay VARCHAR: DuckDB
+# dictionary-encodes them in the Parquet file and every source shares one type.
+APP_COLUMNS = {
+    "organismo_nombre": "VARCHAR",
+    "anyo": "INTEGER",
+    "Mes": "VARCHAR",
+    "estamento": "VARCHAR",
+    "Nombres": "VARCHAR",
+    "Paterno": "VARCHAR",
+    "Materno": "VARCHAR",
+    "cargo": "VARCHAR",
+    "remuliquida_mensual": "INTEGER",
+    "remuneracionbruta_mensual": "INTEGER",
+    "search_vector": "VARCHAR",
+    "origen": "VARCHAR",
+    "mes_num": "UTINYINT",
+    "periodo": "INTEGER",
+    "persona_id": "UBIGINT",
+}
+# Filters of quick_query, most selective first
+APP_SORT = "periodo, organismo_nombre"
+
+# 'NOMBRES PATERNO MATERNO' without accents and with single spaces; NULL
+# when the row has no name
+_NAME_PARTS = ", ".join(
+    f'trim(CAST("{part}" AS VARCHAR))' for part in ("Nombres", "Paterno", "Materno")
+)
+PERSON_NAME_SQL = (
+    "NULLIF(strip_accents(upper(trim(regexp_replace("
+    f"concat_ws(' ', {_NAME_PARTS}), '\\s+', ' ', 'g')))), '')"
+)
+
+# Columns computed by the writer when the query does not provide them:
+# {name: (SQL expression, columns it needs)}. persona_id is a 64-bit hash
+# of the normalized name (the low 64 bits of its MD5, stable across DuckDB
+# versions), used by the audits to group people across sources.
+DERIVED_COLUMNS = {
+    "persona_id": (
+        f"md5_number_lower({PERSON_NAME_SQL})",
+        ("Nombres", "Paterno", "Materno"),
+    ),
+}
+
+# Detailed expenses (senado_gastos_detalle / diputados_gastos_detalle)
+GASTOS_COLUMNS = {
+    "anyo": "INTEGER",
+    "Mes": "INTEGER",
+    "llave_senador": "VARCHAR",
+    "gastos_operacionales": "VARCHAR",
+    "monto": "BIGINT",
+    "organismo_nombre": "VARCHAR",
+    "periodo": "INTEGER",
+}
+GASTOS_SORT = "periodo, llave_senador"
+
+# Senate domestic flights and foreign missions (senado_viajes). Sorted like
+# the expenses so a person's month is read from a single row group.
+VIAJES_COLUMNS = {
+    "anyo": "INTEGER",
+    "Mes": "INTEGER",
+    "llave_senador": "VARCHAR",
+    "tipo": "VARCHAR",
+    "fecha": "VARCHAR",
+    "destino": "VARCHAR",
+    "motivo": "VARCHAR",
+    "monto": "BIGINT",
+    "organismo_nombre": "VARCHAR",
+    "periodo": "INTEGER",
+}
+VIAJES_SORT = GASTOS_SORT
+
+
+def _column_sql(name, available):
+    """SQL of an output column: as queried, derived (DERIVED_COLUMNS) or NULL.
+
+    A derived column that is queried is only computed where it is NULL
+    (e.g. partitions written before the column existed).
+    """
+    queried = f'"{name}"' if name in available else None
+    if name in DERIVED_COLUMNS:
+        expr, needs = DERIVED_COLUMNS[name]
+        if all(column in available for column in needs):
+            return f"COALESCE({queried}, {expr})" if queried else expr
+    return queried or "NULL"
+
+
+def _project(query, columns, available):
+    """Wraps query so it returns exactly `columns`, cast, missing ones as NULL."""
+    select = ", ".join(
+        f'CAST({_column_sql(name, available)} AS {sql_type}) AS "{name}"'
+        for name, sql_type in columns.items()
+    )
+    return f"SELECT {select} FROM ({query})"
+
+
+def write_parquet(
+    conn,
+    query,
+    out_path,
+    params=None,
+    columns=None,
+    order_by=None,
+    compression=COMPRESSION,
+    compression_level=COMPRESSION_LEVEL,
+    row_group_size=ROW_GROUP_SIZE,
+):
+    """Writes the result of `query` to `out_path` through DuckDB's COPY.
+
+    :param columns: Optional {name: sql_type} schema the output is projected to.
+    :param order_by: Optional ORDER BY expression (clusters row-group statistics).
+    :return: out_path
+    """
+    if compression.lower() not in PARQUET_COMPRESSIONS:
+        raise ValueError(f"Unsupported Parquet compression: {compression}")
+
+    if columns is not None:
+        available = set(conn.execute(f"SELECT * FROM ({query}) LIMIT 0", params).df())
+        query = _project(query, columns, available)
+    if order_by:
+        query = f"SELECT * FROM ({query}) ORDER BY {order_by}"
+
+    options = [
+        "FORMAT PARQUET",
+        f"COMPRESSION {compression.upper()}",
+        f"ROW_GROUP_SIZE {int(row_group_size)}",
+    ]
+    if compression.lower() == "zstd" and compression_level is not None:
+        options.append(f"COMPRESSION_LEVEL {int(compression_level)}")
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp_path = f"{out_path}.tmp"
+    try:
+        conn.execute(f"COPY ({query}) TO '{tmp_path}' ({', '.join(options)})", params)
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return out_path
+
+
+def write_dataframe(df, out_path, **kwargs):
+    """Writes a pandas DataFrame with `write_parquet`."""
+    conn = duckdb.connect()
+    try:
+        conn.register("df_out", df)
+        return write_parquet(conn, "SELECT * FROM df_out", out_path, **kwargs)
+    finally:
+        conn.close()
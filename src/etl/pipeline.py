@@ -0,0 +1,438 @@
+"""Stage graph that runs the CPLT, Senado and Cámara pipelines together.
+
+Each `Stage` declares the stages it depends on, the local files it reads
+and the files it writes. `Pipeline.run` executes ready stages in parallel,
+so independent sources do not wait for each other. A stage whose input
+fingerprint matches the last successful run (and whose outputs still
+exist) is skipped. Every stage reports its duration and the number of rows
+of the Parquet files it produced. The results are also saved as JSON for
+the scheduled job.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pyarrow.parquet as pq
+
+logger = logging.getLogger("Pipeline")
+
+DATA_DIR = "data"
+STATE_VERSION = 1
+
+SOURCES = ("cplt", "senado", "camara")
+
+
+def expand(patterns):
+    """Sorted list of the files matching a list of glob patterns."""
+    files = set()
+    for pattern in patterns:
+        files.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(files)
+
+
+def stat_fingerprint(paths, extra=None):
+    """Fingerprint of files by path, size and mtime (no content read).
+
+    Multi-GB CSVs would take longer to hash than some stages take to run.
+    A false positive only costs a stage that is incremental itself.
+    """
+    digest = hashlib.sha256(json.dumps(extra, sort_keys=True, default=str).encode())
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def parquet_rows(paths):
+    """Total rows of the Parquet files in paths (read from the footers).
+
+    None when there is no Parquet file among them.
+    """
+    files = [path for path in paths if path.endswith(".parquet")]
+    if not files:
+        return None
+    return sum(pq.ParquetFile(path).metadata.num_rows for path in files)
+
+
+class Stage:
+    """A unit of work in the pipeline.
+
+    :param run: Callable executed when the stage is not skipped.
+    :param deps: Names of the stages that must finish first.
+    :param inputs: Glob patterns of the local files the stage reads.
+        Stages without inputs (scrapers, whose inputs are remote) always run.
+    :param outputs: Glob patterns of the files the stage writes.
+    :param params: Extra values folded into the fingerprint (e.g. year range).
+    """
+
+    def __init__(
+        self, name, run, source=None, deps=(), inputs=(), outputs=(), params=None
+    ):
+        self.name = name
+        self.run = run
+        self.source = source
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params
+
+    def fingerprint(self):
+        if not self.inputs:
+            return None
+        return stat_fingerprint(expand(self.inputs), extra=self.params)
+
+    def outputs_exist(self):
+        return all(expand([pattern]) for pattern in self.outputs)
+
+
+class StageResult:
+    def __init__(self, name, status, seconds=0.0, rows=None, error=None):
+        self.name = name
+        self.status = status  # "ran", "skipped", "failed" or "blocked"
+        self.seconds = seconds
+        self.rows = rows
+        self.error = error
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "status": self.status,
+            "seconds": round(self.seconds, 3),
+            "rows": self.rows,
+            "error": self.error,
+        }
+
+
+class Pipeline:
+    """Runs a set of stages in dependency order, in parallel where possible."""
+
+    def __init__(self, stages, state_path=None, metrics_path=None, max_workers=None):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [d for d in stage.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown {missing}")
+        self._check_acyclic()
+        self.state_path = state_path or os.path.join(DATA_DIR, "pipeline_state.json")
+        self.metrics_path = metrics_path or os.path.join(
+            DATA_DIR, "pipeline_metrics.json"
+        )
+        self.max_workers = max_workers or len(SOURCES)
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable pipeline state {self.state_path}: {e}")
+            return {}
+        if content.get("version") != STATE_VERSION:
+            return {}
+        return content.get("stages", {})
+
+    @staticmethod
+    def _write_json(path, content):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def plan(self):
+        """Stage names in a valid execution order."""
+        order, done = [], set()
+        while len(order) < len(self.stages):
+            for name, stage in self.stages.items():
+                if name not in done and all(d in done for d in stage.deps):
+                    order.append(name)
+                    done.add(name)
+        return order
+
+    def _execute(self, stage, state, force):
+        if stage.inputs and not expand(stage.inputs):
+            logger.info(f"⏭️  {stage.name}: no input files, skipping")
+            return StageResult(stage.name, "skipped"), None
+
+        fingerprint = stage.fingerprint()
+        if (
+            not force
+            and fingerprint is not None
+            and state.get(stage.name) == fingerprint
+            and stage.outputs_exist()
+        ):
+            logger.info(f"⏭️  {stage.name}: inputs unchanged, skipping")
+            return StageResult(stage.name, "skipped"), None
+
+        logger.info(f"▶️  {stage.name}: running")
+        start = time.perf_counter()
+        stage.run()
+        seconds = time.perf_counter() - start
+        rows = parquet_rows(expand(stage.outputs))
+        logger.info(
+            f"✅ {stage.name}: {seconds:.1f}s"
+            + (f", {rows} rows" if rows is not None else "")
+        )
+        # Fingerprint the inputs as they were consumed
+        return StageResult(stage.name, "ran", seconds, rows), fingerprint
+
+    def run(self, force=False):
+        """Runs every stage. Returns {name: StageResult}.
+
+        A failed stage does not stop the others; the stages that depend on it
+        are reported as blocked and keep their previous fingerprint.
+        """
+        state = self._load_state()
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    dep_results = [results.get(d) for d in stage.deps]
+                    if any(
+                        r is not None and r.status in ("failed", "blocked")
+                        for r in dep_results
+                    ):
+                        logger.warning(f"⛔ {name}: blocked by a failed dependency")
+                        results[name] = StageResult(name, "blocked")
+                        del pending[name]
+                    elif all(r is not None for r in dep_results):
+                        future = executor.submit(self._execute, stage, state, force)
+                        running[future] = name
+                        del pending[name]
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        result, fingerprint = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ {name} failed: {e}")
+                        results[name] = StageResult(name, "failed", error=str(e))
+                        state.pop(name, None)
+                        continue
+                    results[name] = result
+                    if result.status == "ran" and fingerprint is not None:
+                        state[name] = fingerprint
+
+        self._write_json(self.state_path, {"version": STATE_VERSION, "stages": state})
+        self._write_json(
+            self.metrics_path,
+            {
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "stages": [results[name].as_dict() for name in self.plan()],
+            },
+        )
+        self._log_summary(results)
+        return results
+
+    def _log_summary(self, results):
+        logger.info("== Pipeline summary ==")
+        for name in self.plan():
+            result = results[name]
+            rows = "" if result.rows is None else f"{result.rows:>12,} rows"
+            logger.info(f"{name:<16} {result.status:<8} {result.seconds:>8.1f}s {rows}")
+
+
+def build_stages(sources=SOURCES, start_year=2022, end_year=2026, scrape=True):
+    """The stages of the selected sources plus the shared metadata stage.
+
+    :param scrape: If False, only local stages run (no network access).
+    """
+    from etl import ingest, sync
+
+    data_dir = DATA_DIR
+    parquet_dir = os.path.join(data_dir, "parquet")
+    raw_dir = os.path.join(data_dir, "raw")
+    stages = []
+    published = []
+
+    def ingest_csvs():
+        # The stage only runs when a CSV changed, so existing files are stale
+        for csv_path in expand([os.path.join(data_dir, "TA_*.csv")]):
+            parquet_path = ingest.process_csv_to_parquet(
+                csv_path, parquet_dir=parquet_dir, overwrite=True
+            )
+            if parquet_path is None:
+                raise RuntimeError(f"Ingestion of {csv_path} failed")
+
+    def scrape_senado():
+        from etl.senado_scraper import SenadoScraper
+
+        SenadoScraper(start_year=start_year, end_year=end_year).run_all()
+
+    def process_senado():
+        from etl.senado_processor import DataProcessor
+
+        DataProcessor(
+            cache_dir=os.path.join(raw_dir, "senado"),
+            output_dir=parquet_dir,
+            processed_dir=os.path.join(data_dir, "processed", "senado"),
+        ).process_all()
+
+    def scrape_camara():
+        from etl.diputados_scraper import DiputadosScraper
+
+        DiputadosScraper(start_year=start_year, end_year=end_year).run_all()
+
+    def process_camara():
+        from etl.diputados_processor import DiputadosProcessor
+
+        DiputadosProcessor(
+            raw_dir=os.path.join(raw_dir, "diputados"), output_dir=parquet_dir
+        ).process_all()
+
+    if "cplt" in sources:
+        csvs = [os.path.join(data_dir, "TA_*.csv")]
+        outputs = [os.path.join(parquet_dir, "TA_*.parquet")]
+        if scrape:
+            stages.append(
+                Stage(
+                    "cplt_sync",
+                    lambda: sync.check_and_sync(run_ingest=False),
+                    source="cplt",
+                    outputs=csvs,
+                )
+            )
+        stages.append(
+            Stage(
+                "cplt_ingest",
+                ingest_csvs,
+                source="cplt",
+                deps=["cplt_sync"] if scrape else [],
+                inputs=csvs,
+                outputs=outputs,
+            )
+        )
+        published += outputs
+
+    if "senado" in sources:
+        if scrape:
+            stages.append(Stage("senado_scrape", scrape_senado, source="senado"))
+        outputs = [
+            os.path.join(parquet_dir, "senado_consolidado.parquet"),
+            os.path.join(parquet_dir, "senado_gastos_detalle.parquet"),
+            os.path.join(parquet_dir, "senado_viajes.parquet"),
+        ]
+        stages.append(
+            Stage(
+                "senado_process",
+                process_senado,
+                source="senado",
+                deps=["senado_scrape"] if scrape else [],
+                # Month files only (<endpoint>/<year>/<mm>.*), not freshness.json
+                inputs=[os.path.join(raw_dir, "senado", "*", "*", "*")],
+                outputs=outputs,
+            )
+        )
+        published += outputs
+
+    if "camara" in sources:
+        if scrape:
+            stages.append(Stage("camara_scrape", scrape_camara, source="camara"))
+        outputs = [
+            os.path.join(parquet_dir, "diputados_consolidado.parquet"),
+            os.path.join(parquet_dir, "diputados_gastos_detalle.parquet"),
+        ]
+        stages.append(
+            Stage(
+                "camara_process",
+                process_camara,
+                source="camara",
+                deps=["camara_scrape"] if scrape else [],
+                inputs=[
+                    os.path.join(raw_dir, "diputados", "*", "*.csv"),
+                    os.path.join(raw_dir, "diputados", "*.duckdb"),
+                ],
+                outputs=outputs,
+            )
+        )
+        published += outputs
+
+    salary_files = [
+        pattern
+        for pattern in published
+        if os.path.basename(pattern).startswith("TA_")
+        or pattern.endswith("_consolidado.parquet")
+    ]
+
+    audit_tables = {
+        "multiempleo": "multiempleo_rachas.parquet",
+        "sketches": "sueldos_sketch.parquet",
+        "apellidos": "apellidos_frecuencia.parquet",
+    }
+
+    def build_audits():
+        from etl.audit_tables import (
+            MultiempleoHistory,
+            SalarySketches,
+            SurnameFrequencies,
+        )
+
+        sources = {
+            os.path.basename(path)[: -len(".parquet")]: path
+            for path in expand(salary_files)
+        }
+        for name, table in (
+            ("multiempleo", MultiempleoHistory),
+            ("sketches", SalarySketches),
+            ("apellidos", SurnameFrequencies),
+        ):
+            table(
+                sources,
+                work_dir=os.path.join(data_dir, "processed", name),
+                out_path=os.path.join(parquet_dir, audit_tables[name]),
+            ).update()
+
+    if salary_files:
+        stages.append(
+            Stage(
+                "audits",
+                build_audits,
+                deps=[
+                    s.name for s in stages if s.name.endswith(("_ingest", "_process"))
+                ],
+                inputs=salary_files,
+                outputs=[
+                    os.path.join(parquet_dir, out) for out in audit_tables.values()
+                ],
+            )
+        )
+
+    stages.append(
+        Stage(
+            "metadata",
+            ingest.generate_metadata_cache,
+            deps=[s.name for s in stages if s.name.endswith(("_ingest", "_process"))],
+            inputs=published,
+            outputs=[os.path.join(data_dir, "metadata_cache.json")],
+        )
+    )
+    return stages
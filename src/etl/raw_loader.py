@@ -0,0 +1,207 @@
+"""Parallel loader for the cached Senado API months.
+
+Each month file is parsed straight into Arrow (DuckDB's JSON reader for the
+legacy JSON months, Arrow's readers for compressed NDJSON and Parquet), so no
+Python dicts are built per record. Files are parsed concurrently and yielded
+one Arrow table per file, keeping only a bounded window of them in flight.
+
+With a single worker there is nothing to overlap, and CPython's json module
+parses one large pretty-printed month faster than DuckDB does, so legacy JSON
+months are read with it, one file's records at a time.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from core.raw_cache import (
+    RawMonthCache,
+    cache_format_of,
+    read_records_table,
+    records_table,
+)
+
+logger = logging.getLogger("RawLoader")
+
+
+def month_files(cache_dir, endpoint_name):
+    """Cached month files of an endpoint (any format), sorted by year and month."""
+    return RawMonthCache(cache_dir).month_files(endpoint_name)
+
+
+def _read_json_items(conn, path):
+    """Reads the records of a cached response into an Arrow table.
+
+    The file is parsed once by DuckDB; the record list is then unwrapped with
+    zero-copy Arrow operations.
+    """
+    # A consolidated month is a single JSON object that can exceed DuckDB's
+    # 16MB default; sizing the buffer to the file avoids over-allocating.
+    max_size = os.path.getsize(path) + 1
+    result = conn.execute(
+        f"SELECT data FROM read_json(?, maximum_object_size={max_size})", [path]
+    )
+    data = _to_arrow(result).column("data")
+
+    # Strapi v4 paginated format ({"data": {"data": [...]}}) or a simple list
+    if pa.types.is_struct(data.type):
+        data = pc.struct_field(data, "data")
+    items = pc.list_flatten(data)
+    if isinstance(items, pa.ChunkedArray):
+        items = items.combine_chunks()
+    if not pa.types.is_struct(items.type):
+        # An upstream format change, not an empty month
+        logger.warning(f"Skipping {path}: records are {items.type}, not objects")
+        return None
+
+    # Records may be wrapped as {"id": ..., "attributes": {...}}
+    if items.type.get_field_index("attributes") >= 0:
+        items = pc.struct_field(items, "attributes")
+    return pa.Table.from_struct_array(items)
+
+
+def _read_json_items_python(path):
+    """Same as `_read_json_items`, parsing the file with CPython's json module.
+
+    If values of a column mix types, the columns are built one by one and
+    those are stored as text (see `records_table`).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        content = json.load(f)
+    data = content.get("data") if isinstance(content, dict) else None
+    # Strapi v4 paginated format ({"data": {"data": [...]}}) or a simple list
+    if isinstance(data, dict):
+        data = data.get("data")
+    if not isinstance(data, list) or not all(isinstance(i, dict) for i in data):
+        logger.warning(f"Skipping {path}: 'data' is not a list of records")
+        return None
+    if any("attributes" in item for item in data):
+        data = [item.get("attributes") or {} for item in data]
+    if not data:
+        return pa.table({})
+    try:
+        # Infers one struct type over every record in a single pass
+        return pa.Table.from_struct_array(pa.array(data))
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return records_table(data)
+
+
+# What reading a malformed or truncated month can raise (JSON and UTF-8
+# decoding errors are ValueError subclasses)
+_PARSE_ERRORS = (OSError, ValueError, pa.ArrowException, duckdb.Error)
+
+
+def _to_arrow(result):
+    # duckdb>=1.5 renamed fetch_arrow_table
+    if hasattr(result, "to_arrow_table"):
+        return result.to_arrow_table()
+    return result.fetch_arrow_table()
+
+
+def _load_file(conn, path, python_json=False):
+    if cache_format_of(path) != "json":
+        try:
+            return read_records_table(path)
+        except _PARSE_ERRORS as e:
+            logger.error(f"Error parsing {path}: {e}")
+            return None
+
+    if python_json:
+        try:
+            return _read_json_items_python(path)
+        except _PARSE_ERRORS as e:
+            logger.error(f"Error parsing {path}: {e}")
+            return None
+
+    cursor = conn.cursor()
+    try:
+        return _read_json_items(cursor, path)
+    except _PARSE_ERRORS as e:
+        logger.error(f"Error parsing {path}: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def iter_month_tables(paths, max_workers=None):
+    """Yields (path, pa.Table) per file in input order, parsing files in parallel.
+
+    Files that are empty or cannot be parsed are logged and skipped.
+    """
+    max_workers = max_workers or min(8, os.cpu_count() or 1)
+    conn = duckdb.connect()
+    try:
+        if max_workers == 1:
+            for path in paths:
+                table = _load_file(conn, path, python_json=True)
+                if table is not None and table.num_rows:
+                    yield path, table
+            return
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = deque()
+            for path in paths:
+                pending.append((path, pool.submit(_load_file, conn, path)))
+                # Bound the number of parsed-but-unconsumed tables
+                if len(pending) >= max_workers * 2:
+                    path_done, future = pending.popleft()
+                    table = future.result()
+                    if table is not None and table.num_rows:
+                        yield path_done, table
+            while pending:
+                path_done, future = pending.popleft()
+                table = future.result()
+                if table is not None and table.num_rows:
+                    yield path_done, table
+    finally:
+        conn.close()
+
+
+def concat_tables(tables):
+    """Concatenates month tables whose inferred schemas may differ.
+
+    Numeric and null columns are promoted; columns that are typed differently
+    across months (e.g. a code read as a number in one month and as text in
+    another) fall back to strings.
+    """
+    tables = list(tables)
+    if not tables:
+        return pa.table({})
+
+    types = {}
+    for table in tables:
+        for field in table.schema:
+            if not pa.types.is_null(field.type):
+                types.setdefault(field.name, set()).add(field.type)
+    conflicting = {
+        name
+        for name, found in types.items()
+        if len(found) > 1
+        and not all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in found)
+    }
+
+    if conflicting:
+        unified = []
+        for table in tables:
+            for name in conflicting & set(table.column_names):
+                i = table.schema.get_field_index(name)
+                table = table.set_column(i, name, table.column(name).cast(pa.string()))
+            unified.append(table)
+        tables = unified
+
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def load_files(paths, max_workers=None):
+    """Loads the given month files into a single Arrow table."""
+    return concat_tables(table for _, table in iter_month_tables(paths, max_workers))
+
+
+def load_endpoint(cache_dir, endpoint_name, max_workers=None):
+    """Loads every cached month of an endpoint into a single Arrow table."""
+    return load_files(month_files(cache_dir, endpoint_name), max_workers)
@@ -1,11 +1,76 @@
 import os
-import json
 import logging
-from glob import glob
+import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core.raw_cache import cache_format_of
+from etl.app_schema import add_period_columns
+from etl.incremental import MonthManifest, MonthPartitions, group_by_month
+from etl.parquet_writer import (
+    APP_COLUMNS,
+    APP_SORT,
+    GASTOS_COLUMNS,
+    GASTOS_SORT,
+    VIAJES_COLUMNS,
+    VIAJES_SORT,
+)
+from etl.normalize import person_keys, search_vectors
+from etl.raw_loader import load_files, month_files
 
 logger = logging.getLogger("DataProcessor")
 
+# Raw categories that feed the consolidated outputs
+CATEGORIES = ["dietas", "gastos_operacionales"]
+
+# Travel categories (senado_viajes) and their 'tipo'
+TRAVEL_CATEGORIES = {
+    "viajes_nacionales": "Nacional",
+    "misiones_extranjero": "Extranjero",
+}
+
+# senado_viajes column -> travel API fields it is read from, first match wins.
+# Foreign missions carry a total besides the ticket and per diem amounts.
+TRAVEL_FIELDS = {
+    "fecha": ["fecha_ida", "fecha_salida", "fecha_inicio", "fecha"],
+    "destino": ["destino", "ciudad_destino", "pais_destino", "pais"],
+    "motivo": ["motivo", "objetivo", "actividad", "descripcion"],
+    "monto": ["monto_total", "total", "monto", "valor_pasaje", "valor", "costo"],
+}
+
+# Streamed staffing months (see SenadoScraper) and their estamento in the app
+STAFF_CATEGORIES = {
+    "dotacion_planta": "Personal de Planta",
+    "dotacion_contrata": "Personal a Contrata",
+    "dotacion_honorarios": "Personal a Honorarios",
+}
+
+# App column -> staffing API fields it is read from, first match wins
+STAFF_FIELDS = {
+    "Nombres": ["nombre", "nombres"],
+    "Paterno": ["appaterno", "apellido_paterno", "paterno"],
+    "Materno": ["apmaterno", "apellido_materno", "materno"],
+    "cargo": ["cargo", "funcion", "escalafon"],
+    "bruta": [
+        "remuneracion_bruta",
+        "remuneracion",
+        "honorario",
+        "monto_bruto",
+        "monto",
+    ],
+    "liquida": ["remuneracion_liquida", "liquido", "monto_liquido"],
+}
+
+
+def _cache_month(path):
+    """(year, month) of a cached file: <endpoint>/<year>/<mm>.<ext>"""
+    year = os.path.basename(os.path.dirname(path))
+    month = os.path.basename(path)[:2]
+    if year.isdigit() and month.isdigit():
+        return int(year), int(month)
+    return None
+
 
 class DataProcessor:
     def __init__(
@@ -21,6 +86,38 @@ class DataProcessor:
         self.processed_dir = processed_dir
         os.makedirs(self.processed_dir, exist_ok=True)
 
+        # Month partitions of every output, rebuilt only when their inputs change
+        self.manifest_path = os.path.join(self.processed_dir, "manifest.json")
+        partitions_dir = os.path.join(self.processed_dir, "partitions")
+        self.partitions = {
+            "analista": MonthPartitions(
+                os.path.join(partitions_dir, "analista"),
+                order_by="ano, mes, llave_senador",
+            ),
+            "consolidado": MonthPartitions(
+                os.path.join(partitions_dir, "consolidado"),
+                columns=APP_COLUMNS,
+                order_by=APP_SORT,
+            ),
+            "gastos_detalle": MonthPartitions(
+                os.path.join(partitions_dir, "gastos_detalle"),
+                columns=GASTOS_COLUMNS,
+                order_by=GASTOS_SORT,
+            ),
+            "viajes": MonthPartitions(
+                os.path.join(partitions_dir, "viajes"),
+                columns=VIAJES_COLUMNS,
+                order_by=VIAJES_SORT,
+            ),
+        }
+        # Staff rows, published in senado_consolidado with the senators'.
+        # Written by DuckDB from the raw months, not through _build_tables.
+        self.staff_partitions = MonthPartitions(
+            os.path.join(partitions_dir, "dotacion"),
+            columns=APP_COLUMNS,
+            order_by=APP_SORT,
+        )
+
         # Month mapping
         self.meses_map = {
             1: "Enero",
@@ -37,179 +134,344 @@ class DataProcessor:
             12: "Diciembre",
         }
 
-    def _load_json_files(self, endpoint_name):
-        all_data = []
-        path_pattern = os.path.join(self.cache_dir, endpoint_name, "*", "*.json")
-        files = glob(path_pattern)
-
-        for file_path in files:
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = json.load(f)
-                    items = []
-                    if (
-                        "data" in content
-                        and isinstance(content["data"], dict)
-                        and "data" in content["data"]
-                    ):
-                        items = content["data"]["data"]
-                    elif "data" in content and isinstance(content["data"], list):
-                        items = content["data"]
-
-                    for item in items:
-                        if isinstance(item, dict) and "attributes" in item:
-                            all_data.append(item["attributes"])
-                        else:
-                            all_data.append(item)
-            except Exception as e:
-                logger.error(f"Error parsing {file_path}: {e}")
-
-        return all_data
+    def _load_endpoint(self, endpoint_name, months=None):
+        """Loads the cached months of an endpoint (parsed in parallel, via Arrow)."""
+        paths = month_files(self.cache_dir, endpoint_name)
+        if months is not None:
+            paths = [p for p in paths if _cache_month(p) in months]
+        return load_files(paths).to_pandas()
 
-    def _normalize_name(self, nombre, appaterno, apmaterno=None):
-        parts = []
-        if pd.notna(nombre) and str(nombre).strip():
-            parts.append(str(nombre).strip().upper())
-        if pd.notna(appaterno) and str(appaterno).strip():
-            parts.append(str(appaterno).strip().upper())
-        if pd.notna(apmaterno) and str(apmaterno).strip():
-            parts.append(str(apmaterno).strip().upper())
-
-        return " ".join(parts).replace("  ", " ").strip()
-
-    def _unaccent_lower(self, text):
-        import unicodedata
-
-        if pd.isna(text) or not str(text).strip():
-            return ""
-        text = str(text).lower()
-        return (
-            unicodedata.normalize("NFKD", text)
-            .encode("ascii", "ignore")
-            .decode("utf-8")
-            .strip()
-        )
+    def process_all(self, full_refresh=False):
+        """Reprocesses the months whose raw files changed and republishes the outputs.
 
-    def process_all(self):
+        :param full_refresh: If True, ignores the manifest and rebuilds every month.
+        """
         logger.info("== Starting data processing (Generating Parquet and CSVs) ==")
 
-        dietas_raw = self._load_json_files("dietas")
-        df_dietas = pd.DataFrame(dietas_raw)
-
-        if df_dietas.empty:
+        files = {
+            category: group_by_month(
+                month_files(self.cache_dir, category), _cache_month
+            )
+            for category in CATEGORIES
+            + list(TRAVEL_CATEGORIES)
+            + list(STAFF_CATEGORIES)
+        }
+        travel_months = set().union(*(files[c] for c in TRAVEL_CATEGORIES))
+        staff_months = set().union(*(files[c] for c in STAFF_CATEGORIES))
+        if not files["dietas"] and not staff_months:
             logger.warning("No diet data in cache.")
             return
 
-        df_dietas["llave_senador"] = df_dietas.apply(
-            lambda x: self._normalize_name(
-                x.get("nombre"), x.get("appaterno"), x.get("apmaterno")
-            ),
-            axis=1,
+        manifest = MonthManifest(self.manifest_path)
+        if full_refresh:
+            manifest.reset()
+        changed = manifest.changed_months(
+            {
+                (category, year, month): paths
+                for category, months in files.items()
+                for (year, month), paths in months.items()
+            }
+        )
+        # Partitions removed by hand are rebuilt as well
+        changed |= set(files["dietas"]) - self.partitions["consolidado"].months()
+        changed |= (
+            set(files["gastos_operacionales"])
+            - self.partitions["gastos_detalle"].months()
         )
+        changed |= travel_months - self.partitions["viajes"].months()
+        changed |= staff_months - self.staff_partitions.months()
 
-        gastos_raw = self._load_json_files("gastos_operacionales")
-        df_gastos = pd.DataFrame(gastos_raw)
+        available = (
+            set(files["dietas"])
+            | set(files["gastos_operacionales"])
+            | travel_months
+            | staff_months
+        )
+        months = changed & available
+        if not changed and os.path.exists(
+            os.path.join(self.output_dir, "senado_consolidado.parquet")
+        ):
+            logger.info("Raw cache unchanged since the last run. Nothing to do.")
+            return
+
+        logger.info(f"Reprocessing {len(months)} of {len(available)} months")
+        tables = self._build_tables(
+            self._load_endpoint("dietas", months),
+            self._load_endpoint("gastos_operacionales", months),
+        )
+        tables["viajes"] = self._build_viajes(
+            {
+                category: self._load_endpoint(category, months)
+                for category in TRAVEL_CATEGORIES
+            }
+        )
+        for name, (df, periodos) in tables.items():
+            self.partitions[name].replace(df, months, periodos)
+            self.partitions[name].remove(changed - available)
+        self._process_staff(files, changed & staff_months)
+        self.staff_partitions.remove(changed - staff_months)
+
+        self._publish()
+        manifest.commit()
 
-        df_final = df_dietas.copy()
+    def _build_tables(self, df_dietas, df_gastos):
+        """Builds the outputs of a set of months as {name: (DataFrame, periodos)}."""
+        tables = {}
+
+        if not df_dietas.empty:
+            df_dietas["llave_senador"] = person_keys(df_dietas)
 
         if not df_gastos.empty:
-            df_gastos["llave_senador"] = df_gastos.apply(
-                lambda x: self._normalize_name(
-                    x.get("nombre"), x.get("appaterno"), x.get("apmaterno")
-                ),
-                axis=1,
+            df_gastos["llave_senador"] = person_keys(df_gastos)
+
+        # Expense-only months have no consolidated rows
+        if not df_dietas.empty:
+            df_final = df_dietas.copy()
+
+            if not df_gastos.empty:
+                gastos_agrupados = (
+                    df_gastos.groupby(["ano", "mes", "llave_senador"])["monto"]
+                    .sum()
+                    .reset_index()
+                )
+                gastos_agrupados.rename(
+                    columns={"monto": "total_gastos_operacionales"}, inplace=True
+                )
+
+                df_final = pd.merge(
+                    df_final,
+                    gastos_agrupados,
+                    on=["ano", "mes", "llave_senador"],
+                    how="left",
+                )
+                df_final["total_gastos_operacionales"] = df_final[
+                    "total_gastos_operacionales"
+                ].fillna(0)
+            else:
+                df_final["total_gastos_operacionales"] = 0
+
+            df_final["costo_total_mensual"] = (
+                df_final["dieta"] + df_final["total_gastos_operacionales"]
+            )
+
+            # Generate CSV/Excel for the Analyst
+            cols = [
+                "ano",
+                "mes",
+                "rut",
+                "llave_senador",
+                "dieta",
+                "deducciones",
+                "saldo",
+                "total_gastos_operacionales",
+                "costo_total_mensual",
+            ]
+            cols_presentes = [c for c in cols if c in df_final.columns]
+            df_export = df_final[cols_presentes]
+            tables["analista"] = (
+                df_export,
+                df_export["ano"].astype(int) * 100 + df_export["mes"].astype(int),
             )
 
-            gastos_agrupados = (
-                df_gastos.groupby(["ano", "mes", "llave_senador"])["monto"]
-                .sum()
-                .reset_index()
+            # ==== Transformation to Main App Schema (DuckDB Parquet) ====
+            df_app = pd.DataFrame()
+            df_app["organismo_nombre"] = pd.Series(
+                ["Senado de la República"] * len(df_final)
             )
-            gastos_agrupados.rename(
-                columns={"monto": "total_gastos_operacionales"}, inplace=True
+            df_app["anyo"] = df_final["ano"].astype(int)
+            df_app["Mes"] = df_final["mes"].apply(
+                lambda m: self.meses_map.get(int(m), "Enero")
             )
+            df_app["estamento"] = pd.Series(["Senador(a)"] * len(df_final))
+            df_app["Nombres"] = df_final["nombre"].str.upper().fillna("")
+            df_app["Paterno"] = df_final["appaterno"].str.upper().fillna("")
+            df_app["Materno"] = df_final["apmaterno"].str.upper().fillna("")
+            df_app["cargo"] = pd.Series(["Senador(a) de la República"] * len(df_final))
+            df_app["remuliquida_mensual"] = df_final["saldo"].fillna(0).astype(int)
+            df_app["remuneracionbruta_mensual"] = (
+                df_final["costo_total_mensual"].fillna(0).astype(int)
+            )
+            df_app["origen"] = pd.Series(["Senado"] * len(df_final))
+            add_period_columns(df_app, df_final["mes"].astype(int))
+
+            df_app["search_vector"] = search_vectors(df_app)
+
+            tables["consolidado"] = (df_app, df_app["periodo"])
+
+        if not df_gastos.empty and "gastos_operacionales" in df_gastos.columns:
+            # Rename cols to match standard (for metadata cache script to not break)
+            df_gastos_pq = df_gastos[
+                ["ano", "mes", "llave_senador", "gastos_operacionales", "monto"]
+            ].copy()
+            df_gastos_pq.rename(columns={"ano": "anyo", "mes": "Mes"}, inplace=True)
+            df_gastos_pq["organismo_nombre"] = "Senado de la República"
+            df_gastos_pq["periodo"] = (
+                df_gastos_pq["anyo"].astype(int) * 100 + df_gastos_pq["Mes"].astype(int)
+            ).astype("int32")
+            tables["gastos_detalle"] = (df_gastos_pq, df_gastos_pq["periodo"])
 
-            df_final = pd.merge(
-                df_final,
-                gastos_agrupados,
-                on=["ano", "mes", "llave_senador"],
-                how="left",
+        # Months left without rows drop their partitions
+        empty = pd.DataFrame()
+        for name in self.partitions:
+            tables.setdefault(name, (empty, pd.Series(dtype="int32")))
+        return tables
+
+    @staticmethod
+    def _amounts(series):
+        """Integer pesos from numbers or Chilean-formatted text ('1.234.567').
+
+        Values that are not amounts stay NULL rather than becoming 0.
+        """
+        if not pd.api.types.is_numeric_dtype(series):
+            series = series.astype("string").str.replace(r"[^0-9]", "", regex=True)
+        return pd.to_numeric(series, errors="coerce").round().astype("Int64")
+
+    def _build_viajes(self, frames):
+        """Builds senado_viajes rows from {category: DataFrame} as (DataFrame, periodos)."""
+        parts = []
+        for category, df in frames.items():
+            if df.empty:
+                continue
+            viajes = pd.DataFrame(
+                {
+                    "anyo": df["ano"].astype(int),
+                    "Mes": df["mes"].astype(int),
+                    "llave_senador": person_keys(df),
+                    "tipo": TRAVEL_CATEGORIES[category],
+                }
             )
-            df_final["total_gastos_operacionales"] = df_final[
-                "total_gastos_operacionales"
-            ].fillna(0)
-        else:
-            df_final["total_gastos_operacionales"] = 0
-
-        df_final["costo_total_mensual"] = (
-            df_final["dieta"] + df_final["total_gastos_operacionales"]
-        )
+            for column, candidates in TRAVEL_FIELDS.items():
+                source = next((c for c in candidates if c in df.columns), None)
+                if source is None and column == "monto":
+                    # A renamed API field must not be published as zero pesos
+                    logger.warning(
+                        f"No amount field in {category} (expected one of "
+                        f"{', '.join(candidates)}); amounts left empty"
+                    )
+                    viajes[column] = pd.array([pd.NA] * len(df), dtype="Int64")
+                elif source is None:
+                    viajes[column] = None
+                elif column == "monto":
+                    viajes[column] = self._amounts(df[source])
+                else:
+                    viajes[column] = df[source].astype("string").str.strip()
+            parts.append(viajes)
 
-        # Generate CSV/Excel for the Analyst
-        cols = [
-            "ano",
-            "mes",
-            "rut",
-            "llave_senador",
-            "dieta",
-            "deducciones",
-            "saldo",
-            "total_gastos_operacionales",
-            "costo_total_mensual",
-        ]
-        cols_presentes = [c for c in cols if c in df_final.columns]
-        df_export = df_final[cols_presentes].sort_values(
-            by=["ano", "mes", "llave_senador"]
+        if not parts:
+            return pd.DataFrame(), pd.Series(dtype="int32")
+        df_viajes = pd.concat(parts, ignore_index=True)
+        df_viajes["organismo_nombre"] = "Senado de la República"
+        df_viajes["periodo"] = (df_viajes["anyo"] * 100 + df_viajes["Mes"]).astype(
+            "int32"
         )
+        return df_viajes, df_viajes["periodo"]
 
-        csv_path = os.path.join(self.processed_dir, "senadores_consolidado.csv")
-        df_export.to_csv(csv_path, index=False)
+    def _staff_select(self, schema, source, estamento, year, month):
+        """SQL mapping one raw staffing month to the app schema.
 
-        logger.info(f"💾 Saved raw consolidated files in: {csv_path}")
+        :param schema: Arrow schema of the raw month.
+        :param source: FROM expression that reads it.
+        """
+        by_name = {field.name.lower(): field for field in schema}
+        exprs = []
+        for column, candidates in STAFF_FIELDS.items():
+            field = next((by_name[c] for c in candidates if c in by_name), None)
+            money = column in ("bruta", "liquida")
+            if field is None:
+                exprs.append(
+                    f"NULL::BIGINT AS {column}" if money else f"'' AS {column}"
+                )
+                continue
+            value = f'"{field.name}"'
+            if money and (
+                pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+            ):
+                exprs.append(f"TRY_CAST(round({value}) AS BIGINT) AS {column}")
+            elif money:
+                # Chilean format: '.' for thousands
+                exprs.append(
+                    f"TRY_CAST(regexp_replace(CAST({value} AS VARCHAR), '[^0-9]', '', 'g')"
+                    f" AS BIGINT) AS {column}"
+                )
+            else:
+                exprs.append(
+                    f"upper(trim(coalesce(CAST({value} AS VARCHAR), ''))) AS {column}"
+                )
+        return f"""
+            SELECT
+                'Senado de la República' AS organismo_nombre,
+                {year} AS anyo,
+                '{self.meses_map[month]}' AS Mes,
+                '{estamento}' AS estamento,
+                Nombres,
+                Paterno,
+                Materno,
+                CASE WHEN cargo = '' THEN 'Funcionario/a' ELSE cargo END AS cargo,
+                coalesce(liquida, bruta, 0) AS remuliquida_mensual,
+                coalesce(bruta, liquida, 0) AS remuneracionbruta_mensual,
+                trim(lower(strip_accents(
+                    Nombres || ' ' || Paterno || ' ' || Materno
+                ))) AS search_vector,
+                'Senado' AS origen,
+                {month} AS mes_num,
+                {year * 100 + month} AS periodo
+            FROM (SELECT {", ".join(exprs)} FROM {source})
+            WHERE Nombres <> ''
+        """
 
-        # ==== Transformation to Main App Schema (DuckDB Parquet) ====
-        df_app = pd.DataFrame()
-        df_app["organismo_nombre"] = pd.Series(
-            ["Senado de la República"] * len(df_final)
-        )
-        df_app["anyo"] = df_final["ano"].astype(int)
-        df_app["Mes"] = df_final["mes"].apply(
-            lambda m: self.meses_map.get(int(m), "Enero")
-        )
-        df_app["estamento"] = pd.Series(["Senador(a)"] * len(df_final))
-        df_app["Nombres"] = df_final["nombre"].str.upper().fillna("")
-        df_app["Paterno"] = df_final["appaterno"].str.upper().fillna("")
-        df_app["Materno"] = df_final["apmaterno"].str.upper().fillna("")
-        df_app["cargo"] = pd.Series(["Senador(a) de la República"] * len(df_final))
-        df_app["remuliquida_mensual"] = df_final["saldo"].fillna(0).astype(int)
-        df_app["remuneracionbruta_mensual"] = (
-            df_final["costo_total_mensual"].fillna(0).astype(int)
-        )
-        df_app["origen"] = pd.Series(["Senado"] * len(df_final))
+    def _process_staff(self, files, months):
+        """Rebuilds the staff partitions of the given months.
 
-        df_app["search_vector"] = df_app.apply(
-            lambda x: self._unaccent_lower(
-                f"{x['Nombres']} {x['Paterno']} {x['Materno']}"
-            ),
-            axis=1,
-        )
+        Each month goes from the raw Parquet files to its partition inside
+        DuckDB, so memory does not depend on how many staff a month has.
+        Months cached in another format by older versions are loaded
+        through Arrow instead.
+        """
+        conn = duckdb.connect()
+        try:
+            for year, month in sorted(months):
+                selects, params = [], []
+                for category, estamento in STAFF_CATEGORIES.items():
+                    for path in files[category].get((year, month), []):
+                        if cache_format_of(path) == "parquet":
+                            schema = pq.read_schema(path)
+                            source, source_params = "read_parquet(?)", [path]
+                        else:
+                            table = load_files([path])
+                            schema = table.schema
+                            source, source_params = f"staff_{category}", []
+                            conn.register(source, table)
+                        if not schema.names:
+                            continue
+                        selects.append(
+                            self._staff_select(schema, source, estamento, year, month)
+                        )
+                        params += source_params
+                if selects:
+                    self.staff_partitions.write_query(
+                        conn, " UNION ALL ".join(selects), year, month, params
+                    )
+                else:
+                    self.staff_partitions.remove([(year, month)])
+        finally:
+            conn.close()
+
+    def _publish(self):
+        """Assembles the month partitions into the files read by the app."""
+        csv_path = os.path.join(self.processed_dir, "senadores_consolidado.csv")
+        if self.partitions["analista"].publish(csv_path, file_format="csv"):
+            logger.info(f"💾 Saved raw consolidated files in: {csv_path}")
 
         parquet_path = os.path.join(self.output_dir, "senado_consolidado.parquet")
+        if self.partitions["consolidado"].publish(
+            parquet_path, extra=[self.staff_partitions]
+        ):
+            logger.info(f"🎉 Parquet file generated for Web App: {parquet_path}")
 
-        # Export to Parquet
-        df_app.to_parquet(parquet_path, engine="pyarrow", compression="zstd")
-        logger.info(f"🎉 Parquet file generated for Web App: {parquet_path}")
+        gastos_path = os.path.join(self.output_dir, "senado_gastos_detalle.parquet")
+        if self.partitions["gastos_detalle"].publish(gastos_path):
+            logger.info(f"Parquet file generated for Gastos: {gastos_path}")
 
-        if not df_gastos.empty:
-            gastos_path = os.path.join(self.output_dir, "senado_gastos_detalle.parquet")
-            if "gastos_operacionales" in df_gastos.columns:
-                # Rename cols to match standard (for metadata cache script to not break)
-                df_gastos_pq = df_gastos[
-                    ["ano", "mes", "llave_senador", "gastos_operacionales", "monto"]
-                ].copy()
-                df_gastos_pq.rename(columns={"ano": "anyo", "mes": "Mes"}, inplace=True)
-                df_gastos_pq["organismo_nombre"] = "Senado de la República"
-
-                df_gastos_pq.to_parquet(
-                    gastos_path, engine="pyarrow", compression="zstd"
-                )
+        viajes_path = os.path.join(self.output_dir, "senado_viajes.parquet")
+        if self.partitions["viajes"].publish(viajes_path):
+            logger.info(f"Parquet file generated for Viajes: {viajes_path}")
@@ -1,19 +1,90 @@
-import os
-import json
+import asyncio
+import datetime
 import logging
-from core.api_client import SenadoAPIClient
+import os
+from core.api_client import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_REQUESTS_PER_SECOND,
+    DEFAULT_REQUESTS_PER_SECOND,
+    AsyncSenadoAPIClient,
+)
+from core.raw_cache import (
+    DEFAULT_CACHE_FORMAT,
+    records_fingerprint,
+    split_payload,
+    utc_now,
+)
+from etl.job_journal import JobJournal
 from tqdm import tqdm
 
 logger = logging.getLogger("SenadoScraper")
 
+# Overridable with SENADO_API_BASE_URL (e.g. a local mock for benchmarks)
+BASE_URL = "https://web-back.senado.cl/api/transparency"
+
+# Cached months this recent (current month included) are compared with the
+# API on every run, since the Senate still corrects them; older ones are closed
+REVALIDATE_MONTHS = 3
+
+# Records per request, and how many times pages that failed (after the
+# client's own retries) are requested again before giving up on the month
+PAGE_SIZE = 500
+PAGE_RETRY_ROUNDS = 3
+
+# (cache folder, API endpoint) downloaded by run_all
+CATEGORIES = [
+    ("dietas", "diet"),
+    ("gastos_operacionales", "expenses/senator-Operational-expenses"),
+    ("viajes_nacionales", "domestic-air-tickets"),
+    ("misiones_extranjero", "foreign-missions"),
+]
+
+# Staff are very heavy (sometimes 15,000+ records/month): their months are
+# streamed page by page into Parquet instead of being merged in memory
+STAFF_CATEGORIES = [
+    ("dotacion_planta", "dotation/plant-equipment"),
+    ("dotacion_contrata", "dotation/staffing"),
+    ("dotacion_honorarios", "dotation/fee"),
+]
+STREAMED = {category_name for category_name, _ in STAFF_CATEGORIES}
+
+# Pages of a streamed month downloaded (and held in memory) at once
+STREAM_WINDOW = 8
+
 
 class SenadoScraper:
-    def __init__(self, start_year=2022, end_year=2024, force_refresh=False):
+    def __init__(
+        self,
+        start_year=2022,
+        end_year=2024,
+        force_refresh=False,
+        cache_format=DEFAULT_CACHE_FORMAT,
+        requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        max_requests_per_second=DEFAULT_MAX_REQUESTS_PER_SECOND,
+        revalidate_months=REVALIDATE_MONTHS,
+        journal=None,
+        base_url=None,
+        include_staff=True,
+    ):
         self.start_year = start_year
         self.end_year = end_year
         self.force_refresh = force_refresh
-        self.api_client = SenadoAPIClient(base_cache_dir="data/raw/senado")
-        self.base_url = "https://web-back.senado.cl/api/transparency"
+        self.revalidate_months = revalidate_months
+        self.today = datetime.date.today()
+        self.api_client = AsyncSenadoAPIClient(
+            base_cache_dir="data/raw/senado",
+            cache_format=cache_format,
+            requests_per_second=requests_per_second,
+            max_concurrency=max_concurrency,
+            max_requests_per_second=max_requests_per_second,
+            endpoint_formats={category_name: "parquet" for category_name in STREAMED},
+        )
+        self.include_staff = include_staff
+        self.base_url = (
+            base_url or os.environ.get("SENADO_API_BASE_URL") or BASE_URL
+        ).rstrip("/")
+        self.journal = journal or JobJournal()
 
     def _build_url(
         self, endpoint: str, year: int, month: int, page_size: int = 500, page: int = 1
@@ -24,97 +95,330 @@ class SenadoScraper:
         url += f"&pagination[pageSize]={page_size}&pagination[page]={page}"
         return url
 
-    def fetch_category(self, category_name: str, endpoint: str):
-        """Downloads and iterates months and years for a specific category resolving API pagination."""
-        logger.info(
-            f"== Starting extraction for {category_name} ({self.start_year}-{self.end_year}) =="
+    @staticmethod
+    def _parse_page(response_json):
+        """(records, pageCount) of a response."""
+        if "data" in response_json and isinstance(response_json["data"], dict):
+            # Strapi v4 paginated format
+            page_items = response_json["data"].get("data", [])
+            meta = response_json["data"].get("meta", {})
+            return page_items, meta.get("pagination", {}).get("pageCount", 1)
+        if "data" in response_json and isinstance(response_json["data"], list):
+            # Simple list
+            return response_json["data"], 1
+        return [], 1
+
+    async def _try_page(self, endpoint, year, month, page, etag=None):
+        """fetch_page for one page; None instead of raising once retries ran out."""
+        url = self._build_url(endpoint, year, month, page_size=PAGE_SIZE, page=page)
+        try:
+            return await self.api_client.fetch_page(url, etag=etag)
+        except Exception as e:
+            logger.warning(f"Error extracting {url}: {e}")
+            return None
+
+    async def _fetch_pages(self, endpoint, year, month):
+        """Downloads every page of a month.
+
+        Page 1 gives the page count; the remaining pages are then requested
+        together (the client's rate budget paces them) and merged in page
+        order. Pages that still fail are retried on their own for a few
+        rounds.
+
+        :return: (records, etags) or None if a page could not be downloaded,
+            so a partial month is never cached.
+        """
+        first = await self._try_page(endpoint, year, month, 1)
+        if first is None:
+            return None
+        items, total_pages = self._parse_page(first[0])
+        pages = {1: (items, first[1])}
+
+        missing = list(range(2, total_pages + 1))
+        for _ in range(PAGE_RETRY_ROUNDS):
+            if not missing:
+                break
+            results = await asyncio.gather(
+                *(self._try_page(endpoint, year, month, page) for page in missing)
+            )
+            for page, result in zip(missing, results):
+                if result is not None:
+                    pages[page] = (self._parse_page(result[0])[0], result[1])
+            missing = [page for page in missing if page not in pages]
+
+        if missing:
+            logger.error(
+                f"Giving up on {endpoint} {year}-{month:02d}: pages {missing} failed"
+            )
+            return None
+        ordered = [pages[page] for page in range(1, total_pages + 1)]
+        return (
+            [item for page_items, _ in ordered for item in page_items],
+            [etag for _, etag in ordered],
+        )
+
+    async def _stream_pages(self, endpoint, year, month, writer):
+        """Downloads every page of a month into a `StreamingMonthWriter`.
+
+        Same requests and retry rounds as `_fetch_pages`, but at most
+        STREAM_WINDOW pages are in flight and each one is handed to the
+        writer as soon as it arrives, so memory does not grow with the month.
+
+        :return: the page ETags, or None if a page could not be downloaded.
+        """
+        first = await self._try_page(endpoint, year, month, 1)
+        if first is None:
+            return None
+        items, total_pages = self._parse_page(first[0])
+        writer.add_page(1, items)
+        etags = {1: first[1]}
+
+        window = asyncio.Semaphore(STREAM_WINDOW)
+
+        async def fetch(page):
+            async with window:
+                result = await self._try_page(endpoint, year, month, page)
+                if result is not None:
+                    writer.add_page(page, self._parse_page(result[0])[0])
+                    etags[page] = result[1]
+
+        missing = list(range(2, total_pages + 1))
+        for _ in range(PAGE_RETRY_ROUNDS):
+            if not missing:
+                break
+            await asyncio.gather(*(fetch(page) for page in missing))
+            missing = [page for page in missing if page not in etags]
+
+        if missing:
+            logger.error(
+                f"Giving up on {endpoint} {year}-{month:02d}: pages {missing} failed"
+            )
+            return None
+        return [etags[page] for page in range(1, total_pages + 1)]
+
+    async def _not_modified(self, endpoint, year, month, etags):
+        """Conditional GET of every page with its stored ETag; True if all are 304."""
+        if not etags or not all(etags):
+            return False
+        results = await asyncio.gather(
+            *(
+                self._try_page(endpoint, year, month, page, etag=etag)
+                for page, etag in enumerate(etags, start=1)
+            )
         )
+        return all(result is not None and result[0] is None for result in results)
+
+    async def _fetch_month(self, category_name, endpoint, year, month):
+        """Downloads a month and caches it if its content changed.
 
-        total_months = (self.end_year - self.start_year + 1) * 12
-        pbar = tqdm(total=total_months, desc=category_name)
-
-        for year in range(self.start_year, self.end_year + 1):
-            for month in range(1, 13):
-                pbar.set_postfix({"Year": year, "Month": f"{month:02d}"})
-
-                cache_path = self.api_client._get_cache_path(category_name, year, month)
-                if not self.force_refresh and os.path.exists(cache_path):
-                    pbar.update(1)
-                    continue
-
-                all_pages_data = []
-                current_page = 1
-                total_pages = 1
-
-                while current_page <= total_pages:
-                    url = self._build_url(
-                        endpoint, year, month, page_size=500, page=current_page
-                    )
-
-                    try:
-                        response_json = self.api_client._fetch_with_retry(url)
-
-                        if "data" in response_json and isinstance(
-                            response_json["data"], dict
-                        ):
-                            # Strapi v4 paginated format
-                            page_items = response_json["data"].get("data", [])
-                            meta = response_json["data"].get("meta", {})
-
-                            all_pages_data.extend(page_items)
-
-                            if "pagination" in meta:
-                                total_pages = meta["pagination"].get("pageCount", 1)
-                            else:
-                                total_pages = 1
-                        elif "data" in response_json and isinstance(
-                            response_json["data"], list
-                        ):
-                            # Simple list
-                            all_pages_data.extend(response_json["data"])
-                            total_pages = 1
-                        else:
-                            total_pages = 1
-
-                    except Exception as e:
-                        logger.error(f"Error extracting {url}: {e}")
-                        break
-
-                    current_page += 1
-
-                # Save the consolidated JSON with all pages to disk (only if data was retrieved)
-                if all_pages_data:
-                    consolidated_json = {
-                        "data": {
-                            "data": all_pages_data,
-                            "meta": {
-                                "pagination": {
-                                    "page": 1,
-                                    "pageSize": len(all_pages_data),
-                                    "pageCount": 1,
-                                    "total": len(all_pages_data),
-                                }
-                            },
+        Cached months are first revalidated with their page ETags when the API
+        sent them. Otherwise the month is downloaded and its content hash is
+        compared with the cached one: an unchanged month is not rewritten, so
+        the processors (and the pipeline) do not see it as new input.
+
+        :return: True if the cached month was written, False if it was
+            unchanged (or nothing is published yet), None if it failed.
+        """
+        cache = self.api_client.cache
+        freshness = self.api_client.freshness
+        entry = freshness.get(category_name, year, month) or {}
+        cached = cache.exists(category_name, year, month)
+        now = utc_now()
+
+        if cached and await self._not_modified(
+            endpoint, year, month, entry.get("etags")
+        ):
+            freshness.update(category_name, year, month, checked_at=now)
+            return False
+
+        result = await self._fetch_pages(endpoint, year, month)
+        if result is None:
+            return None
+        all_pages_data, etags = result
+        # Nothing published yet for the month: keep whatever is cached
+        if not all_pages_data:
+            return False
+
+        digest = records_fingerprint(all_pages_data)
+        previous = entry.get("sha256")
+        if previous is None and cached:
+            # Months cached before freshness tracking
+            payload = await asyncio.to_thread(cache.load, category_name, year, month)
+            if payload is not None:
+                previous = records_fingerprint(split_payload(payload)[1])
+        changed = digest != previous
+
+        if changed:
+            # Save the consolidated JSON with all pages to disk
+            consolidated_json = {
+                "data": {
+                    "data": all_pages_data,
+                    "meta": {
+                        "pagination": {
+                            "page": 1,
+                            "pageSize": len(all_pages_data),
+                            "pageCount": 1,
+                            "total": len(all_pages_data),
                         }
-                    }
-                    with open(cache_path, "w", encoding="utf-8") as f:
-                        json.dump(consolidated_json, f, ensure_ascii=False, indent=2)
+                    },
+                }
+            }
+            await asyncio.to_thread(
+                cache.save, category_name, year, month, consolidated_json
+            )
+        freshness.update(
+            category_name,
+            year,
+            month,
+            fetched_at=now if changed else entry.get("fetched_at", now),
+            checked_at=now,
+            records=len(all_pages_data),
+            sha256=digest,
+            etags=etags,
+        )
+        return changed
+
+    async def _stream_month(self, category_name, endpoint, year, month):
+        """`_fetch_month` for the staffing categories, in bounded memory.
+
+        The pages go straight to a Parquet month file (see
+        `RawMonthCache.stream_writer`) that replaces the cached month only
+        if its fingerprint changed. Same return values as `_fetch_month`.
+        """
+        cache = self.api_client.cache
+        freshness = self.api_client.freshness
+        entry = freshness.get(category_name, year, month) or {}
+        now = utc_now()
+
+        if cache.exists(category_name, year, month) and await self._not_modified(
+            endpoint, year, month, entry.get("etags")
+        ):
+            freshness.update(category_name, year, month, checked_at=now)
+            return False
+
+        writer = cache.stream_writer(category_name, year, month)
+        try:
+            etags = await self._stream_pages(endpoint, year, month, writer)
+            # Nothing published yet for the month: keep whatever is cached
+            if etags is None or not writer.records:
+                writer.discard()
+                return None if etags is None else False
+
+            digest = writer.fingerprint()
+            changed = digest != entry.get("sha256")
+            if changed:
+                await asyncio.to_thread(writer.commit)
+            else:
+                writer.discard()
+        except BaseException:
+            writer.discard()
+            raise
+        freshness.update(
+            category_name,
+            year,
+            month,
+            fetched_at=now if changed else entry.get("fetched_at", now),
+            checked_at=now,
+            records=writer.records,
+            sha256=digest,
+            etags=etags,
+        )
+        return changed
+
+    def _needs_fetch(self, category_name, year, month):
+        """Freshness policy of a month.
+
+        Future months are skipped. Months not cached yet are fetched. Cached
+        months are revalidated only within the last `revalidate_months`
+        (current month included); older months are closed and never refetched.
+        `force_refresh` revalidates every month.
+        """
+        age = (self.today.year - year) * 12 + self.today.month - month
+        if age < 0:
+            return False
+        if self.force_refresh or age < self.revalidate_months:
+            return True
+        return not self.api_client.cache.exists(category_name, year, month)
 
-                pbar.update(1)
+    async def _fetch_category(self, category_name: str, endpoint: str):
+        logger.info(
+            f"== Starting extraction for {category_name} ({self.start_year}-{self.end_year}) =="
+        )
+        wanted = [
+            (year, month, "")
+            for year in range(self.start_year, self.end_year + 1)
+            for month in range(1, 13)
+            if self._needs_fetch(category_name, year, month)
+        ]
+        # The journal keeps months that failed in their retry backoff and
+        # hands back the ones a dead run left behind
+        journal = self.journal
+        journal.submit("senado", category_name, wanted, reset=self.force_refresh)
+        months = journal.due("senado", category_name, keys=wanted)
+        waiting = len(wanted) - len(months)
+        if waiting:
+            logger.info(f"{category_name}: {waiting} failed months wait for a retry")
+        pbar = tqdm(total=len(months), desc=category_name)
+        fetch_month = (
+            self._stream_month if category_name in STREAMED else self._fetch_month
+        )
 
+        async def fetch(year, month):
+            journal.start("senado", category_name, year, month)
+            try:
+                changed = await fetch_month(category_name, endpoint, year, month)
+            except Exception as e:
+                logger.error(f"{category_name} {year}-{month:02d} failed: {e}")
+                changed = None
+                error = str(e)
+            else:
+                error = "pages failed after retries"
+            if changed is None:
+                journal.fail("senado", category_name, year, month, error=error)
+            else:
+                entry = self.api_client.freshness.get(category_name, year, month)
+                journal.finish(
+                    "senado",
+                    category_name,
+                    year,
+                    month,
+                    records=(entry or {}).get("records", 0),
+                )
+            pbar.update(1)
+            return changed
+
+        # Months are queued together; the client's token bucket and
+        # concurrency limit decide how fast they actually go out
+        changed = await asyncio.gather(
+            *(fetch(year, month) for year, month, _ in months)
+        )
         pbar.close()
+        logger.info(
+            f"{category_name}: {len(months)} months checked, "
+            f"{sum(c is True for c in changed)} changed, "
+            f"{sum(c is None for c in changed)} failed"
+        )
 
-    def run_all(self):
-        """Executes the download of the main data sources for senators."""
-        self.fetch_category("dietas", "diet")
-        self.fetch_category(
-            "gastos_operacionales", "expenses/senator-Operational-expenses"
+    def fetch_category(self, category_name: str, endpoint: str):
+        """Downloads and iterates months and years for a specific category resolving API pagination."""
+        asyncio.run(self._fetch_category(category_name, endpoint))
+        self.api_client.rate.save()
+
+    async def _run_all(self):
+        categories = CATEGORIES + (STAFF_CATEGORIES if self.include_staff else [])
+        # All categories share the client's rate budget
+        await asyncio.gather(
+            *(
+                self._fetch_category(category_name, endpoint)
+                for category_name, endpoint in categories
+            )
         )
-        self.fetch_category("viajes_nacionales", "domestic-air-tickets")
-        self.fetch_category("misiones_extranjero", "foreign-missions")
-        # Fee staff are very heavy (sometimes 15,000+ records/month).
-        # They are omitted by default if only the Senator is relevant, or they can be uncommented.
-        # self.fetch_category("dotacion_contrata", "dotation/staffing")
-        # self.fetch_category("dotacion_honorarios", "dotation/fee")
 
+    def run_all(self):
+        """Executes the download of the senators' data and the Senate staff."""
+        # Rewrite months cached by older versions (pretty-printed JSON)
+        self.api_client.cache.migrate()
+
+        asyncio.run(self._run_all())
+        self.api_client.rate.save()
         logger.info("== Extraction successfully completed ==")
@@ -12,22 +12,35 @@ logging.basicConfig(
 
 DATA_DIR = "data"
 
+# Overridable with CPLT_BASE_URL (e.g. a local mock for benchmarks)
+BASE_URL = (
+    "https://www.consejotransparencia.cl/transparencia_activa/datoabierto/archivos"
+)
+
 DATASETS_CONFIG = {
     "Personal de Planta": {
-        "url": "https://www.consejotransparencia.cl/transparencia_activa/datoabierto/archivos/TA_PersonalPlanta.csv",
+        "url": f"{BASE_URL}/TA_PersonalPlanta.csv",
         "filename": "TA_PersonalPlanta.csv",
     },
     "Personal a Contrata": {
-        "url": "https://www.consejotransparencia.cl/transparencia_activa/datoabierto/archivos/TA_PersonalContrata.csv",
+        "url": f"{BASE_URL}/TA_PersonalContrata.csv",
         "filename": "TA_PersonalContrata.csv",
     },
     "Personal a Honorarios": {
-        "url": "https://www.consejotransparencia.cl/transparencia_activa/datoabierto/archivos/TA_PersonalContratohonorarios.csv",
+        "url": f"{BASE_URL}/TA_PersonalContratohonorarios.csv",
         "filename": "TA_PersonalContratohonorarios.csv",
     },
 }
 
 
+def dataset_url(config, base_url=None):
+    """URL of a dataset, under base_url or $CPLT_BASE_URL when set."""
+    base_url = base_url or os.environ.get("CPLT_BASE_URL")
+    if not base_url:
+        return config["url"]
+    return f"{base_url.rstrip('/')}/{config['url'].rsplit('/', 1)[-1]}"
+
+
 def get_remote_metadata(url):
     """Fetches the Last-Modified and Content-Length using a lightweight HEAD request."""
     try:
@@ -93,15 +106,21 @@ def download_file(url, file_path):
         return False
 
 
-def check_and_sync():
-    """Checks all datasets and downloads them if they are outdated."""
+def check_and_sync(run_ingest=True, base_url=None):
+    """Checks all datasets and downloads them if they are outdated.
+
+    :param run_ingest: If True, runs the Parquet ingestion after a download.
+        The pipeline orchestrator passes False and runs it as its own stage.
+    :param base_url: Serve the CSVs from here instead (see dataset_url).
+    :return: True if any file was downloaded.
+    """
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
     updates_made = False
 
     for name, config in DATASETS_CONFIG.items():
-        url = config["url"]
+        url = dataset_url(config, base_url)
 
         try:
             from pathlib import Path
@@ -153,7 +172,11 @@ def check_and_sync():
 
         if needs_download:
             # First, clean up the old Parquet so the ingest script knows it must be regenerated
-            parquet_path = file_path.replace(".csv", ".parquet")
+            parquet_path = os.path.join(
+                DATA_DIR,
+                "parquet",
+                os.path.basename(file_path).replace(".csv", ".parquet"),
+            )
             if os.path.exists(parquet_path):
                 os.remove(parquet_path)
                 logging.info(f"Removed outdated parquet: {parquet_path}")
@@ -168,13 +191,14 @@ def check_and_sync():
                     os.utime(file_path, (timestamp, timestamp))
                 updates_made = True
 
-    if updates_made:
+    if not updates_made:
+        logging.info("All files are up-to-date. No ingestion needed.")
+    elif run_ingest:
         logging.info(
             "Updates were downloaded. Triggering Parquet ingestion pipeline..."
         )
         subprocess.run(["uv", "run", "src/etl/ingest.py"], check=True)
-    else:
-        logging.info("All files are up-to-date. No ingestion needed.")
+    return updates_made
 
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 from src.core.config import MONTHS_MAP
 from src.core.logger import get_logger
+from src.core.queries import parquet_columns, period_sql
 
 logger = get_logger()
 
@@ -43,14 +44,11 @@ def format_clp(value):
 def process_and_display_results(result_df):
     """Main rendering function for the search results."""
     # 1. Clean and normalize data
-    result_df["mes_num"] = (
-        result_df["Mes"]
-        .astype(str)
-        .str.capitalize()
-        .map(MONTHS_MAP)
-        .fillna(0)
-        .astype(int)
-    )
+    if "mes_num" not in result_df.columns:
+        result_df["mes_num"] = (
+            result_df["Mes"].astype(str).str.capitalize().map(MONTHS_MAP)
+        )
+    result_df["mes_num"] = result_df["mes_num"].fillna(0).astype(int)
 
     result_df = result_df.sort_values(by=["anyo", "mes_num"], ascending=[False, False])
 
@@ -102,7 +100,7 @@ def render_data_table(result_df):
     other_cols = [
         c
         for c in result_df.columns
-        if c not in final_cols and c not in ["mes_num", "search_vector"]
+        if c not in final_cols and c not in ["mes_num", "search_vector", "persona_id"]
     ]
 
     display_df = result_df[final_cols + other_cols].copy()
@@ -156,30 +154,33 @@ def render_data_table(result_df):
             or "camara" in organismo
         ):
             render_gastos_detalle(selected_row)
+            if "senado" in origen or "senado" in organismo:
+                render_viajes_detalle(selected_row)
 
     csv_data = result_df.to_csv(index=False, sep=";", encoding="latin-1")
     st.download_button("Descargar CSV", csv_data, "reporte.csv", "text/csv")
 
 
+def _person_key(selected_row):
+    """The llave_senador of a row: its non-empty 'Nombres Paterno Materno'."""
+    # The key in the parquet files is nombre+paterno+materno
+    parts = []
+    for value in (
+        selected_row["Nombres"],
+        selected_row["Paterno"],
+        selected_row.get("Materno", ""),
+    ):
+        if pd.notna(value) and str(value).strip():
+            parts.append(str(value).strip())
+    return " ".join(parts).replace("  ", " ")
+
+
 def render_gastos_detalle(selected_row):
     """Shows a sub-window or table with the detailed expenses for the selected row."""
     import duckdb
     import os
 
-    # Extract key variables from the row
-    nombres = selected_row["Nombres"]
-    paterno = selected_row["Paterno"]
-    materno = selected_row.get("Materno", "")
-
-    # The key in the parquet file is nombre+paterno+materno
-    parts = []
-    if pd.notna(nombres) and str(nombres).strip():
-        parts.append(str(nombres).strip())
-    if pd.notna(paterno) and str(paterno).strip():
-        parts.append(str(paterno).strip())
-    if pd.notna(materno) and str(materno).strip():
-        parts.append(str(materno).strip())
-    llave = " ".join(parts).replace("  ", " ")
+    llave = _person_key(selected_row)
 
     # Handle the month as integer because parquet uses numbers
     from src.core.config import MONTHS_MAP
@@ -202,20 +203,21 @@ def render_gastos_detalle(selected_row):
     if not gastos_files:
         return
 
-    selects = []
-    for f in gastos_files:
-        selects.append(f"""
-            SELECT gastos_operacionales AS Concepto, sum(monto) as Monto
-            FROM read_parquet('{f}')
-            WHERE anyo = ? AND Mes = ? AND llave_senador = ?
-            GROUP BY gastos_operacionales
-        """)
-
-    query = " UNION ALL ".join(selects)
-    query = f"SELECT Concepto, sum(Monto) as Monto FROM ({query}) GROUP BY Concepto ORDER BY Monto DESC"
-
     try:
-        full_params = [anyo, mes_num, llave] * len(gastos_files)
+        selects = []
+        for f in gastos_files:
+            periodo_sql, _ = period_sql(parquet_columns(f))
+            selects.append(f"""
+                SELECT gastos_operacionales AS Concepto, sum(monto) as Monto
+                FROM read_parquet('{f}')
+                WHERE {periodo_sql} = ? AND llave_senador = ?
+                GROUP BY gastos_operacionales
+            """)
+
+        query = " UNION ALL ".join(selects)
+        query = f"SELECT Concepto, sum(Monto) as Monto FROM ({query}) GROUP BY Concepto ORDER BY Monto DESC"
+
+        full_params = [anyo * 100 + mes_num, llave] * len(gastos_files)
         df_detalle = duckdb.query(query, params=full_params).to_df()
     except Exception as e:
         logger.error(
@@ -280,6 +282,63 @@ def render_gastos_detalle(selected_row):
             st.plotly_chart(fig, use_container_width=True)
 
 
+def render_viajes_detalle(selected_row):
+    """Shows the domestic flights and foreign missions of the selected senator's month.
+
+    senado_viajes is sorted by periodo and llave_senador, so DuckDB reads only
+    the row group holding the person's month (row-group statistics) instead
+    of scanning the file.
+    """
+    import os
+
+    import duckdb
+
+    path = os.path.join("data", "parquet", "senado_viajes.parquet")
+    if not os.path.exists(path):
+        return
+
+    llave = _person_key(selected_row)
+    mes_str = selected_row["Mes"]
+    anyo = int(selected_row["anyo"])
+    periodo = anyo * 100 + MONTHS_MAP.get(mes_str, 1)
+
+    try:
+        df_viajes = duckdb.query(
+            """
+            SELECT tipo AS Tipo, fecha AS Fecha, destino AS Destino,
+                   motivo AS Motivo, monto AS Monto
+            FROM read_parquet(?)
+            WHERE periodo = ? AND llave_senador = ?
+            ORDER BY fecha
+            """,
+            params=[path, periodo, llave],
+        ).to_df()
+    except duckdb.Error as e:
+        logger.error(
+            "travel query failed",
+            extra={"person": llave, "error": str(e).replace("\n", " ")},
+        )
+        st.error(f"No se pudieron cargar los viajes: {e}")
+        return
+
+    st.subheader(f":material/flight: Viajes y Misiones ({mes_str} {anyo})")
+    if df_viajes.empty:
+        st.info(
+            "No se registraron viajes nacionales ni misiones al extranjero este mes."
+        )
+        return
+
+    montos = df_viajes["Monto"]
+    if montos.notna().any():
+        st.metric("Total en viajes", format_clp(montos.sum()))
+    if montos.isna().any():
+        st.caption("Algunos viajes no informan monto y no se suman al total.")
+    df_viajes["Monto"] = df_viajes["Monto"].apply(
+        lambda x: format_clp(x) if pd.notnull(x) else ""
+    )
+    st.dataframe(df_viajes, hide_index=True)
+
+
 def render_distribution_chart(result_df, calc_col):
     """Renders the Plotly histogram of salary distributions."""
     fig = px.histogram(
@@ -0,0 +1,328 @@
+import os
+
+import duckdb
+import pandas as pd
+
+from audits.audit_utils import find_multiempleo, generate_unified_sql
+from benchmarks.synthetic_cplt import generate_csv
+from etl.ingest import process_csv_to_parquet
+from etl.parquet_writer import APP_COLUMNS, APP_SORT, write_dataframe
+
+
+def _write(tmp_path, name, rows):
+    return write_dataframe(
+        pd.DataFrame(rows),
+        str(tmp_path / f"{name}.parquet"),
+        columns=APP_COLUMNS,
+        order_by=APP_SORT,
+    )
+
+
+def _person(nombres, paterno, materno, organismo, sueldo, periodo=202401):
+    return {
+        "Nombres": nombres,
+        "Paterno": paterno,
+        "Materno": materno,
+        "organismo_nombre": organismo,
+        "remuliquida_mensual": sueldo,
+        "anyo": periodo // 100,
+        "Mes": "Enero",
+        "periodo": periodo,
+    }
+
+
+def test_persona_id_is_the_normalized_name_hash(tmp_path):
+    """Test that ingest and the app writer hash names the same way, NULL without a name."""
+    csv_path = tmp_path / "TA_PersonalPlanta.csv"
+    generate_csv(str(csv_path), "Planta", 30_000, seed=3)
+    ingested = process_csv_to_parquet(str(csv_path), parquet_dir=str(tmp_path / "pq"))
+    nombres, paterno, materno, persona_id = duckdb.query(
+        f"SELECT Nombres, Paterno, Materno, persona_id FROM read_parquet('{ingested}') LIMIT 1"
+    ).fetchone()
+    assert persona_id is not None
+
+    # Accents, case and spacing do not change the key
+    senado = _write(
+        tmp_path,
+        "senado",
+        [
+            _person(f"  {nombres.lower()} ", paterno.upper(), materno, "Senado", 1),
+            _person(" ", None, "", "Senado", 1),
+        ],
+    )
+    keys = duckdb.query(
+        f"SELECT persona_id FROM read_parquet('{senado}') ORDER BY Paterno NULLS LAST"
+    ).fetchall()
+    assert keys == [(persona_id,), (None,)]
+
+
+def test_multiempleo_groups_people_across_sources(tmp_path):
+    """Test that one person in two organismos is found once, named from its rows."""
+    paths = [
+        (
+            "Planta",
+            _write(
+                tmp_path,
+                "planta",
+                [
+                    _person("Ana María", "Núñez", "Soto", "Municipalidad", 1_000_000),
+                    _person("Pedro", "Rojas", "Díaz", "Municipalidad", 900_000),
+                    _person("Ana María", "Núñez", "Soto", "Otro", 1, periodo=202402),
+                ],
+            ),
+        ),
+        (
+            "Senado",
+            _write(
+                tmp_path,
+                "senado",
+                [
+                    _person("ANA  MARIA", "NUNEZ", "SOTO", "Senado", 2_500_000),
+                    _person("Pedro", "Rojas", "Díaz", "Municipalidad", 100_000),
+                ],
+            ),
+        ),
+    ]
+
+    df = find_multiempleo(paths, 2024, "Enero")
+
+    assert len(df) == 1
+    row = df.iloc[0]
+    assert row["nombre_completo"] == "ANA MARIA NUNEZ SOTO"
+    assert row["num_empleos"] == 2
+    assert row["sueldo_total"] == 3_500_000
+    assert list(row["lista_organismos"]) == ["Municipalidad", "Senado"]
+    assert list(row["tipos_contrato"]) == ["Planta", "Senado"]
+
+
+def test_unified_sql_hashes_files_without_persona_id(tmp_path):
+    """Test that files ingested before persona_id existed still get the key."""
+    path = str(tmp_path / "old.parquet")
+    old = pd.DataFrame([_person("Ana María", "Núñez", "Soto", "Senado", 1)])
+    duckdb.from_df(old).write_parquet(path)
+
+    base_sql, params = generate_unified_sql([("Senado", path)], 2024, "Enero")
+    (persona_id,) = duckdb.execute(
+        f"SELECT persona_id FROM ({base_sql})", params
+    ).fetchone()
+
+    new = _write(tmp_path, "new", [_person("ANA MARIA", "NUNEZ", "SOTO", "X", 1)])
+    assert duckdb.query(f"SELECT persona_id FROM '{new}'").fetchone() == (persona_id,)
+
+
+def _history_rows(periodos, organismo, sueldo=1_000_000):
+    return [
+        _person("Ana María", "Núñez", "Soto", organismo, sueldo, periodo=p)
+        for p in periodos
+    ]
+
+
+def test_multiempleo_streaks_are_updated_one_month_at_a_time(tmp_path):
+    """Test streaks of consecutive months and that a new month only aggregates itself."""
+    from etl.audit_tables import MultiempleoHistory
+
+    planta = _history_rows([202311, 202312, 202401, 202402, 202404], "Municipalidad")
+    planta += [_person("Pedro", "Rojas", "Díaz", "Hospital", 1, periodo=202402)]
+    senado = _history_rows([202311, 202312, 202401, 202404], "Senado", 500_000)
+    senado += [_person("Pedro", "Rojas", "Díaz", "Senado", 2, periodo=202402)]
+    sources = {
+        "planta": _write(tmp_path, "planta", planta),
+        "senado": _write(tmp_path, "senado", senado),
+    }
+    out_path = str(tmp_path / "multiempleo_rachas.parquet")
+    history = MultiempleoHistory(sources, str(tmp_path / "work"), out_path)
+
+    def streaks():
+        return duckdb.query(
+            f"SELECT nombre, inicio, fin, meses, sueldo_total, organismos "
+            f"FROM read_parquet('{out_path}') ORDER BY nombre, inicio"
+        ).fetchall()
+
+    assert len(history.update()) == 5
+    ana = "ANA MARIA NUNEZ SOTO"
+    assert streaks() == [
+        (ana, 202311, 202401, 3, 4_500_000, ["Municipalidad", "Senado"]),
+        (ana, 202404, 202404, 1, 1_500_000, ["Municipalidad", "Senado"]),
+        ("PEDRO ROJAS DIAZ", 202402, 202402, 1, 3, ["Hospital", "Senado"]),
+    ]
+    assert history.update() == []
+
+    # A new month in one source: only that month is aggregated
+    _write(tmp_path, "senado", senado + _history_rows([202405], "Senado", 500_000))
+    _write(tmp_path, "planta", planta + _history_rows([202405], "Municipalidad"))
+    assert history.update() == [(2024, 5)]
+    assert streaks()[1] == (
+        ana,
+        202404,
+        202405,
+        2,
+        3_000_000,
+        ["Municipalidad", "Senado"],
+    )
+    assert len(streaks()) == 3
+
+    incremental = streaks()
+    history.update(force=True)
+    assert streaks() == incremental
+
+
+def test_salary_sketches_merge_months_within_their_accuracy(tmp_path):
+    """Test median/MAD/p90 from merged monthly sketches and the robust outlier flag."""
+    from audits.audit_utils import find_salary_outliers
+    from etl.audit_tables import SKETCH_ALPHA, SalarySketches, sketch_stats_sql
+
+    def row(nombre, sueldo, periodo, estamento):
+        row = _person(nombre, "Soto", "Rojas", "Servicio", sueldo, periodo=periodo)
+        row.update(Mes="Enero" if periodo == 202401 else "Febrero")
+        return {**row, "estamento": estamento}
+
+    rows = []
+    for periodo in (202401, 202402):
+        rows += [
+            row(f"P{i}", 900_000 + 10_000 * i, periodo, "Profesional")
+            for i in range(40)
+        ]
+        if periodo == 202402:
+            rows[-1]["remuliquida_mensual"] = 9_000_000
+        # A flat scale: everyone earns the same, one person 15% more
+        rows += [row(f"A{i}", 600_000, periodo, "Auxiliar") for i in range(20)]
+        rows.append(row("A20", 690_000, periodo, "Auxiliar"))
+        # One person paid in two months is not a group of two
+        sueldo = 1_000_000 if periodo == 202401 else 3_000_000
+        rows.append(row("D0", sueldo, periodo, "Directivo"))
+    source = _write(tmp_path, "planta", rows)
+    sketch_path = str(tmp_path / "sueldos_sketch.parquet")
+    sketches = SalarySketches({"planta": source}, str(tmp_path / "work"), sketch_path)
+    assert sketches.update() == [(2024, 1), (2024, 2)]
+
+    (personas, meses, mediana, mad, p90) = duckdb.execute(
+        f"SELECT personas, meses, mediana, mad, p90 FROM ({sketch_stats_sql()}) "
+        "WHERE estamento = 'Profesional'",
+        [sketch_path],
+    ).fetchone()
+    exact = duckdb.query(
+        f"""
+        SELECT median(s), mad(s), quantile_disc(s, 0.9)
+        FROM (
+            SELECT remuliquida_mensual AS s FROM '{source}'
+            WHERE estamento = 'Profesional'
+        )
+        """
+    ).fetchone()
+    assert (personas, meses) == (40, 2)
+    assert abs(mediana - exact[0]) <= 2 * SKETCH_ALPHA * exact[0]
+    assert abs(p90 - exact[2]) <= SKETCH_ALPHA * exact[2]
+    assert abs(mad - exact[1]) <= 2 * SKETCH_ALPHA * exact[0]
+
+    paths = [("Planta", source)]
+    yearly = find_salary_outliers(paths, sketch_path, 2024, min_people=2)
+    assert yearly["sueldo"].tolist() == [9_000_000]
+    assert yearly["Mes"].tolist() == ["Febrero"]
+    assert find_salary_outliers(paths, sketch_path, 2024, "Enero").empty
+
+
+def test_surname_clusters_are_scored_against_the_national_baseline(tmp_path):
+    """Test that a rare surname repeated in one organismo outranks a common one."""
+    from audits.audit_utils import find_surname_clusters
+    from etl.audit_tables import SurnameFrequencies
+
+    rows = []
+    for org in ("Servicio A", "Servicio B", "Servicio C", "Servicio D"):
+        rows += [_person(f"{org} {i}", "González", "Pérez", org, 1) for i in range(6)]
+        rows += [_person(f"{org} {i}", "Otro", f"M{i}", org, 1) for i in range(14)]
+    rows += [_person(f"Hijo {i}", "Zúñiga", "Lagos", "Servicio A", 1) for i in range(4)]
+    source = _write(tmp_path, "planta", rows)
+    freq_path = str(tmp_path / "apellidos_frecuencia.parquet")
+    SurnameFrequencies({"planta": source}, str(tmp_path / "work"), freq_path).update()
+
+    national = duckdb.query(
+        f"SELECT n FROM '{freq_path}' WHERE organismo IS NULL AND apellido = 'GONZALEZ'"
+    ).fetchall()
+    assert national == [(24,)]
+
+    organismos, apellidos = find_surname_clusters(freq_path, 2024, "Enero", 3)
+    assert organismos["organismo"].tolist()[0] == "Servicio A"
+    top = apellidos.head(3)
+    assert set(top["organismo"]) == {"Servicio A"}
+    assert set(top["apellido"]) == {"ZUNIGA", "LAGOS", "ZUNIGA LAGOS"}
+    assert set(top["cantidad_personas"]) == {4}
+    # González is about as frequent in every organismo as in the country
+    gonzalez = apellidos[apellidos["apellido"] == "GONZALEZ"]["puntaje"].max()
+    assert gonzalez < top["puntaje"].min() / 10
+
+
+def test_audit_results_are_cached_per_data_version(tmp_path):
+    """Test that a repeated audit is a file read and a data change evicts it."""
+    from audits.result_cache import AuditResultCache
+
+    source = _write(
+        tmp_path,
+        "planta",
+        [
+            _person("Ana", "Soto", "Rojas", "Municipalidad", 1_000_000),
+            _person("Ana", "Soto", "Rojas", "Hospital", 500_000),
+        ],
+    )
+    paths = [("Planta", source)]
+    cache_dir = tmp_path / "cache"
+    calls = []
+
+    def multiempleo():
+        calls.append(1)
+        return find_multiempleo(paths, 2024, "Enero")
+
+    def run():
+        cache = AuditResultCache(str(cache_dir), [source])
+        return cache.get_or_compute("multiempleo", {"month": "Enero"}, multiempleo)
+
+    first = run()
+    second = run()
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert list(second.iloc[0]["lista_organismos"]) == ["Hospital", "Municipalidad"]
+
+    pair = AuditResultCache(str(cache_dir), [source]).get_or_compute(
+        "par", {}, lambda: (first, first.head(0))
+    )
+    assert (
+        AuditResultCache(str(cache_dir), [source])
+        .get_or_compute("par", {}, lambda: None)[1]
+        .empty
+    )
+    assert len(pair) == 2
+
+    # New data: new version, the old results are deleted
+    old_versions = os.listdir(cache_dir)
+    _write(tmp_path, "planta", [_person("Ana", "Soto", "Rojas", "Hospital", 1)])
+    assert run().empty
+    assert len(calls) == 2
+    assert not set(os.listdir(cache_dir)) & set(old_versions)
+
+
+def test_audit_cache_misses_on_a_new_result_version_or_a_corrupt_entry(tmp_path):
+    """Test that changed audit code or an unreadable entry recomputes the result."""
+    from audits.result_cache import AuditResultCache
+
+    source = _write(tmp_path, "planta", [_person("Ana", "Soto", "Rojas", "X", 1)])
+    cache_dir = str(tmp_path / "cache")
+    calls = []
+
+    def run(version):
+        def compute():
+            calls.append(version)
+            return pd.DataFrame({"version": [version]})
+
+        cache = AuditResultCache(cache_dir, [source], versions={"a": version})
+        return cache.get_or_compute("a", {}, compute)["version"].tolist()
+
+    assert run(1) == [1]
+    assert run(1) == [1]
+    assert run(2) == [2]
+    assert calls == [1, 2]
+
+    for root, _, names in os.walk(cache_dir):
+        for name in names:
+            with open(os.path.join(root, name), "wb") as f:
+                f.write(b"not parquet")
+    assert run(2) == [2]
+    assert calls == [1, 2, 2]
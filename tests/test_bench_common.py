@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+from benchmarks.common import run_isolated
+
+
+def test_run_isolated_reports_a_child_that_dies():
+    """Test that a crashed or OOM-killed run raises instead of hanging."""
+    result, _seconds, peak_rss = run_isolated(abs, -3)
+    assert result == 3
+    assert peak_rss > 0
+
+    with pytest.raises(RuntimeError, match="code 9"):
+        run_isolated(os._exit, 9)
@@ -0,0 +1,97 @@
+import threading
+
+import pandas as pd
+
+from etl import diputados_scraper
+from etl.diputados_scraper import DiputadosScraper
+from etl.job_journal import JobJournal
+
+DEPUTIES = {str(pid): f"Diputado {pid}" for pid in range(1001, 1011)}
+
+
+def test_gastos_pool_checkpoints_and_resumes(tmp_path, monkeypatch):
+    """Test that failed deputy-months are retried on the next run, and only those."""
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    failing = {(2024, 2, "1003"), (2024, 3, "1007")}
+    threads = set()
+    running = []
+    lock = threading.Lock()
+
+    def fetch(worker, year, month, pid):
+        with lock:
+            calls.append((year, month, pid))
+            threads.add(threading.get_ident())
+        # The job is journaled as running while its request is in flight
+        running.append(journal.summary()[0]["running"])
+        if (year, month, pid) in failing:
+            return None
+        if pid == "1005":
+            return pd.DataFrame()
+        return pd.DataFrame({"Concepto": ["Traslación"], "Monto": [f"{month}.000"]})
+
+    monkeypatch.setattr(diputados_scraper._GastosWorker, "fetch", fetch)
+    # No backoff, so the failures are due again on the next run
+    journal = JobJournal(str(tmp_path / "jobs.sqlite"), backoff=0)
+    scraper = DiputadosScraper(workers=3, requests_per_second=1000, journal=journal)
+    monkeypatch.setattr(scraper, "_cache_active_deputies", lambda: DEPUTIES)
+    months = [(2024, 1), (2024, 2), (2024, 3)]
+
+    scraper.fetch_gastos(months)
+    assert len(calls) == 30
+    assert min(running) >= 1
+    assert len(threads) > 1
+    assert scraper.gastos_store.fetched_ids(2024, 2) == {
+        int(pid) for pid in DEPUTIES
+    } - {1003}
+    # One row per deputy-month except 1005 (no expenses) and the two failures
+    assert len(scraper.gastos_store.read()) == 3 * 9 - 2
+    assert [(f["month"], f["item"]) for f in journal.failures()] == [
+        (2, "1003"),
+        (3, "1007"),
+    ]
+
+    failing.clear()
+    calls.clear()
+    scraper.fetch_gastos(months)
+    assert sorted(calls) == [(2024, 2, "1003"), (2024, 3, "1007")]
+    assert len(scraper.gastos_store.read()) == 3 * 9
+    assert journal.summary()[0]["done"] == 30
+
+
+def test_roster_only_fetches_new_profiles(tmp_path, monkeypatch):
+    """Test that the persisted roster skips the profile crawl for known deputies."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(diputados_scraper.time, "sleep", lambda s: None)
+    listing = ["1001", "1002"]
+    profiles = []
+
+    def run():
+        scraper = DiputadosScraper()
+        monkeypatch.setattr(scraper, "_fetch_listing", lambda: list(listing))
+        monkeypatch.setattr(
+            scraper,
+            "_fetch_profile_name",
+            lambda pid: profiles.append(pid) or f"Diputado {pid}",
+        )
+        return scraper
+
+    assert run()._cache_active_deputies() == {
+        "1001": "Diputado 1001",
+        "1002": "Diputado 1002",
+    }
+    assert profiles == ["1001", "1002"]
+
+    # Within the TTL not even the listing is read
+    profiles.clear()
+    listing.append("1003")
+    assert len(run()._cache_active_deputies()) == 2
+    assert profiles == []
+
+    # Once it expires only the new deputy's profile is fetched
+    scraper = run()
+    scraper.roster.listing_checked_at = "2000-01-01T00:00:00+00:00"
+    listing.remove("1001")
+    assert sorted(scraper._cache_active_deputies()) == ["1002", "1003"]
+    assert profiles == ["1003"]
+    assert scraper.roster.deputies["1001"]["name"] == "Diputado 1001"
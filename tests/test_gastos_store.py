@@ -0,0 +1,51 @@
+import pandas as pd
+
+from etl.gastos_store import GastosStore
+
+
+def _gastos(*rows):
+    return pd.DataFrame(rows, columns=["Concepto", "Monto"])
+
+
+def test_upsert_is_idempotent_per_deputy_month(tmp_path):
+    """Test that re-fetching a deputy replaces its rows instead of appending."""
+    store = GastosStore(str(tmp_path / "gastos.duckdb"))
+    store.upsert(
+        2024, 5, "1001", _gastos(("Traslación", "61.130"), ("Telefonía", "9.990"))
+    )
+    store.upsert(2024, 5, "1002", pd.DataFrame())
+    fingerprint = store.month_fingerprints()[(2024, 5)]
+
+    store.upsert(
+        2024, 5, "1001", _gastos(("Traslación", "61.130"), ("Telefonía", "9.990"))
+    )
+    assert store.month_fingerprints()[(2024, 5)] == fingerprint
+
+    store.upsert(2024, 5, "1001", _gastos(("Traslación", "70.000")))
+    df = store.read({(2024, 5)})
+    assert df[["ID_Diputado", "Concepto", "Monto"]].values.tolist() == [
+        [1001, "Traslación", "70.000"]
+    ]
+    # Deputies without expenses still count as fetched
+    assert store.fetched_ids(2024, 5) == {1001, 1002}
+    assert store.month_fingerprints()[(2024, 5)] != fingerprint
+
+
+def test_legacy_csvs_are_imported_as_text_and_removed(tmp_path):
+    """Test the one-off move of {pid}_{year}_{mm}.csv files into the store."""
+    csv_dir = tmp_path / "gastos_operacionales"
+    csv_dir.mkdir()
+    _gastos(("Traslación", "61.130")).assign(ID_Diputado=1001).to_csv(
+        csv_dir / "1001_2023_01.csv", index=False
+    )
+    pd.DataFrame().to_csv(csv_dir / "1002_2023_01.csv", index=False)
+
+    store = GastosStore(str(tmp_path / "gastos.duckdb"))
+    assert store.import_csv_dir(str(csv_dir)) == 2
+    assert not list(csv_dir.iterdir())
+
+    df = store.read()
+    assert df[["anyo", "Mes", "ID_Diputado", "Monto"]].values.tolist() == [
+        [2023, 1, 1001, "61.130"]
+    ]
+    assert store.months() == {(2023, 1)}
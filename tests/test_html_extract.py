@@ -0,0 +1,71 @@
+from benchmarks.synthetic_camara import gastos_delta, staff_page
+from etl.html_extract import extract_page
+
+
+def test_staff_page_state_and_table_in_one_parse():
+    """Test hidden fields, select names and a typed table from a full page."""
+    page = extract_page(staff_page(2024, 3, rows=25))
+
+    assert set(page.hidden) == {
+        "__VIEWSTATE",
+        "__VIEWSTATEGENERATOR",
+        "__EVENTVALIDATION",
+    }
+    assert page.hidden["__VIEWSTATEGENERATOR"] == "1A2B3C4D"
+    assert page.select_name("ddlAno").endswith("$ddlAno")
+    assert page.select_name("ddlMes").endswith("$ddlMes")
+
+    df = page.table()
+    assert list(df.columns) == [
+        "N°",
+        "Nombre",
+        "Cargo",
+        "Grado",
+        "Remuneración Bruta",
+        "Mes",
+    ]
+    assert len(df) == 25
+    assert df["N°"].tolist() == list(range(1, 26))
+    # '.'-grouped amounts stay text unless the caller says they are Chilean
+    assert df["Remuneración Bruta"].str.fullmatch(r"\d{1,3}(\.\d{3})+").all()
+    assert (df["Mes"] == "Marzo").all()
+
+
+def test_gastos_delta_response():
+    """Test that a delta response yields its hiddenField records and amounts."""
+    text = gastos_delta(2024, 5, 1001, rows=4)
+    page = extract_page(text)
+
+    assert page.hidden["__VIEWSTATE"] in text
+    assert page.hidden["__EVENTTARGET"] == ""
+    df = page.table(thousands=".", decimal=",")
+    assert list(df.columns) == ["Concepto", "Monto"]
+    assert str(df["Monto"].dtype) == "int64"
+    assert len(df) == 4
+
+    assert extract_page(gastos_delta(2024, 5, 1001, rows=0)).table() is None
+
+
+def test_irregular_tables():
+    """Test entities, colspans, nested tables, blanks and unclosed cells."""
+    text = """
+    <html><body>
+    <input type="text" id="txtBuscar" value="x">
+    <table>
+      <tr><th>Nombre</th><th colspan="2">Monto</th></tr>
+      <tr><td>Mu&ntilde;oz &amp; Cía</td><td>1,5</td><td>2</td></tr>
+      <tr><td>Pérez <table><tr><td>nota</td></tr></table></td><td></td><td>3
+      <tr><td>Soto</td><td>2,25</td></tr>
+    </table>
+    <table><tr><td>second table</td></tr></table>
+    </body></html>
+    """
+    page = extract_page(text)
+    assert page.hidden == {}
+
+    df = page.table(thousands=".", decimal=",")
+    assert list(df.columns) == ["Nombre", "Monto", "Monto"]
+    assert df.iloc[:, 0].tolist() == ["Muñoz & Cía", "Pérez nota", "Soto"]
+    assert df.iloc[:, 1].tolist()[0::2] == [1.5, 2.25]
+    assert df.iloc[1, 1] != df.iloc[1, 1]  # NaN
+    assert df.iloc[:2, 2].tolist() == [2, 3]
@@ -0,0 +1,219 @@
+import duckdb
+
+from benchmarks.synthetic_senado import make_items
+from core.raw_cache import RawMonthCache
+from etl.normalize import unaccent_lower
+from etl.senado_processor import DataProcessor
+
+MONTHS = [(2024, 1), (2024, 2), (2024, 3)]
+
+
+def _save_month(cache, endpoint, year, month, count=10, seed=0):
+    items = make_items(endpoint, year, month, count, seed=seed)
+    cache.save(endpoint, year, month, {"data": {"data": items}})
+
+
+def _periods(path):
+    return duckdb.query(
+        f"SELECT periodo, count(*) FROM read_parquet('{path}') GROUP BY 1 ORDER BY 1"
+    ).fetchall()
+
+
+def test_senado_processor_only_rebuilds_changed_months(tmp_path):
+    """Test that unchanged months keep their partitions and removed months drop out."""
+    cache = RawMonthCache(str(tmp_path / "raw"))
+    for year, month in MONTHS:
+        _save_month(cache, "dietas", year, month)
+        _save_month(cache, "gastos_operacionales", year, month)
+
+    processor = DataProcessor(
+        cache_dir=str(tmp_path / "raw"),
+        output_dir=str(tmp_path / "parquet"),
+        processed_dir=str(tmp_path / "processed"),
+    )
+    output = tmp_path / "parquet" / "senado_consolidado.parquet"
+    partitions = processor.partitions["consolidado"]
+
+    processor.process_all()
+    assert _periods(output) == [(202401, 10), (202402, 10), (202403, 10)]
+    mtimes = {
+        m: tmp_path.joinpath(partitions.path(*m)).stat().st_mtime_ns for m in MONTHS
+    }
+
+    # Nothing changed: outputs are left alone
+    published = output.stat().st_mtime_ns
+    processor.process_all()
+    assert output.stat().st_mtime_ns == published
+
+    # A re-scraped month with new data only rebuilds that month
+    _save_month(cache, "dietas", 2024, 3, count=12, seed=1)
+    processor.process_all()
+    assert _periods(output) == [(202401, 10), (202402, 10), (202403, 12)]
+    for month in MONTHS[:2]:
+        assert (
+            tmp_path.joinpath(partitions.path(*month)).stat().st_mtime_ns
+            == mtimes[month]
+        )
+
+    # A month that disappears from the raw cache disappears from the outputs
+    (tmp_path / "raw" / "dietas" / "2024" / "01.ndjson.zst").unlink()
+    (tmp_path / "raw" / "gastos_operacionales" / "2024" / "01.ndjson.zst").unlink()
+    processor.process_all()
+    assert _periods(output) == [(202402, 10), (202403, 12)]
+
+
+def test_senado_staff_months_are_published_with_the_senators(tmp_path):
+    """Test that streamed staffing months map to the app schema and update alone."""
+    cache = RawMonthCache(str(tmp_path / "raw"))
+    for year, month in MONTHS[:2]:
+        _save_month(cache, "dietas", year, month)
+    for year, month in MONTHS:
+        writer = cache.stream_writer("dotacion_contrata", year, month)
+        items = make_items("dotacion_contrata", year, month, 7)
+        writer.add_page(1, items[:4])
+        writer.add_page(2, items[4:])
+        writer.commit()
+
+    processor = DataProcessor(
+        cache_dir=str(tmp_path / "raw"),
+        output_dir=str(tmp_path / "parquet"),
+        processed_dir=str(tmp_path / "processed"),
+    )
+    output = tmp_path / "parquet" / "senado_consolidado.parquet"
+    processor.process_all()
+    assert _periods(output) == [(202401, 17), (202402, 17), (202403, 7)]
+
+    first = make_items("dotacion_contrata", 2024, 1, 7)[0]["attributes"]
+    row = duckdb.query(
+        f"SELECT estamento, Nombres, Paterno, cargo, remuneracionbruta_mensual, "
+        f"search_vector FROM read_parquet('{output}') "
+        f"WHERE periodo = 202401 AND estamento <> 'Senador(a)' LIMIT 1"
+    ).fetchone()
+    assert row[:5] == (
+        "Personal a Contrata",
+        first["nombre"].upper(),
+        first["appaterno"].upper(),
+        first["cargo"].upper(),
+        first["remuneracion"],
+    )
+    full_name = f"{first['nombre']} {first['appaterno']} {first['apmaterno']}"
+    assert row[5] == unaccent_lower(full_name)
+
+    # Only the staff partition of the re-scraped month is rewritten
+    staff = processor.staff_partitions
+    mtime = tmp_path.joinpath(staff.path(2024, 1)).stat().st_mtime_ns
+    writer = cache.stream_writer("dotacion_contrata", 2024, 3)
+    writer.add_page(1, make_items("dotacion_contrata", 2024, 3, 3, seed=1))
+    writer.commit()
+    processor.process_all()
+    assert _periods(output) == [(202401, 17), (202402, 17), (202403, 3)]
+    assert tmp_path.joinpath(staff.path(2024, 1)).stat().st_mtime_ns == mtime
+
+
+def test_senado_travel_is_published_by_person_and_period(tmp_path):
+    """Test that flights and missions land in senado_viajes, sorted for lookups."""
+    cache = RawMonthCache(str(tmp_path / "raw"))
+    for year, month in MONTHS:
+        _save_month(cache, "dietas", year, month)
+        _save_month(cache, "viajes_nacionales", year, month, count=4)
+    _save_month(cache, "misiones_extranjero", 2024, 2, count=2)
+
+    processor = DataProcessor(
+        cache_dir=str(tmp_path / "raw"),
+        output_dir=str(tmp_path / "parquet"),
+        processed_dir=str(tmp_path / "processed"),
+    )
+    processor.process_all()
+    output = tmp_path / "parquet" / "senado_viajes.parquet"
+    assert _periods(output) == [(202401, 4), (202402, 6), (202403, 4)]
+
+    mission = make_items("misiones_extranjero", 2024, 2, 2)[0]["attributes"]
+    llave = f"{mission['nombre']} {mission['appaterno']} {mission['apmaterno']}"
+    rows = duckdb.execute(
+        f"SELECT tipo, destino, monto FROM read_parquet('{output}') "
+        "WHERE periodo = 202402 AND llave_senador = ? AND tipo = 'Extranjero'",
+        [llave.upper()],
+    ).fetchall()
+    assert (
+        "Extranjero",
+        mission["pais"],
+        mission["monto_total"],
+    ) in rows
+
+    keys = duckdb.query(
+        f"SELECT periodo, llave_senador FROM read_parquet('{output}')"
+    ).fetchall()
+    assert keys == sorted(keys)
+
+
+def test_diputados_gastos_are_renamed_when_a_dieta_adds_the_name(tmp_path):
+    """Test that a deputy first named in a later dieta file updates earlier gastos."""
+    import pandas as pd
+
+    from etl.diputados_processor import DiputadosProcessor
+
+    raw = tmp_path / "raw"
+    processor = DiputadosProcessor(
+        raw_dir=str(raw),
+        output_dir=str(tmp_path / "parquet"),
+        processed_dir=str(tmp_path / "processed"),
+    )
+    gastos = pd.DataFrame({"Concepto": ["Traslación"], "Monto": ["61.130"]})
+    for year, month in MONTHS[:2]:
+        processor.gastos_store.upsert(year, month, 7, gastos)
+
+    def write_dieta(year, month, pid, nombre):
+        dieta = raw / "diputados_dieta"
+        dieta.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(
+            {
+                "ID_Diputado": [pid],
+                "Nombre": [nombre],
+                "Cargo": ["Diputado"],
+                "Sueldo Liquido": [1],
+                "Sueldo Bruto": [2],
+            }
+        ).to_csv(dieta / f"{year}_{month:02d}.csv", index=False)
+
+    write_dieta(2024, 1, 1, "Otra Persona")
+    output = tmp_path / "parquet" / "diputados_gastos_detalle.parquet"
+
+    def names():
+        return duckdb.query(
+            f"SELECT periodo, llave_senador, monto FROM read_parquet('{output}') "
+            "ORDER BY periodo"
+        ).fetchall()
+
+    processor.process_all()
+    assert names() == [(202401, None, 61130), (202402, None, 61130)]
+
+    write_dieta(2024, 3, 7, "Ana Soto")
+    processor.process_all()
+    assert names() == [(202401, "ANA SOTO", 61130), (202402, "ANA SOTO", 61130)]
+
+
+def test_senado_travel_without_an_amount_field_is_null(tmp_path, caplog):
+    """Test that an unknown amount field publishes NULL amounts and warns."""
+    from etl.senado_processor import TRAVEL_FIELDS
+
+    cache = RawMonthCache(str(tmp_path / "raw"))
+    _save_month(cache, "dietas", 2024, 1)
+    items = make_items("viajes_nacionales", 2024, 1, 3)
+    for item in items:
+        for field in TRAVEL_FIELDS["monto"]:
+            item["attributes"].pop(field, None)
+        item["attributes"]["importe_pesos"] = 1000
+    cache.save("viajes_nacionales", 2024, 1, {"data": {"data": items}})
+
+    processor = DataProcessor(
+        cache_dir=str(tmp_path / "raw"),
+        output_dir=str(tmp_path / "parquet"),
+        processed_dir=str(tmp_path / "processed"),
+    )
+    with caplog.at_level("WARNING", logger="DataProcessor"):
+        processor.process_all()
+    output = tmp_path / "parquet" / "senado_viajes.parquet"
+    assert duckdb.query(
+        f"SELECT count(*), count(monto) FROM read_parquet('{output}')"
+    ).fetchone() == (3, 0)
+    assert any("viajes_nacionales" in r.getMessage() for r in caplog.records)
@@ -0,0 +1,52 @@
+import duckdb
+
+from benchmarks.synthetic_cplt import generate_csv
+from core.config import MONTHS_MAP
+from etl.ingest import process_csv_to_parquet
+
+
+def test_synthetic_csv_is_deterministic(tmp_path):
+    """Test that the benchmark generator produces identical files for the same seed."""
+    first = tmp_path / "a" / "TA_PersonalPlanta.csv"
+    second = tmp_path / "b" / "TA_PersonalPlanta.csv"
+    generate_csv(str(first), "Planta", 20_000, seed=7)
+    generate_csv(str(second), "Planta", 20_000, seed=7)
+
+    assert first.read_bytes() == second.read_bytes()
+    assert first.stat().st_size <= 20_000
+
+
+def test_process_csv_to_parquet_normalizes_synthetic_honorarios(tmp_path):
+    """Test the CSV -> Parquet conversion on a latin-1 file with money strings and accents."""
+    csv_path = tmp_path / "TA_PersonalContratohonorarios.csv"
+    stats = generate_csv(str(csv_path), "Honorarios", 30_000, seed=1)
+
+    parquet_path = process_csv_to_parquet(
+        str(csv_path), parquet_dir=str(tmp_path / "pq")
+    )
+    assert parquet_path is not None
+
+    df = duckdb.query(f"SELECT * FROM read_parquet('{parquet_path}')").to_df()
+    assert len(df) == stats["rows"]
+    assert set(df["origen"]) == {"Honorarios"}
+    assert df["remuneracionbruta_mensual"].notna().all()
+    assert (df["remuneracionbruta_mensual"] > 0).all()
+    # The search vector is lowercase and free of accents
+    assert df["search_vector"].str.fullmatch(r"[a-z ]+").all()
+
+
+def test_process_csv_to_parquet_adds_integer_periods(tmp_path):
+    """Test that ingest emits canonical months, mes_num and the packed YYYYMM periodo."""
+    csv_path = tmp_path / "TA_PersonalPlanta.csv"
+    generate_csv(str(csv_path), "Planta", 30_000, seed=2)
+
+    parquet_path = process_csv_to_parquet(
+        str(csv_path), parquet_dir=str(tmp_path / "pq")
+    )
+    df = duckdb.query(
+        f"SELECT anyo, Mes, mes_num, periodo FROM read_parquet('{parquet_path}')"
+    ).to_df()
+
+    assert df["mes_num"].between(1, 12).all()
+    assert (df["periodo"] == df["anyo"] * 100 + df["mes_num"]).all()
+    assert (df["Mes"].map(MONTHS_MAP) == df["mes_num"]).all()
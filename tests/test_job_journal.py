@@ -0,0 +1,51 @@
+from etl.job_journal import JobJournal
+
+
+def _journal(tmp_path, **kwargs):
+    return JobJournal(str(tmp_path / "jobs.sqlite"), **kwargs)
+
+
+def test_failed_items_back_off_and_interrupted_runs_resume(tmp_path):
+    """Test retry backoff, resuming running items and requeueing done ones."""
+    journal = _journal(tmp_path, backoff=60, max_backoff=100)
+    keys = [(2024, 1, ""), (2024, 2, ""), (2024, 3, "")]
+    assert journal.submit("senado", "dietas", keys, now=0) == 3
+    assert journal.due("senado", "dietas", now=0) == keys
+
+    journal.start("senado", "dietas", 2024, 1, now=0)
+    journal.finish("senado", "dietas", 2024, 1, records=10, now=2)
+    journal.start("senado", "dietas", 2024, 2, now=0)
+    assert journal.fail("senado", "dietas", 2024, 2, error="HTTP 500", now=1) == 60
+    # The run dies while March is running
+    journal.start("senado", "dietas", 2024, 3, now=1)
+
+    # Next run, 30s later: March resumes, February is still backing off
+    journal.submit("senado", "dietas", keys[1:], now=30)
+    assert journal.due("senado", "dietas", now=30) == [(2024, 3, "")]
+    assert journal.due("senado", "dietas", now=61) == [(2024, 2, ""), (2024, 3, "")]
+
+    # Second failure doubles the backoff, up to max_backoff
+    journal.start("senado", "dietas", 2024, 2, now=61)
+    assert journal.fail("senado", "dietas", 2024, 2, error="timeout", now=62) == 100
+    [failure] = journal.failures()
+    assert (failure["attempts"], failure["last_error"]) == (2, "timeout")
+
+    # A forced refresh retries it at once; a done month is requeued
+    journal.submit("senado", "dietas", keys, reset=True, now=70)
+    assert journal.due("senado", "dietas", now=70) == keys
+
+
+def test_summary_reports_progress_and_throughput(tmp_path):
+    journal = _journal(tmp_path)
+    journal.submit("camara", "gastos", [(2024, 1, pid) for pid in range(4)], now=0)
+    for i, pid in enumerate(range(3)):
+        journal.start("camara", "gastos", 2024, 1, pid, now=i * 10)
+        journal.finish("camara", "gastos", 2024, 1, pid, records=5, now=i * 10 + 2)
+
+    [row] = journal.summary("camara")
+    assert (row["pending"], row["done"], row["failed"]) == (1, 3, 0)
+    assert row["records"] == 15
+    assert row["mean_seconds"] == 2
+    # 3 items between t=0 and t=22
+    assert row["items_per_minute"] == round(3 * 60 / 22, 1)
+    assert journal.summary("senado") == []
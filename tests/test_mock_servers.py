@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+import requests
+
+from benchmarks.mock_servers import CamaraHandler, CPLTHandler, MockServer
+from etl import diputados_scraper, sync
+from etl.diputados_scraper import DiputadosScraper
+from etl.job_journal import JobJournal
+
+
+def test_sync_downloads_from_base_url_once(tmp_path, monkeypatch):
+    """Test CPLT_BASE_URL, HEAD metadata, ranges and the up-to-date check."""
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    for config in sync.DATASETS_CONFIG.values():
+        (fixtures / config["filename"]).write_bytes(b"anyo;Mes\n2024;Enero\n")
+    run_dir = tmp_path / "run"
+    run_dir.mkdir()
+    monkeypatch.chdir(run_dir)
+
+    with MockServer(CPLTHandler, fixtures_dir=str(fixtures)) as server:
+        monkeypatch.setenv("CPLT_BASE_URL", server.url)
+        assert sync.check_and_sync(run_ingest=False)
+        assert server.stats["requests"] == 6  # HEAD + GET per dataset
+        assert not sync.check_and_sync(run_ingest=False)
+        assert server.stats["requests"] == 9
+
+        url = f"{server.url}/TA_PersonalPlanta.csv"
+        partial = requests.get(url, headers={"Range": "bytes=5-"}, timeout=5)
+        assert partial.status_code == 206
+        assert partial.content == b"Mes\n2024;Enero\n"
+
+    assert (run_dir / "data" / "TA_PersonalPlanta.csv").read_bytes().startswith(b"anyo")
+
+
+def test_camara_staff_tables_from_mock(tmp_path, monkeypatch):
+    """Test a staff-table backfill against the ASP.NET mock, with a retry."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(diputados_scraper.time, "sleep", lambda s: None)
+    journal = JobJournal(str(tmp_path / "jobs.sqlite"), backoff=0)
+
+    with MockServer(CamaraHandler, staff_rows=7, error_rate=0.2, seed=3) as server:
+        monkeypatch.setenv("CAMARA_BASE_URL", server.url)
+        scraper = DiputadosScraper(start_year=2024, end_year=2024, journal=journal)
+        url = scraper.base_url + "/transparencia/funcionariosplanta.aspx"
+        for _ in range(5):
+            scraper.fetch_table("personal_planta", url)
+            if not journal.failures():
+                break
+        assert server.stats["errors"] > 0
+
+    files = sorted(os.listdir(tmp_path / "data/raw/diputados/personal_planta"))
+    assert files == [f"2024_{m:02d}.csv" for m in range(1, 13)]
+    df = pd.read_csv(tmp_path / "data/raw/diputados/personal_planta/2024_03.csv")
+    assert len(df) == 7
+    assert "Remuneración Bruta" in df.columns
+    assert (df["Mes"] == "Marzo").all()
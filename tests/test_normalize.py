@@ -0,0 +1,85 @@
+import duckdb
+import pandas as pd
+
+from etl.ingest import unaccent_lower_sql
+from etl.normalize import (
+    map_unique,
+    normalize_name,
+    person_keys,
+    search_vectors,
+    unaccent_lower,
+)
+from src.core.queries import unaccent_lower_python
+
+NAMES = [
+    "JOSÉ PÉREZ MUÑOZ",
+    "María Núñez",
+    "ANA IBÁÑEZ SOTO",
+    "Raúl  Díaz Rojas",
+    "Begoña Güell Martínez",
+    "ÑUÑOA",
+    "Inés Ñúñez",
+    "plain ascii",
+]
+
+
+def test_search_vectors_match_python_and_sql_unaccent():
+    """Test that the vectorized search vector equals the app-side and SQL normalizations."""
+    df = pd.DataFrame(
+        {
+            "Nombres": [n.split(" ", 1)[0] for n in NAMES],
+            "Paterno": [n.split(" ", 1)[1] if " " in n else "" for n in NAMES],
+            "Materno": "",
+        }
+    )
+    full_names = (df["Nombres"] + " " + df["Paterno"] + " ").tolist()
+
+    vectors = search_vectors(df).tolist()
+
+    assert vectors == [unaccent_lower_python(n).strip() for n in full_names]
+
+    sql_vectors = [
+        duckdb.query(f"SELECT {unaccent_lower_sql('?')}", params=[n]).fetchone()[0]
+        for n in full_names
+    ]
+    assert vectors == [v.strip() for v in sql_vectors]
+
+
+def test_unaccent_lower_handles_decomposed_characters():
+    """Test that NFD input (e.g. macOS 'n' + combining tilde) is normalized like the app."""
+    decomposed = "Nuñez"
+    assert unaccent_lower(decomposed) == unaccent_lower_python(decomposed) == "nunez"
+
+
+def test_person_keys_equal_row_wise_normalization():
+    """Test that the unique-value key builder gives the same result as the row-wise one."""
+    df = pd.DataFrame(
+        {
+            "nombre": ["José", "José", None, "María ", "Ana", "José"],
+            "appaterno": ["Pérez", "Pérez", "Soto", "Núñez", None, "Pérez"],
+            "apmaterno": ["Muñoz", "Muñoz", None, float("nan"), "Rojas", None],
+        }
+    )
+
+    expected = [
+        normalize_name(r.nombre, r.appaterno, r.apmaterno)
+        for r in df.itertuples(index=False)
+    ]
+    assert person_keys(df).tolist() == expected
+    # A missing column behaves like an empty one
+    assert person_keys(df.drop(columns="apmaterno")).tolist()[0] == "JOSÉ PÉREZ"
+
+
+def test_map_unique_calls_function_once_per_distinct_value():
+    """Test that the cost of normalization scales with distinct values, not rows."""
+    calls = []
+
+    def spy(value):
+        calls.append(value)
+        return unaccent_lower(value)
+
+    series = pd.Series(["Ñuñoa", "Ñuñoa", None, "Peñalolén"] * 1000)
+    result = map_unique(series, spy)
+
+    assert len(calls) == 3
+    assert result.tolist()[:4] == ["nunoa", "nunoa", "", "penalolen"]
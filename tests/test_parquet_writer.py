@@ -0,0 +1,50 @@
+import duckdb
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from etl.parquet_writer import APP_COLUMNS, APP_SORT, write_dataframe
+
+
+def test_outputs_share_schema_and_sort_order(tmp_path):
+    """Test that frames with different dtypes/columns land in the same schema."""
+    senado = pd.DataFrame(
+        {
+            "organismo_nombre": ["Senado", "Senado"],
+            "anyo": [2024, 2023],
+            "Mes": ["Enero", "Marzo"],
+            "remuliquida_mensual": [1.5e6, 2e6],
+            "periodo": [202401, 202303],
+            "extra": ["x", "y"],
+        }
+    )
+    camara = pd.DataFrame(
+        {"organismo_nombre": ["Cámara"], "anyo": ["2024"], "periodo": ["202402"]}
+    )
+    paths = [
+        write_dataframe(
+            df,
+            str(tmp_path / f"{name}.parquet"),
+            columns=APP_COLUMNS,
+            order_by=APP_SORT,
+        )
+        for name, df in (("senado", senado), ("camara", camara))
+    ]
+
+    schemas = [pq.read_schema(path) for path in paths]
+    assert schemas[0] == schemas[1]
+    assert schemas[0].names == list(APP_COLUMNS)
+
+    rows = duckdb.query(f"SELECT periodo FROM read_parquet('{paths[0]}')").fetchall()
+    assert rows == [(202303,), (202401,)]
+    # Row-group statistics are what quick_query's periodo filter prunes on
+    stats = pq.ParquetFile(paths[0]).metadata.row_group(0).column(13).statistics
+    assert (stats.min, stats.max) == (202303, 202401)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_dataframe(
+            pd.DataFrame({"a": [1]}), str(tmp_path / "x.parquet"), compression="lzma"
+        )
@@ -0,0 +1,104 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from etl.pipeline import Pipeline, Stage
+
+
+def _pipeline(tmp_path, stages):
+    return Pipeline(
+        stages,
+        state_path=str(tmp_path / "state.json"),
+        metrics_path=str(tmp_path / "metrics.json"),
+    )
+
+
+def test_unchanged_stages_are_skipped_and_failures_block_dependants(tmp_path):
+    """Test input-hash skipping, row metrics and failure propagation."""
+    source = tmp_path / "input.csv"
+    source.write_text("a\n1\n2\n")
+    output = tmp_path / "out.parquet"
+    calls = []
+
+    def build():
+        calls.append("build")
+        pd.read_csv(source).to_parquet(output)
+
+    def broken():
+        raise RuntimeError("boom")
+
+    stages = [
+        Stage("build", build, inputs=[str(source)], outputs=[str(output)]),
+        Stage("broken", broken),
+        Stage("after_broken", lambda: calls.append("after"), deps=["broken"]),
+    ]
+
+    results = _pipeline(tmp_path, stages).run()
+    assert results["build"].status == "ran"
+    assert results["build"].rows == 2
+    assert results["broken"].status == "failed"
+    assert results["after_broken"].status == "blocked"
+
+    assert _pipeline(tmp_path, stages).run()["build"].status == "skipped"
+
+    source.write_text("a\n1\n2\n3\n")
+    results = _pipeline(tmp_path, stages).run()
+    assert results["build"].status == "ran"
+    assert results["build"].rows == 3
+    assert calls == ["build", "build"]
+
+
+def test_independent_stages_run_in_parallel(tmp_path):
+    """Test that stages without dependencies between them overlap."""
+    barrier = threading.Barrier(2, timeout=5)
+    order = []
+    stages = [
+        Stage("senado", barrier.wait),
+        Stage("camara", barrier.wait),
+        Stage("metadata", lambda: order.append("metadata"), deps=["senado", "camara"]),
+    ]
+    results = _pipeline(tmp_path, stages).run()
+    assert {r.status for r in results.values()} == {"ran"}
+    assert order == ["metadata"]
+
+
+def test_cycles_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _pipeline(
+            tmp_path,
+            [Stage("a", print, deps=["b"]), Stage("b", print, deps=["a"])],
+        )
+
+
+def test_cplt_ingest_rebuilds_the_parquet_of_a_changed_csv(tmp_path, monkeypatch):
+    """Test that a re-downloaded CSV replaces its existing Parquet file."""
+    import duckdb
+
+    from benchmarks.synthetic_cplt import generate_csv
+    from etl.pipeline import build_stages
+
+    monkeypatch.chdir(tmp_path)
+    csv_path = tmp_path / "data" / "TA_PersonalPlanta.csv"
+    csv_path.parent.mkdir()
+    parquet_path = tmp_path / "data" / "parquet" / "TA_PersonalPlanta.parquet"
+    stages = [
+        stage
+        for stage in build_stages(sources=("cplt",), scrape=False)
+        if stage.name == "cplt_ingest"
+    ]
+
+    def ingested():
+        return duckdb.query(
+            f"SELECT count(*), sum(remuliquida_mensual) FROM '{parquet_path}'"
+        ).fetchone()
+
+    before = generate_csv(str(csv_path), "Planta", 20_000, seed=1)
+    assert _pipeline(tmp_path, stages).run()["cplt_ingest"].status == "ran"
+    assert ingested()[0] == before["rows"]
+
+    after = generate_csv(str(csv_path), "Planta", 40_000, seed=2)
+    old = ingested()
+    assert _pipeline(tmp_path, stages).run()["cplt_ingest"].status == "ran"
+    assert ingested()[0] == after["rows"]
+    assert ingested() != old
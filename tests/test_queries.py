@@ -0,0 +1,71 @@
+import pandas as pd
+
+from src.core.queries import quick_query
+
+
+def test_quick_query_filters_on_packed_periodo(tmp_path):
+    """Test that year/month filters are applied through the integer periodo column."""
+    parquet_path = str(tmp_path / "sample.parquet")
+    rows = [
+        (2023, "Diciembre", 12),
+        (2024, "Enero", 1),
+        (2024, "Diciembre", 12),
+        (2025, "Enero", 1),
+    ]
+    pd.DataFrame(
+        {
+            "organismo_nombre": "Municipalidad de Ñuñoa",
+            "anyo": [r[0] for r in rows],
+            "Mes": [r[1] for r in rows],
+            "estamento": "Profesional",
+            "Nombres": "JOSÉ",
+            "Paterno": "PÉREZ",
+            "Materno": "MUÑOZ",
+            "cargo": "Analista",
+            "remuliquida_mensual": 1_000_000,
+            "remuneracionbruta_mensual": 1_300_000,
+            "origen": "Planta",
+            "mes_num": [r[2] for r in rows],
+            "periodo": [r[0] * 100 + r[2] for r in rows],
+            "search_vector": "jose perez munoz",
+        }
+    ).to_parquet(parquet_path)
+    sources = [("Planta", parquet_path)]
+
+    df = quick_query(sources, None, 2024, 2024, "Diciembre", "José Pérez")
+    assert df[["anyo", "Mes"]].values.tolist() == [[2024, "Diciembre"]]
+
+    df = quick_query(sources, None, 2023, 2024, "Todos", "perez")
+    assert sorted(df["anyo"].tolist()) == [2023, 2024, 2024]
+
+
+def test_quick_query_derives_periodo_for_files_without_it(tmp_path):
+    """Test search and last record on files published before periodo/mes_num."""
+    from src.core.queries import get_last_record
+
+    old_path = str(tmp_path / "old.parquet")
+    pd.DataFrame(
+        {
+            "organismo_nombre": "Cámara de Diputadas y Diputados",
+            "anyo": [2023, 2024, 2024],
+            "Mes": ["Diciembre", "Marzo", "sin mes"],
+            "estamento": "Diputado(a)",
+            "Nombres": "ANA SOTO",
+            "Paterno": "",
+            "Materno": "",
+            "cargo": "Diputada",
+            "remuliquida_mensual": 1,
+            "remuneracionbruta_mensual": 2,
+            "origen": "Cámara de Diputados",
+            "search_vector": "ana soto",
+        }
+    ).to_parquet(old_path)
+    sources = [("Cámara", old_path)]
+
+    df = quick_query(sources, None, 2024, 2024, "Marzo", "ana")
+    assert df[["anyo", "Mes", "mes_num"]].values.tolist() == [[2024, "Marzo", 3]]
+    # A month that does not parse still belongs to its year
+    df = quick_query(sources, None, 2024, 2024, "Todos", "ana")
+    assert sorted(df["Mes"].tolist()) == ["Marzo", "sin mes"]
+
+    assert get_last_record(sources, "ana soto")["mes"] == "Marzo"
@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+
+from core.rate_limit import AdaptiveRateController, TokenBucket, parse_retry_after
+
+
+def test_token_bucket_paces_concurrent_callers():
+    """Test that concurrent acquisitions share one global rate."""
+    bucket = TokenBucket(rate=50)
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(11)))
+        return time.monotonic() - start
+
+    # One token is available up front, the other 10 arrive at 50/s
+    elapsed = asyncio.run(main())
+    assert 0.18 <= elapsed < 1.0
+
+    # The bucket keeps working across event loops
+    bucket.set_rate(1000)
+    assert asyncio.run(main()) < 0.2
+
+
+def test_adaptive_rate_grows_halves_and_persists(tmp_path):
+    """Test AIMD steps, the global pause on 429 and the saved rate."""
+    state = str(tmp_path / "rate.json")
+    controller = AdaptiveRateController(1.0, increase=0.5, state_path=state)
+    for _ in range(4):
+        controller.on_success(latency=0.1)
+    grown = controller.rate
+    assert grown > 2.0
+    controller.on_success(latency=60)  # slow answers do not raise it
+    assert controller.rate == grown
+
+    sent_at = time.monotonic()
+    controller.on_throttle(retry_after=0.2, sent_at=sent_at)
+    assert controller.rate == grown / 2
+    # A second 429 of a request sent before the cut is the same event
+    controller.on_throttle(retry_after=0.2, sent_at=sent_at)
+    assert controller.rate == grown / 2
+
+    start = time.monotonic()
+    asyncio.run(controller.acquire())
+    assert time.monotonic() - start >= 0.15
+
+    assert AdaptiveRateController(1.0, state_path=state).rate == pytest.approx(
+        grown / 2, abs=0.001
+    )
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None, default=5) == 5
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from benchmarks.synthetic_senado import make_items, write_json_cache
+from core.raw_cache import RawMonthCache, read_payload
+from etl.raw_loader import load_endpoint
+
+
+def _payload(items):
+    return {
+        "data": {
+            "data": items,
+            "meta": {"pagination": {"page": 1, "pageCount": 1, "total": len(items)}},
+        }
+    }
+
+
+@pytest.mark.parametrize("cache_format", ["json", "ndjson", "parquet"])
+def test_cached_month_recovers_original_payload(tmp_path, cache_format):
+    """Test that every cache format gives back the response that was stored."""
+    cache = RawMonthCache(str(tmp_path), cache_format)
+    payload = _payload(make_items("dietas", 2024, 3, 50, seed=2))
+
+    path = cache.save("dietas", 2024, 3, payload)
+
+    assert read_payload(path) == payload
+    assert cache.load("dietas", 2024, 3) == payload
+
+
+def test_ndjson_cache_is_lossless_for_irregular_records(tmp_path):
+    """Test that missing keys and mixed types survive the compressed NDJSON format."""
+    cache = RawMonthCache(str(tmp_path), "ndjson")
+    payload = {"data": [{"a": 1}, {"a": "x", "b": None}, {"c": [1, 2]}]}
+
+    cache.save("viajes_nacionales", 2023, 1, payload)
+
+    assert cache.load("viajes_nacionales", 2023, 1) == payload
+    table = load_endpoint(str(tmp_path), "viajes_nacionales")
+    assert table.num_rows == 3
+    assert table.column("a").to_pylist() == ["1", "x", None]
+
+
+def test_legacy_json_cache_is_migrated_transparently(tmp_path):
+    """Test that pretty-printed JSON months are rewritten and load identically."""
+    months = [(2023, 11), (2023, 12), (2024, 1)]
+    write_json_cache(str(tmp_path), "dietas", months, 40, seed=5)
+    expected = load_endpoint(str(tmp_path), "dietas")
+    with open(tmp_path / "dietas" / "2024" / "01.json", encoding="utf-8") as f:
+        original = json.load(f)
+
+    cache = RawMonthCache(str(tmp_path), "ndjson")
+    assert cache.migrate() == 3
+    assert not list(tmp_path.glob("dietas/*/*.json"))
+    assert cache.migrate() == 0
+
+    assert cache.load("dietas", 2024, 1) == original
+    migrated = load_endpoint(str(tmp_path), "dietas")
+    assert migrated.to_pandas().equals(expected.to_pandas())
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_json_months_load_the_same_with_one_or_several_workers(
+    tmp_path, caplog, max_workers
+):
+    """Test both JSON readers and that a non-record payload is skipped with a warning."""
+    from etl.raw_loader import load_files, month_files
+
+    months = [(2023, 12), (2024, 1)]
+    write_json_cache(str(tmp_path), "viajes_nacionales", months, 30, seed=4)
+    (tmp_path / "viajes_nacionales" / "2024" / "02.json").write_text(
+        json.dumps({"data": {"data": ["renamed", "fields"]}})
+    )
+    (tmp_path / "viajes_nacionales" / "2024" / "03.json").write_text(
+        json.dumps({"data": [{"a": 1}, {"a": "x"}]})
+    )
+    paths = month_files(str(tmp_path), "viajes_nacionales")
+
+    with caplog.at_level("WARNING", logger="RawLoader"):
+        table = load_files(paths, max_workers=max_workers)
+    expected = [
+        item["attributes"]
+        for year, month in months
+        for item in make_items("viajes_nacionales", year, month, 30, seed=4)
+    ]
+    assert table.num_rows == 60 + 2
+    # DuckDB types the dates, the json module keeps the text
+    rows = [
+        {key: str(value) if key == "fecha_ida" else value for key, value in row.items()}
+        for row in table.slice(0, 60).select(list(expected[0])).to_pylist()
+    ]
+    assert rows == expected
+    assert table.column("a").to_pylist()[60:][0] == "1"
+    assert any("02.json" in r.getMessage() for r in caplog.records)
@@ -0,0 +1,147 @@
+import datetime
+from urllib.parse import parse_qs, urlparse
+
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic_senado import make_items
+from etl.senado_scraper import SenadoScraper
+
+
+class FakeSenadoAPI:
+    """Serves synthetic months with one ETag per page and answers 304s."""
+
+    def __init__(self, page_size=500):
+        self.months = {}
+        self.page_size = page_size
+        self.requests = []
+        self.fail_once = set()
+
+    def set_month(self, year, month, items):
+        self.months[(year, month)] = items
+
+    def _etag(self, year, month, page):
+        return f'"{year}-{month}-{page}-{hash(str(self.months[(year, month)]))}"'
+
+    async def fetch_page(self, url, etag=None):
+        query = parse_qs(urlparse(url).query)
+        year, month = (
+            int(query["filters[ano][$eq]"][0]),
+            int(query["filters[mes][$eq]"][0]),
+        )
+        page = int(query["pagination[page]"][0])
+        self.requests.append((year, month, page, etag is not None))
+        if (year, month, page) in self.fail_once:
+            self.fail_once.discard((year, month, page))
+            raise ConnectionError("connection reset")
+        items = self.months.get((year, month), [])
+        current = self._etag(year, month, page) if items else None
+        if etag is not None and etag == current:
+            return None, etag
+        chunk = items[(page - 1) * self.page_size : page * self.page_size]
+        page_count = max(1, -(-len(items) // self.page_size))
+        payload = {
+            "data": {"data": chunk, "meta": {"pagination": {"pageCount": page_count}}}
+        }
+        return payload, current
+
+
+def _scraper(tmp_path, api, monkeypatch, **kwargs):
+    monkeypatch.chdir(tmp_path)
+    scraper = SenadoScraper(start_year=2024, end_year=2024, **kwargs)
+    scraper.today = datetime.date(2024, 6, 15)
+    monkeypatch.setattr(scraper.api_client, "fetch_page", api.fetch_page)
+    return scraper
+
+
+def test_only_recent_months_are_revalidated(tmp_path, monkeypatch):
+    """Test the freshness policy: closed months stay, recent ones are checked."""
+    api = FakeSenadoAPI(page_size=4)
+    for month in range(1, 7):
+        api.set_month(2024, month, make_items("dietas", 2024, month, 6, seed=month))
+    scraper = _scraper(tmp_path, api, monkeypatch, revalidate_months=2)
+    cache = scraper.api_client.cache
+
+    scraper.fetch_category("dietas", "diet")
+    # Future months are not requested; 2 pages per published month
+    assert {(y, m) for y, m, _, _ in api.requests} == {(2024, m) for m in range(1, 7)}
+    assert len(cache.month_files("dietas")) == 6
+    mtimes = {
+        p: tmp_path.joinpath(p).stat().st_mtime_ns for p in cache.month_files("dietas")
+    }
+
+    # Second run: only May and June are revalidated, with conditional GETs
+    api.requests.clear()
+    scraper.fetch_category("dietas", "diet")
+    assert sorted(api.requests) == [
+        (2024, 5, 1, True),
+        (2024, 5, 2, True),
+        (2024, 6, 1, True),
+        (2024, 6, 2, True),
+    ]
+    assert {p: tmp_path.joinpath(p).stat().st_mtime_ns for p in mtimes} == mtimes
+
+    # A correction to June is picked up; closed March is never refetched
+    api.set_month(2024, 3, make_items("dietas", 2024, 3, 6, seed=99))
+    api.set_month(2024, 6, make_items("dietas", 2024, 6, 5, seed=99))
+    scraper.fetch_category("dietas", "diet")
+    june = scraper.api_client.freshness.get("dietas", 2024, 6)
+    assert june["records"] == 5
+    assert cache.load("dietas", 2024, 6)["data"]["data"] == api.months[(2024, 6)]
+    assert cache.load("dietas", 2024, 3)["data"]["data"] != api.months[(2024, 3)]
+
+
+def test_refetched_month_with_same_content_is_not_rewritten(tmp_path, monkeypatch):
+    """Test that without ETags an identical download leaves the cache file alone."""
+    api = FakeSenadoAPI()
+    api.set_month(2024, 6, make_items("dietas", 2024, 6, 3))
+    api._etag = lambda *args: None
+    scraper = _scraper(tmp_path, api, monkeypatch)
+
+    scraper.fetch_category("dietas", "diet")
+    path = tmp_path / scraper.api_client.cache.find("dietas", 2024, 6)
+    mtime = path.stat().st_mtime_ns
+    scraper.fetch_category("dietas", "diet")
+    assert path.stat().st_mtime_ns == mtime
+    assert scraper.api_client.freshness.get("dietas", 2024, 6)["records"] == 3
+
+
+def test_pages_are_fetched_together_and_retried_individually(tmp_path, monkeypatch):
+    """Test that a failing page is retried alone and the merge keeps page order."""
+    api = FakeSenadoAPI(page_size=3)
+    items = make_items("dietas", 2024, 6, 14, seed=4)
+    api.set_month(2024, 6, items)
+    api.fail_once = {(2024, 6, 2), (2024, 6, 4)}
+    scraper = _scraper(tmp_path, api, monkeypatch)
+
+    scraper.fetch_category("dietas", "diet")
+
+    assert scraper.api_client.cache.load("dietas", 2024, 6)["data"]["data"] == items
+    pages = [page for _, month, page, _ in api.requests if month == 6]
+    assert sorted(pages) == [1, 2, 2, 3, 4, 4, 5]
+
+
+def test_staff_months_are_streamed_into_parquet(tmp_path, monkeypatch):
+    """Test that a staffing month is written page by page as one row group each."""
+    api = FakeSenadoAPI(page_size=4)
+    items = make_items("dotacion_contrata", 2024, 6, 14, seed=2)
+    api.set_month(2024, 6, items)
+    api.fail_once = {(2024, 6, 3)}
+    api._etag = lambda *args: None
+    scraper = _scraper(tmp_path, api, monkeypatch)
+    cache = scraper.api_client.cache
+
+    scraper.fetch_category("dotacion_contrata", "dotation/staffing")
+
+    path = tmp_path / cache.find("dotacion_contrata", 2024, 6)
+    assert path.name == "06.parquet"
+    assert pq.ParquetFile(path).num_row_groups == 4
+    assert cache.load("dotacion_contrata", 2024, 6)["data"]["data"] == items
+    assert not list(path.parent.glob("*.parts"))
+    assert (
+        scraper.api_client.freshness.get("dotacion_contrata", 2024, 6)["records"] == 14
+    )
+
+    # Same content again: the month file is left alone
+    mtime = path.stat().st_mtime_ns
+    scraper.fetch_category("dotacion_contrata", "dotation/staffing")
+    assert path.stat().st_mtime_ns == mtime